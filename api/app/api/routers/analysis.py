@@ -3,24 +3,39 @@ from fastapi.responses import JSONResponse
 import os
 import uuid
 import asyncio
-from typing import Optional, Union, Dict, Any
+import logging
+from typing import Optional, Union, Dict, Any, List
 from datetime import datetime
 
 from crewai import Crew, Process
-from app.domain.agents import financial_analyst, verifier, investment_advisor, risk_assessor
+from app.domain.agents import financial_analyst, verifier, investment_advisor, risk_assessor, LLM_SETTINGS
 from app.domain.task import analyze_financial_document, investment_analysis, risk_assessment, verification
-from app.api.routers.auth import get_current_active_user
+from app.api.routers.auth import get_current_active_user, get_current_admin_user
 from app.models.auth import User, DatabaseManager, AnalysisReport
-from app.models.factory import get_document_model, get_analysis_report_model
+from app.models.factory import get_async_document_model, get_analysis_report_model, get_task_report_mapping_model
+from app.models.async_models import run_in_db_pool
 from app.models.schemas import ReportStatus
 from app.celery_tasks import get_celery_task
+from app.services.coalescing import get_inflight_registry, build_coalesce_key, analysis_fingerprint
+from app.services.result_cache import get_result_cache
+from app.services.fair_share import get_fair_share_scheduler, user_tier
+from app.services.job_sizing import estimate_job, routing_options
+from app.services.admission import get_admission_controller, release_admitted
+from app.services.queue_monitor import get_queue_monitor
+from app.services.eta import register_task
+from app.services.embedded_executor import get_embedded_executor
+from app.services.uploads import save_upload, UploadTooLarge
+from app.services.storage import get_storage, store_for_workers
+from app.services import async_files
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
 # Initialize database manager
 db_manager = DatabaseManager()
 analysis_reports = AnalysisReport(db_manager)
-document_model = get_document_model()
+document_model = get_async_document_model()
 
 def run_crew(agents, tasks, query: str, file_path: str):
     """Run the crew with specified agents and tasks"""
@@ -33,15 +48,15 @@ def run_crew(agents, tasks, query: str, file_path: str):
     result = crew.kickoff({'query': query, 'file_path': file_path})
     return result
 
-def validate_document_ownership(document_id: Optional[str], user_id: str) -> None:
-    """Validate that the document belongs to the user"""
-    if document_id is not None:
-        document = document_model.get_document(document_id, user_id)
-        if not document:
-            raise HTTPException(
-                status_code=404, 
-                detail="Document not found or you don't have permission to access it"
-            )
+async def get_owned_document(document_id: str, user_id: str) -> Dict[str, Any]:
+    """Get a document, validating that it belongs to the user"""
+    document = await document_model.get_document(document_id, user_id)
+    if not document:
+        raise HTTPException(
+            status_code=404, 
+            detail="Document not found or you don't have permission to access it"
+        )
+    return document
 
 def save_analysis_report(
     user_id: int,
@@ -91,11 +106,245 @@ def save_analysis_report(
         print(f"Error saving analysis report: {str(e)}")
         raise
 
+def _queued_response(report_id: str, task_id: Optional[str], report_status: ReportStatus,
+                     coalesced: bool = False, cached: bool = False,
+                     eta_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Describe how a submission was handled by queue_analysis"""
+    return {
+        "report_id": report_id,
+        "task_id": task_id,
+        "status": "completed" if cached else "queued",
+        "report_status": report_status.value,
+        "coalesced": coalesced,
+        "cached": cached,
+        "eta_seconds": eta_seconds,
+        "task_status_url": f"/tasks/{task_id}/status" if task_id else None
+    }
+
+def check_admission(task_ids: List[str], batch: bool = False) -> Optional[float]:
+    """Reject the submission of task_ids with 429 when the backlog budget is exceeded.
+    
+    Admitted tasks count as waiting until they start; call release_admitted
+    for tasks that will not be queued after all. Returns the estimated
+    completion time in seconds when it is known.
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        return None
+    
+    try:
+        decision = controller.check(get_queue_monitor().snapshot(), task_ids, batch=batch)
+    except Exception as e:
+        logger.warning(f"Admission control unavailable, admitting submission: {str(e)}")
+        return None
+    
+    if not decision["admitted"]:
+        raise HTTPException(
+            status_code=429,
+            detail=(
+                f"Analysis backlog is full (estimated completion in {int(decision['eta_seconds'])}s); "
+                f"retry in {decision['retry_after_seconds']}s"
+            ),
+            headers={"Retry-After": str(decision["retry_after_seconds"])}
+        )
+    return decision["eta_seconds"]
+
+async def _save_upload(file: UploadFile, file_path: str) -> str:
+    """Stream an uploaded file to file_path and return its SHA-256 checksum"""
+    try:
+        return (await save_upload(file, file_path)).sha256
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+def _discard_upload(file_path: str) -> None:
+    """Remove an uploaded analysis input from the API's disk"""
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+def _discard_stored_upload(file_key: str) -> None:
+    """Remove an uploaded analysis input from document storage"""
+    try:
+        get_storage().delete(file_key)
+    except Exception as e:
+        logger.warning(f"Could not remove stored upload {file_key}: {str(e)}")
+
+def queue_analysis(
+    analysis_type: str,
+    user_id: str,
+    query: str,
+    file_path: str,
+    file_name: str,
+    queued_message: str,
+    document_id: Optional[str] = None,
+    checksum: Optional[str] = None,
+    force_refresh: bool = False,
+    tier: str = "standard",
+    uploaded: bool = False
+) -> Dict[str, Any]:
+    """Create a pending report and enqueue its analysis task.
+    
+    A previously completed identical analysis (same document checksum,
+    analysis type, normalized query and model configuration) is served from
+    the result cache unless force_refresh is set. When an identical analysis
+    is already in flight, the new report is attached to that task instead of
+    starting another crew run. New tasks go through the fair-share
+    scheduler so one user's burst cannot starve everyone else.
+    
+    The input reaches the worker through document storage by key. An
+    uploaded file (uploaded=True) is a one-off input: it is removed here
+    when no task will read it, and by the worker once its task is done.
+    """
+    analysis_reports = get_analysis_report_model()
+    fingerprint = analysis_fingerprint(checksum, analysis_type, query, LLM_SETTINGS) if checksum else None
+    
+    result_cache = get_result_cache() if fingerprint and not force_refresh else None
+    if result_cache is not None:
+        try:
+            cached = result_cache.get(fingerprint, analysis_type)
+        except Exception as e:
+            logger.warning(f"Result cache unavailable, enqueueing analysis: {str(e)}")
+            cached = None
+        
+        if cached:
+            report_data = analysis_reports.create_report(
+                user_id=user_id,
+                analysis_type=analysis_type,
+                query=query,
+                file_name=file_name,
+                analysis_result=cached["result"],
+                document_id=document_id
+            )
+            report_id = report_data["id"] if isinstance(report_data, dict) else report_data
+            logger.info(f"Report {report_id} served from {analysis_type} result cache")
+            if uploaded:
+                _discard_upload(file_path)
+            return _queued_response(report_id, None, ReportStatus.COMPLETED, cached=True)
+    
+    task_id = str(uuid.uuid4())
+    eta_seconds = check_admission([task_id])
+    
+    try:
+        report_data = analysis_reports.create_report(
+            user_id=user_id,
+            analysis_type=analysis_type,
+            query=query,
+            file_name=file_name,
+            analysis_result=queued_message,
+            document_id=document_id
+        )
+    except Exception:
+        release_admitted([task_id])
+        raise
+    report_id = report_data["id"] if isinstance(report_data, dict) else report_data
+    
+    coalesce_key = None
+    registry = get_inflight_registry() if checksum else None
+    if registry is not None:
+        try:
+            key = build_coalesce_key(checksum, analysis_type, query, LLM_SETTINGS)
+            owner_task_id = registry.claim_or_attach(key, task_id, analysis_type, report_id, user_id)
+            if owner_task_id:
+                logger.info(f"Report {report_id} attached to in-flight {analysis_type} task {owner_task_id}")
+                # Lets the report be tracked (and the shared task followed) like its own task
+                get_task_report_mapping_model().create_follower(
+                    task_id=owner_task_id,
+                    report_id=report_id,
+                    user_id=user_id,
+                    analysis_type=analysis_type
+                )
+                # The new task is never queued
+                release_admitted([task_id])
+                if uploaded:
+                    _discard_upload(file_path)
+                return _queued_response(report_id, owner_task_id, ReportStatus.PENDING, coalesced=True,
+                                        eta_seconds=eta_seconds)
+            coalesce_key = key
+        except Exception as e:
+            logger.warning(f"In-flight registry unavailable, enqueueing without coalescing: {str(e)}")
+    
+    # Route by estimated document size and derive the task's time limits
+    estimate = estimate_job(file_path)
+    options = routing_options(estimate)
+    
+    # Start Celery task
+    celery_task = get_celery_task(analysis_type)
+    task_kwargs = {
+        "report_id": report_id,
+        "query": query,
+        "file_path": file_path,
+        "file_name": file_name,
+        "user_id": user_id,
+        "document_id": document_id,
+        "coalesce_key": coalesce_key,
+        "result_fingerprint": fingerprint,
+        "size_class": estimate["size_class"] if estimate else None,
+        "delete_input": uploaded
+    }
+    register_task(task_id, analysis_type, estimate["pages"] if estimate else None)
+    file_key = None
+    try:
+        # Documents never change once stored, so an existing object is reused
+        file_key = store_for_workers(file_path, skip_existing=not uploaded)
+        task_kwargs["file_key"] = file_key
+        
+        executor = get_embedded_executor()
+        # Without Celery workers there is nothing for the fair-share scheduler to dispatch to
+        scheduler = get_fair_share_scheduler() if executor is None else None
+        submitted = False
+        if executor is not None:
+            executor.submit(celery_task.name, task_id, task_kwargs)
+            submitted = True
+        elif scheduler is not None:
+            try:
+                scheduler.submit(celery_task.name, task_id, task_kwargs, user_id, tier=tier, options=options)
+                submitted = True
+            except Exception as e:
+                logger.warning(f"Fair-share scheduler unavailable, enqueueing directly: {str(e)}")
+        
+        if not submitted:
+            celery_task.apply_async(kwargs=task_kwargs, task_id=task_id, **options)
+    except Exception:
+        release_admitted([task_id])
+        if uploaded and file_key:
+            _discard_stored_upload(file_key)
+        # Reports attached while we held the key would otherwise wait forever
+        if coalesce_key:
+            # Cleanup errors must not mask the submission error
+            try:
+                for follower in registry.release(coalesce_key, task_id):
+                    analysis_reports.update_report(
+                        report_id=follower["report_id"],
+                        user_id=follower["user_id"],
+                        summary="Analysis could not be queued",
+                        status=ReportStatus.FAILED.value
+                    )
+            except Exception as e:
+                logger.error(f"Could not release coalesced task {task_id}: {str(e)}")
+        raise
+    
+    # Workers read the upload from storage; the API's copy is no longer needed
+    if uploaded and get_storage().local_path(file_key) is None:
+        _discard_upload(file_path)
+    
+    # Create task-report mapping
+    mapping_model = get_task_report_mapping_model()
+    mapping_model.create_mapping(
+        task_id=task_id,
+        report_id=report_id,
+        user_id=user_id,
+        analysis_type=analysis_type
+    )
+    
+    return _queued_response(report_id, task_id, ReportStatus.PENDING, eta_seconds=eta_seconds)
+
 @router.post("/comprehensive")
 async def analyze_comprehensive(
     query: str = Form(default="Analyze this financial document for comprehensive insights"),
     file: Optional[UploadFile] = File(None),
     document_id: Optional[str] = Form(None),
+    force_refresh: bool = Form(False),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """Comprehensive financial document analysis - runs in background"""
@@ -115,13 +364,11 @@ async def analyze_comprehensive(
     
     # Validate document ownership if document_id is provided
     if document_id:
-        validate_document_ownership(document_id, current_user["id"])
-        # Get document details for analysis
-        document = document_model.get_document(document_id, current_user["id"])
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
+        # Ownership check and document details in one lookup
+        document = await get_owned_document(document_id, current_user["id"])
         file_path = document['path']
         file_name = document['original_name']
+        checksum = document.get('checksum')
     else:
         # Handle file upload
         file_id = str(uuid.uuid4())
@@ -142,68 +389,56 @@ async def analyze_comprehensive(
             os.makedirs("data", exist_ok=True)
             
             # Save uploaded file
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
+            checksum = await _save_upload(file, file_path)
         
         # Validate query
         if not query or query.strip() == "":
             query = "Analyze this financial document for comprehensive insights"
         
-        # Create report with pending status
-        analysis_reports = get_analysis_report_model()
-        report_data = analysis_reports.create_report(
-            user_id=current_user["id"],
+        # Create report and start Celery task (or attach to an identical in-flight run)
+        queued = await run_in_db_pool(
+            queue_analysis,
             analysis_type="comprehensive",
-            query=query.strip(),
-            file_name=file_name,
-            analysis_result="Analysis queued...",
-            document_id=document_id
-        )
-        report_id = report_data["id"] if isinstance(report_data, dict) else report_data
-        
-        # Start Celery task
-        celery_task = get_celery_task("comprehensive")
-        task = celery_task.delay(
-            report_id=report_id,
+            user_id=current_user["id"],
             query=query.strip(),
             file_path=file_path,
             file_name=file_name,
-            user_id=current_user["id"],
-            document_id=document_id
-        )
-        
-        # Create task-report mapping
-        from app.models.factory import get_task_report_mapping_model
-        mapping_model = get_task_report_mapping_model()
-        mapping_model.create_mapping(
-            task_id=task.id,
-            report_id=report_id,
-            user_id=current_user["id"],
-            analysis_type="comprehensive"
+            queued_message="Analysis queued...",
+            document_id=document_id,
+            checksum=checksum,
+            force_refresh=force_refresh,
+            tier=user_tier(current_user),
+            uploaded=bool(file)
         )
+        report_id = queued["report_id"]
+        task_id = queued["task_id"]
         
         return {
-            "status": "queued",
+            "status": queued["status"],
             "analysis_type": "comprehensive",
             "query": query,
             "file_processed": file_name,
             "user_id": current_user["id"],
             "report_id": report_id,
-            "task_id": task.id,
-            "report_status": ReportStatus.PENDING.value,
+            "task_id": task_id,
+            "report_status": queued["report_status"],
+            "coalesced": queued["coalesced"],
+            "cached": queued["cached"],
+            "eta_seconds": queued["eta_seconds"],
             "report_download_url": f"/reports/{report_id}/download",
-            "task_status_url": f"/tasks/{task.id}/status",
-            "message": "Analysis has been queued and will be processed in the background"
+            "task_status_url": queued["task_status_url"],
+            "message": "Analysis result served from cache" if queued["cached"] else "Analysis has been queued and will be processed in the background"
         }
         
     except Exception as e:
-        # Only cleanup uploaded file, not existing documents
-        if file and os.path.exists(file_path):
+        # Only cleanup uploaded file on failure (a queued task still reads it), not existing documents
+        if file:
             try:
-                os.remove(file_path)
+                await async_files.remove(file_path)
             except:
                 pass  # Ignore cleanup errors
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=f"Error processing financial document: {str(e)}")
 
 @router.post("/investment")
@@ -211,6 +446,7 @@ async def analyze_investment(
     query: str = Form(default="Analyze this financial document for investment opportunities"),
     file: Optional[UploadFile] = File(None),
     document_id: Optional[str] = Form(None),
+    force_refresh: bool = Form(False),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """Investment-focused financial document analysis"""
@@ -230,13 +466,11 @@ async def analyze_investment(
     
     # Validate document ownership if document_id is provided
     if document_id:
-        validate_document_ownership(document_id, current_user["id"])
-        # Get document details for analysis
-        document = document_model.get_document(document_id, current_user["id"])
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
+        # Ownership check and document details in one lookup
+        document = await get_owned_document(document_id, current_user["id"])
         file_path = document['path']
         file_name = document['original_name']
+        checksum = document.get('checksum')
     else:
         # Handle file upload
         file_id = str(uuid.uuid4())
@@ -257,77 +491,64 @@ async def analyze_investment(
             os.makedirs("data", exist_ok=True)
             
             # Save uploaded file
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
+            checksum = await _save_upload(file, file_path)
         
         # Validate query
         if not query or query.strip() == "":
             query = "Analyze this financial document for investment opportunities"
         
-        # Create report with pending status
-        analysis_reports = get_analysis_report_model()
-        report_data = analysis_reports.create_report(
-            user_id=current_user["id"],
+        # Create report and start Celery task (or attach to an identical in-flight run)
+        queued = await run_in_db_pool(
+            queue_analysis,
             analysis_type="investment",
-            query=query.strip(),
-            file_name=file_name,
-            analysis_result="Investment analysis queued...",
-            document_id=document_id
-        )
-        report_id = report_data["id"] if isinstance(report_data, dict) else report_data
-        
-        # Start Celery task
-        celery_task = get_celery_task("investment")
-        task = celery_task.delay(
-            report_id=report_id,
+            user_id=current_user["id"],
             query=query.strip(),
             file_path=file_path,
             file_name=file_name,
-            user_id=current_user["id"],
-            document_id=document_id
-        )
-        
-        # Create task-report mapping
-        from app.models.factory import get_task_report_mapping_model
-        mapping_model = get_task_report_mapping_model()
-        mapping_model.create_mapping(
-            task_id=task.id,
-            report_id=report_id,
-            user_id=current_user["id"],
-            analysis_type="investment"
+            queued_message="Investment analysis queued...",
+            document_id=document_id,
+            checksum=checksum,
+            force_refresh=force_refresh,
+            tier=user_tier(current_user),
+            uploaded=bool(file)
         )
+        report_id = queued["report_id"]
+        task_id = queued["task_id"]
         
         return {
-            "status": "queued",
+            "status": queued["status"],
             "analysis_type": "investment",
             "query": query,
             "file_processed": file_name,
             "user_id": current_user["id"],
             "report_id": report_id,
-            "task_id": task.id,
-            "report_status": ReportStatus.PENDING.value,
+            "task_id": task_id,
+            "report_status": queued["report_status"],
+            "coalesced": queued["coalesced"],
+            "cached": queued["cached"],
+            "eta_seconds": queued["eta_seconds"],
             "report_download_url": f"/reports/{report_id}/download",
-            "task_status_url": f"/tasks/{task.id}/status",
-            "message": "Investment analysis has been queued and will be processed in the background"
+            "task_status_url": queued["task_status_url"],
+            "message": "Analysis result served from cache" if queued["cached"] else "Investment analysis has been queued and will be processed in the background"
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing investment analysis: {str(e)}")
-    
-    finally:
-        # Only cleanup uploaded file, not existing documents
-        if file and os.path.exists(file_path):
+        # Only cleanup uploaded file on failure (a queued task still reads it), not existing documents
+        if file:
             try:
-                os.remove(file_path)
+                await async_files.remove(file_path)
             except:
                 pass  # Ignore cleanup errors
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Error processing investment analysis: {str(e)}")
 
 @router.post("/risk")
 async def analyze_risk(
     query: str = Form(default="Analyze this financial document for risk assessment"),
     file: Optional[UploadFile] = File(None),
     document_id: Optional[str] = Form(None),
+    force_refresh: bool = Form(False),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """Risk-focused financial document analysis"""
@@ -347,13 +568,11 @@ async def analyze_risk(
     
     # Validate document ownership if document_id is provided
     if document_id:
-        validate_document_ownership(document_id, current_user["id"])
-        # Get document details for analysis
-        document = document_model.get_document(document_id, current_user["id"])
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
+        # Ownership check and document details in one lookup
+        document = await get_owned_document(document_id, current_user["id"])
         file_path = document['path']
         file_name = document['original_name']
+        checksum = document.get('checksum')
     else:
         # Handle file upload
         file_id = str(uuid.uuid4())
@@ -374,77 +593,64 @@ async def analyze_risk(
             os.makedirs("data", exist_ok=True)
             
             # Save uploaded file
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
+            checksum = await _save_upload(file, file_path)
         
         # Validate query
         if not query or query.strip() == "":
             query = "Analyze this financial document for risk assessment"
         
-        # Create report with pending status
-        analysis_reports = get_analysis_report_model()
-        report_data = analysis_reports.create_report(
-            user_id=current_user["id"],
+        # Create report and start Celery task (or attach to an identical in-flight run)
+        queued = await run_in_db_pool(
+            queue_analysis,
             analysis_type="risk",
-            query=query.strip(),
-            file_name=file_name,
-            analysis_result="Risk analysis queued...",
-            document_id=document_id
-        )
-        report_id = report_data["id"] if isinstance(report_data, dict) else report_data
-        
-        # Start Celery task
-        celery_task = get_celery_task("risk")
-        task = celery_task.delay(
-            report_id=report_id,
+            user_id=current_user["id"],
             query=query.strip(),
             file_path=file_path,
             file_name=file_name,
-            user_id=current_user["id"],
-            document_id=document_id
-        )
-        
-        # Create task-report mapping
-        from app.models.factory import get_task_report_mapping_model
-        mapping_model = get_task_report_mapping_model()
-        mapping_model.create_mapping(
-            task_id=task.id,
-            report_id=report_id,
-            user_id=current_user["id"],
-            analysis_type="risk"
+            queued_message="Risk analysis queued...",
+            document_id=document_id,
+            checksum=checksum,
+            force_refresh=force_refresh,
+            tier=user_tier(current_user),
+            uploaded=bool(file)
         )
+        report_id = queued["report_id"]
+        task_id = queued["task_id"]
         
         return {
-            "status": "queued",
+            "status": queued["status"],
             "analysis_type": "risk",
             "query": query,
             "file_processed": file_name,
             "user_id": current_user["id"],
             "report_id": report_id,
-            "task_id": task.id,
-            "report_status": ReportStatus.PENDING.value,
+            "task_id": task_id,
+            "report_status": queued["report_status"],
+            "coalesced": queued["coalesced"],
+            "cached": queued["cached"],
+            "eta_seconds": queued["eta_seconds"],
             "report_download_url": f"/reports/{report_id}/download",
-            "task_status_url": f"/tasks/{task.id}/status",
-            "message": "Risk analysis has been queued and will be processed in the background"
+            "task_status_url": queued["task_status_url"],
+            "message": "Analysis result served from cache" if queued["cached"] else "Risk analysis has been queued and will be processed in the background"
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing risk analysis: {str(e)}")
-    
-    finally:
-        # Only cleanup uploaded file, not existing documents
-        if file and os.path.exists(file_path):
+        # Only cleanup uploaded file on failure (a queued task still reads it), not existing documents
+        if file:
             try:
-                os.remove(file_path)
+                await async_files.remove(file_path)
             except:
                 pass  # Ignore cleanup errors
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Error processing risk analysis: {str(e)}")
 
 @router.post("/verify")
 async def verify_document(
     query: str = Form(default="Verify if this is a valid financial document"),
     file: Optional[UploadFile] = File(None),
     document_id: Optional[str] = Form(None),
+    force_refresh: bool = Form(False),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """Verify if the document is a valid financial record"""
@@ -464,13 +670,11 @@ async def verify_document(
     
     # Validate document ownership if document_id is provided
     if document_id:
-        validate_document_ownership(document_id, current_user["id"])
-        # Get document details for analysis
-        document = document_model.get_document(document_id, current_user["id"])
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
+        # Ownership check and document details in one lookup
+        document = await get_owned_document(document_id, current_user["id"])
         file_path = document['path']
         file_name = document['original_name']
+        checksum = document.get('checksum')
     else:
         # Handle file upload
         file_id = str(uuid.uuid4())
@@ -491,71 +695,57 @@ async def verify_document(
             os.makedirs("data", exist_ok=True)
             
             # Save uploaded file
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
+            checksum = await _save_upload(file, file_path)
         
         # Validate query
         if not query or query.strip() == "":
             query = "Verify if this is a valid financial document"
         
-        # Create report with pending status
-        analysis_reports = get_analysis_report_model()
-        report_data = analysis_reports.create_report(
-            user_id=current_user["id"],
+        # Create report and start Celery task (or attach to an identical in-flight run)
+        queued = await run_in_db_pool(
+            queue_analysis,
             analysis_type="verification",
-            query=query.strip(),
-            file_name=file_name,
-            analysis_result="Verification analysis queued...",
-            document_id=document_id
-        )
-        report_id = report_data["id"] if isinstance(report_data, dict) else report_data
-        
-        # Start Celery task
-        celery_task = get_celery_task("verification")
-        task = celery_task.delay(
-            report_id=report_id,
+            user_id=current_user["id"],
             query=query.strip(),
             file_path=file_path,
             file_name=file_name,
-            user_id=current_user["id"],
-            document_id=document_id
-        )
-        
-        # Create task-report mapping
-        from app.models.factory import get_task_report_mapping_model
-        mapping_model = get_task_report_mapping_model()
-        mapping_model.create_mapping(
-            task_id=task.id,
-            report_id=report_id,
-            user_id=current_user["id"],
-            analysis_type="verification"
+            queued_message="Verification analysis queued...",
+            document_id=document_id,
+            checksum=checksum,
+            force_refresh=force_refresh,
+            tier=user_tier(current_user),
+            uploaded=bool(file)
         )
+        report_id = queued["report_id"]
+        task_id = queued["task_id"]
         
         return {
-            "status": "queued",
+            "status": queued["status"],
             "analysis_type": "verification",
             "query": query,
             "file_processed": file_name,
             "user_id": current_user["id"],
             "report_id": report_id,
-            "task_id": task.id,
-            "report_status": ReportStatus.PENDING.value,
+            "task_id": task_id,
+            "report_status": queued["report_status"],
+            "coalesced": queued["coalesced"],
+            "cached": queued["cached"],
+            "eta_seconds": queued["eta_seconds"],
             "report_download_url": f"/reports/{report_id}/download",
-            "task_status_url": f"/tasks/{task.id}/status",
-            "message": "Verification analysis has been queued and will be processed in the background"
+            "task_status_url": queued["task_status_url"],
+            "message": "Analysis result served from cache" if queued["cached"] else "Verification analysis has been queued and will be processed in the background"
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing document verification: {str(e)}")
-    
-    finally:
-        # Only cleanup uploaded file, not existing documents
-        if file and os.path.exists(file_path):
+        # Only cleanup uploaded file on failure (a queued task still reads it), not existing documents
+        if file:
             try:
-                os.remove(file_path)
+                await async_files.remove(file_path)
             except:
                 pass  # Ignore cleanup errors
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Error processing document verification: {str(e)}")
 
 @router.get("/types")
 async def get_analysis_types(current_user: Dict[str, Any] = Depends(get_current_active_user)):
@@ -584,3 +774,27 @@ async def get_analysis_types(current_user: Dict[str, Any] = Depends(get_current_
             }
         ]
     }
+
+@router.get("/stats/coalescing")
+async def get_coalescing_stats(current_user: Dict[str, Any] = Depends(get_current_admin_user)):
+    """Get how many crew runs were saved by coalescing identical in-flight requests (admin only)"""
+    registry = get_inflight_registry()
+    if registry is None:
+        return {"enabled": False}
+    
+    try:
+        return {"enabled": True, **registry.get_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving coalescing stats: {str(e)}")
+
+@router.get("/stats/cache")
+async def get_result_cache_stats(current_user: Dict[str, Any] = Depends(get_current_admin_user)):
+    """Get completed-analysis result cache statistics (admin only)"""
+    result_cache = get_result_cache()
+    if result_cache is None:
+        return {"enabled": False}
+    
+    try:
+        return {"enabled": True, **result_cache.get_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving result cache stats: {str(e)}")
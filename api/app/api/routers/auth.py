@@ -13,15 +13,16 @@ import logging
 from datetime import datetime
 
 from app.models.auth import DatabaseManager, User, Session
+from app.models.async_models import AsyncModel
 from app.core.security import jwt_manager
 from app.models.schemas import UserCreate as UserCreateSchema, UserResponse as UserResponseSchema, UserLogin, LoginResponse as TokenResponse, RefreshTokenRequest
 
 logger = logging.getLogger(__name__)
 
-# Initialize database and models
+# Initialize database and models; their calls run in the database thread pool
 db_manager = DatabaseManager()
-user_model = User(db_manager)
-session_model = Session(db_manager)
+user_model = AsyncModel(User(db_manager))
+session_model = AsyncModel(Session(db_manager))
 
 # Security scheme
 security = HTTPBearer()
@@ -58,7 +59,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             )
         
         # Get user from database
-        user = user_model.get_user_by_id(user_id)
+        user = await user_model.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -110,7 +111,7 @@ async def register_user(user_data: UserCreateSchema):
             )
         
         # Create user
-        user_id = user_model.create_user(
+        user_id = await user_model.create_user(
             username=user_data.username,
             email=user_data.email,
             password=user_data.password,
@@ -118,7 +119,7 @@ async def register_user(user_data: UserCreateSchema):
         )
         
         # Fetch the created user data
-        user = user_model.get_user_by_id(user_id)
+        user = await user_model.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -145,7 +146,7 @@ async def login_user(login_data: UserLogin):
     """Login user and return JWT tokens"""
     try:
         # Authenticate user
-        user = user_model.authenticate_user(login_data.username, login_data.password)
+        user = await user_model.authenticate_user(login_data.username, login_data.password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -154,7 +155,7 @@ async def login_user(login_data: UserLogin):
             )
         
         # Create session
-        session_data = session_model.create_session(user["id"])
+        session_data = await session_model.create_session(user["id"])
         
         # Create JWT tokens
         token_data = {
@@ -209,7 +210,7 @@ async def refresh_token(refresh_data: RefreshTokenRequest):
             )
         
         # Get user
-        user = user_model.get_user_by_id(user_id)
+        user = await user_model.get_user_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -254,7 +255,7 @@ async def logout_user(current_user: Dict[str, Any] = Depends(get_current_active_
     """Logout user and revoke all sessions"""
     try:
         # Revoke all user sessions
-        session_model.revoke_all_user_sessions(current_user["id"])
+        await session_model.revoke_all_user_sessions(current_user["id"])
         
         logger.info(f"User logged out: {current_user['username']}")
         
@@ -351,7 +352,7 @@ async def delete_user(
 async def cleanup_expired_sessions(current_user: Dict[str, Any] = Depends(get_current_admin_user)):
     """Clean up expired sessions (admin only)"""
     try:
-        cleaned_count = session_model.cleanup_expired_sessions()
+        cleaned_count = await session_model.cleanup_expired_sessions()
         
         logger.info(f"Cleaned up {cleaned_count} expired sessions")
         
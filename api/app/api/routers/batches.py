@@ -0,0 +1,267 @@
+"""
+Batch Analysis Endpoints
+========================
+
+Submit many documents and analysis types in one request and track them as a
+single batch. Reports and task mappings are created in bulk and the analyses
+are dispatched as one Celery chord whose callback writes the batch summary.
+Batch analyses carry the batch-lane priority so interactive submissions from
+other users overtake them in the broker.
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+from typing import Dict, Any, List, Tuple
+
+from celery import chord
+from fastapi import APIRouter, HTTPException, Depends, status
+
+from app.api.routers.auth import get_current_active_user
+from app.api.routers.analysis import check_admission
+from app.api.routers.tasks import _read_task_states
+from app.celery_app import TaskStatus
+from app.celery_tasks import ANALYSIS_PIPELINES, get_celery_task, summarize_batch
+from app.config import DatabaseConfig
+from app.models.async_models import run_in_db_pool
+from app.models.factory import get_async_document_model, get_analysis_report_model, get_task_report_mapping_model
+from app.models.schemas import (
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    BatchAnalysisStatusResponse,
+    BatchAnalysisJob
+)
+from app.services.admission import release_admitted
+from app.services.batches import get_batch_store
+from app.services.fair_share import BATCH_LANE
+from app.services.job_sizing import estimate_job, routing_options
+from app.services.eta import register_task
+from app.services.embedded_executor import get_embedded_executor
+from app.services.storage import store_for_workers
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/analysis/batch", tags=["analysis"])
+
+
+def _job_state(state: str, result: Any) -> Dict[str, Any]:
+    """Map a Celery task state and result to the status/progress shape used by /tasks"""
+    if state == TaskStatus.SUCCESS:
+        result = result or {}
+        if isinstance(result, dict) and result.get("status") == "failed":
+            return {"status": "failed", "progress": 100}
+        if isinstance(result, dict) and result.get("status") == "cancelled":
+            return {"status": "cancelled", "progress": 100}
+        return {"status": "completed", "progress": 100}
+    if state == TaskStatus.FAILURE:
+        return {"status": "failed", "progress": 100}
+    if state == TaskStatus.STARTED:
+        info = result if isinstance(result, dict) else {}
+        return {"status": "in_progress", "progress": info.get("progress", 0)}
+    if state == TaskStatus.RETRY:
+        return {"status": "retrying", "progress": 0}
+    if state == TaskStatus.REVOKED:
+        return {"status": "cancelled", "progress": 100}
+    return {"status": "pending", "progress": 0}
+
+
+def _queue_batch(batch_store, user_id: str, documents: List[Dict[str, Any]],
+                 analysis_types: List[str], query: str, task_ids: List[str]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Create the batch's reports, mappings and record and dispatch its chord; returns the batch ID and jobs"""
+    entries = []
+    for document in documents:
+        # One size estimate per document, shared by its analysis types
+        estimate = estimate_job(document["path"])
+        file_key = store_for_workers(document["path"], skip_existing=True)
+        for analysis_type in analysis_types:
+            entries.append({
+                "analysis_type": analysis_type,
+                "query": query or ANALYSIS_PIPELINES[analysis_type]["default_query"],
+                "file_name": document["original_name"],
+                "document_id": str(document["id"]),
+                "file_path": document["path"],
+                "file_key": file_key,
+                "estimate": estimate
+            })
+
+    # One repository call for all reports and one for all mappings
+    report_ids = get_analysis_report_model().create_pending_reports(user_id, entries)
+
+    batch_id = str(uuid.uuid4())
+    scheduler_config = DatabaseConfig.get_scheduler_config()
+    enqueued_at = time.time()
+    jobs = []
+    header = []
+    for entry, report_id, task_id in zip(entries, report_ids, task_ids):
+        register_task(task_id, entry["analysis_type"], entry["estimate"]["pages"] if entry["estimate"] else None)
+        jobs.append({
+            "task_id": task_id,
+            "report_id": report_id,
+            "document_id": entry["document_id"],
+            "analysis_type": entry["analysis_type"]
+        })
+        header.append(
+            get_celery_task(entry["analysis_type"]).s(
+                report_id=report_id,
+                query=entry["query"],
+                file_path=entry["file_path"],
+                file_key=entry["file_key"],
+                file_name=entry["file_name"],
+                user_id=user_id,
+                document_id=entry["document_id"],
+                batch_id=batch_id,
+                size_class=entry["estimate"]["size_class"] if entry["estimate"] else None
+            ).set(
+                task_id=task_id,
+                **routing_options(entry["estimate"]),
+                # Batch work runs in the low-priority lane behind interactive submissions
+                priority=scheduler_config["batch_priority"],
+                headers={"fair_share": {
+                    "user_id": str(user_id),
+                    "lane": BATCH_LANE,
+                    "enqueued_at": enqueued_at
+                }}
+            )
+        )
+
+    get_task_report_mapping_model().create_mappings([
+        {
+            "task_id": job["task_id"],
+            "report_id": job["report_id"],
+            "user_id": user_id,
+            "analysis_type": job["analysis_type"]
+        }
+        for job in jobs
+    ])
+
+    # Record the batch before dispatch so the status resource exists immediately
+    batch_store.create(batch_id, user_id, jobs)
+    executor = get_embedded_executor()
+    if executor is not None:
+        executor.submit_chord(batch_id, header, summarize_batch.s(batch_id=batch_id))
+    else:
+        chord(header)(summarize_batch.s(batch_id=batch_id))
+
+    return batch_id, jobs
+
+
+@router.post("", response_model=BatchAnalysisResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_batch_analysis(
+    batch_request: BatchAnalysisRequest,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Queue every requested analysis type for every document as one batch"""
+    analysis_config = DatabaseConfig.get_analysis_config()
+
+    unknown_types = [t for t in batch_request.analysis_types if t not in ANALYSIS_PIPELINES]
+    if unknown_types:
+        raise HTTPException(status_code=400, detail=f"Unknown analysis types: {', '.join(unknown_types)}")
+
+    # Keep submission order but drop duplicates
+    document_ids = list(dict.fromkeys(batch_request.document_ids))
+    analysis_types = list(dict.fromkeys(batch_request.analysis_types))
+
+    total_jobs = len(document_ids) * len(analysis_types)
+    if total_jobs > analysis_config["batch_max_jobs"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch has {total_jobs} analyses, the maximum is {analysis_config['batch_max_jobs']}"
+        )
+
+    batch_store = get_batch_store()
+    if batch_store is None:
+        raise HTTPException(status_code=503, detail="Batch analysis requires Redis")
+
+    task_ids = [str(uuid.uuid4()) for _ in range(total_jobs)]
+    eta_seconds = await asyncio.to_thread(check_admission, task_ids, batch=True)
+
+    queued = False
+    try:
+        document_model = get_async_document_model()
+        documents = await asyncio.gather(*[
+            document_model.get_document(document_id, current_user["id"]) for document_id in document_ids
+        ])
+        for document_id, document in zip(document_ids, documents):
+            if not document:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Document {document_id} not found or you don't have permission to access it"
+                )
+
+        query = (batch_request.query or "").strip()
+        batch_id, jobs = await run_in_db_pool(
+            _queue_batch, batch_store, current_user["id"], documents, analysis_types, query, task_ids
+        )
+        queued = True
+
+        logger.info(f"Batch {batch_id} queued with {len(jobs)} analyses for user {current_user['id']}")
+
+        return BatchAnalysisResponse(
+            batch_id=batch_id,
+            status="queued",
+            total_jobs=len(jobs),
+            jobs=[BatchAnalysisJob(**job, status="pending", progress=0) for job in jobs],
+            eta_seconds=eta_seconds,
+            batch_status_url=f"/analysis/batch/{batch_id}"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing batch analysis: {str(e)}")
+    finally:
+        if not queued:
+            # The admitted tasks will never start
+            await asyncio.to_thread(release_admitted, task_ids)
+
+
+@router.get("/{batch_id}", response_model=BatchAnalysisStatusResponse)
+async def get_batch_status(
+    batch_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Get aggregate progress for a batch and the state of each of its analyses"""
+    batch_store = get_batch_store()
+    if batch_store is None:
+        raise HTTPException(status_code=503, detail="Batch analysis requires Redis")
+
+    try:
+        record = await asyncio.to_thread(batch_store.get, batch_id)
+        if not record or record["user_id"] != str(current_user["id"]):
+            raise HTTPException(status_code=404, detail="Batch not found")
+
+        # One MGET for the states of all jobs
+        states = await asyncio.to_thread(_read_task_states, [job["task_id"] for job in record["jobs"]])
+        jobs: List[BatchAnalysisJob] = []
+        counts: Dict[str, int] = {}
+        for job in record["jobs"]:
+            state = _job_state(*states[job["task_id"]])
+            counts[state["status"]] = counts.get(state["status"], 0) + 1
+            jobs.append(BatchAnalysisJob(**job, **state))
+
+        total = len(jobs)
+        progress = round(sum(job.progress for job in jobs) / total) if total else 100
+
+        if record["summary"] is not None:
+            batch_status = "completed"
+        elif counts.get("pending", 0) == total:
+            batch_status = "queued"
+        else:
+            batch_status = "in_progress"
+
+        return BatchAnalysisStatusResponse(
+            batch_id=batch_id,
+            status=batch_status,
+            total_jobs=total,
+            progress=progress,
+            counts=counts,
+            jobs=jobs,
+            summary=record["summary"],
+            created_at=record["created_at"]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving batch status: {str(e)}")
@@ -1,20 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
 import os
 import re
+import asyncio
 import uuid
 import shutil
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from app.api.routers.auth import get_current_active_user
-from app.models.factory import get_document_model
+from app.models.factory import get_async_document_model
+from app.models.async_models import run_in_db_pool
+from app.models.schemas import BulkUploadItem, BulkUploadResponse
+from app.services.uploads import stage_upload, UploadTooLarge
+from app.services import bulk_uploads, async_files
+from app.services.downloads import file_download
 
 DATA_DIR = "data"
 
 router = APIRouter(prefix="/documents", tags=["documents"])
-document_model = get_document_model()
+document_model = get_async_document_model()
 
 # Models
 class DocumentMetadata(BaseModel):
@@ -31,6 +37,12 @@ def ensure_data_dir():
 
 SAFE_FILENAME_REGEX = re.compile(r"[^A-Za-z0-9._-]+")
 
+# Blob file names (<sha256>.<ext>), used in download links before they were ID-based
+BLOB_FILENAME_REGEX = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]+)?$")
+
+def document_download_url(document_id: str) -> str:
+    return f"/documents/{document_id}/download"
+
 def sanitize_filename(filename: str) -> str:
     base = os.path.basename(filename)
     base = base.strip()
@@ -40,6 +52,17 @@ def sanitize_filename(filename: str) -> str:
         base = f"upload_{uuid.uuid4().hex}"
     return base
 
+def list_data_dir(q: Optional[str] = None) -> List[DocumentMetadata]:
+    ensure_data_dir()
+    files = []
+    for entry in os.scandir(DATA_DIR):
+        if entry.is_file():
+            if q and q.lower() not in entry.name.lower():
+                continue
+            files.append(build_metadata(entry.path))
+    files.sort(key=lambda m: m.modified_at, reverse=True)
+    return files
+
 def build_metadata(file_path: str, document_id: str = None) -> DocumentMetadata:
     stat = os.stat(file_path)
     return DocumentMetadata(
@@ -57,39 +80,32 @@ async def list_documents(q: Optional[str] = None, current_user: Dict[str, Any] =
     """List documents for the current user with optional search"""
     try:
         # Get documents from database using the proper model
-        documents = document_model.get_user_documents(
+        documents = await document_model.get_user_documents(
             user_id=current_user["id"],
             search_query=q,
             limit=100,  # Reasonable limit
             offset=0
         )
         
+        # Check which files still exist on the filesystem, in one thread hop
+        on_disk = await async_files.existing_files(doc["path"] for doc in documents)
         files = []
         for doc in documents:
-            # Check if file still exists on filesystem
-            if os.path.isfile(doc["path"]):
+            if doc["path"] in on_disk:
                 files.append(DocumentMetadata(
                     id=str(doc["id"]),
                     name=doc["original_name"],
                     size_bytes=doc["size_bytes"],
                     modified_at=doc["created_at"],
                     path=doc["path"],
-                    download_url=f"/documents/download/{os.path.basename(doc['path'])}"
+                    download_url=document_download_url(doc["id"])
                 ))
         
         return files
         
     except Exception as e:
         # Fallback to filesystem listing if database fails
-        ensure_data_dir()
-        files = []
-        for entry in os.scandir(DATA_DIR):
-            if entry.is_file():
-                if q and q.lower() not in entry.name.lower():
-                    continue
-                files.append(build_metadata(entry.path))
-        files.sort(key=lambda m: m.modified_at, reverse=True)
-        return files
+        return await asyncio.to_thread(list_data_dir, q)
 
 @router.post("/upload", response_model=DocumentMetadata)
 async def upload_document(
@@ -101,17 +117,19 @@ async def upload_document(
     ensure_data_dir()
     original_name = name or file.filename or f"upload_{uuid.uuid4().hex}"
     
+    staged = None
     try:
-        # Read file content
-        file_content = await file.read()
+        # Stream the file to disk in chunks, hashing it on the way
+        staged = await stage_upload(file, DATA_DIR)
         
         # Create document using the proper model
-        doc_result = document_model.create_document(
+        doc_result = await document_model.create_document_from_upload(
             user_id=current_user["id"],
             original_name=original_name,
-            file_content=file_content,
+            staged_upload=staged,
             upload_path=DATA_DIR
         )
+        staged = None
         
         # Return metadata with document ID
         return DocumentMetadata(
@@ -120,40 +138,131 @@ async def upload_document(
             size_bytes=doc_result["size_bytes"],
             modified_at=doc_result["created_at"],
             path=doc_result["path"],
-            download_url=f"/documents/download/{os.path.basename(doc_result['path'])}"
+            download_url=document_download_url(doc_result["id"])
         )
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
     finally:
+        if staged is not None:
+            staged.discard()
         try:
             await file.close()
         except Exception:
             pass
 
+@router.post("/bulk", response_model=BulkUploadResponse)
+async def bulk_upload_documents(
+    files: Optional[List[UploadFile]] = File(default=None),
+    archive: Optional[UploadFile] = File(default=None, description="ZIP archive of documents"),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Upload many documents as multipart files and/or a ZIP archive.
+    
+    Files with the same content as each other or as one of the user's
+    existing documents are reported as duplicates of that document instead
+    of being stored again. Returns one manifest entry per file, in order.
+    """
+    from app.config import DatabaseConfig
+    upload_config = DatabaseConfig.get_upload_config()
+    files = files or []
+    if not files and archive is None:
+        raise HTTPException(status_code=400, detail="Provide files or a ZIP archive")
+    if len(files) > upload_config["bulk_max_files"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {upload_config['bulk_max_files']} files can be uploaded at once"
+        )
+    
+    ensure_data_dir()
+    items = []
+    try:
+        items = await bulk_uploads.stage_files(files, DATA_DIR, upload_config["bulk_concurrency"])
+        if archive is not None:
+            items += await bulk_uploads.stage_archive(
+                archive, DATA_DIR, upload_config["bulk_max_files"] - len(files)
+            )
+        
+        # One checksum query and one batched insert for the whole request
+        await run_in_db_pool(bulk_uploads.register_items, document_model.sync, current_user["id"], items, DATA_DIR)
+        await bulk_uploads.ingest_items(items, upload_config["bulk_concurrency"])
+        
+        manifest = []
+        for item in items:
+            document = item.document or {}
+            manifest.append(BulkUploadItem(
+                name=item.name,
+                status=item.status,
+                document_id=str(document["id"]) if document else None,
+                size_bytes=document.get("size_bytes"),
+                checksum=document.get("checksum"),
+                pages=item.pages,
+                download_url=document_download_url(document["id"]) if document else None,
+                error=item.error
+            ))
+        
+        return BulkUploadResponse(
+            created=sum(1 for item in items if item.status == bulk_uploads.STATUS_CREATED),
+            duplicates=sum(1 for item in items if item.status == bulk_uploads.STATUS_DUPLICATE),
+            failed=sum(1 for item in items if item.status == bulk_uploads.STATUS_FAILED),
+            items=manifest
+        )
+        
+    except bulk_uploads.BulkUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload files: {str(e)}")
+    finally:
+        for item in items:
+            item.discard()
+        for upload in files + ([archive] if archive is not None else []):
+            try:
+                await upload.close()
+            except Exception:
+                pass
+
+async def _file_response(request: Request, document: Dict[str, Any]) -> Response:
+    # Documents older than checksums get one computed from the file
+    try:
+        return await file_download(request, document["path"], document["original_name"],
+                                   checksum=document.get("checksum"))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found on disk")
+
 @router.get("/download/{filename}")
-async def download_document(filename: str, current_user: Dict[str, Any] = Depends(get_current_active_user)):
-    """Download a document by filename"""
+async def download_document(filename: str, request: Request, current_user: Dict[str, Any] = Depends(get_current_active_user)):
+    """Download a document by file name (links issued before /documents/{id}/download)"""
     safe = sanitize_filename(filename)
     
-    # Find document in database
     try:
-        # Get all user documents and find the one with matching filename
-        documents = document_model.get_user_documents(current_user["id"])
-        target_doc = None
-        for doc in documents:
-            if os.path.basename(doc["path"]) == safe:
-                target_doc = doc
-                break
+        # Older links name the stored file; newer ones the content-addressed blob
+        target_doc = await document_model.get_document_by_stored_name(current_user["id"], safe)
+        blob_match = BLOB_FILENAME_REGEX.match(safe)
+        if not target_doc and blob_match:
+            by_checksum = await document_model.get_documents_by_checksums(current_user["id"], [blob_match.group(1)])
+            target_doc = by_checksum.get(blob_match.group(1))
         
         if not target_doc:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        file_path = target_doc["path"]
-        if not os.path.exists(file_path) or not os.path.isfile(file_path):
-            raise HTTPException(status_code=404, detail="File not found on disk")
+        return await _file_response(request, target_doc)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error accessing document: {str(e)}")
+
+@router.get("/{document_id}/download")
+async def download_document_by_id(document_id: str, request: Request, current_user: Dict[str, Any] = Depends(get_current_active_user)):
+    """Download a document by document ID"""
+    try:
+        target_doc = await document_model.get_document(document_id, current_user["id"])
+        if not target_doc:
+            raise HTTPException(status_code=404, detail="Document not found")
         
-        return FileResponse(file_path, filename=target_doc["original_name"])
+        return await _file_response(request, target_doc)
         
     except HTTPException:
         raise
@@ -166,25 +275,16 @@ async def delete_document(document_id: str, current_user: Dict[str, Any] = Depen
     
     try:
         # Get document from database by ID
-        target_doc = document_model.get_document(document_id, current_user["id"])
+        target_doc = await document_model.get_document(document_id, current_user["id"])
         
         if not target_doc:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Delete from database
-        success = document_model.delete_document(document_id, current_user["id"])
+        # Delete from database; the file goes with the last document referring to it
+        success = await document_model.delete_document(document_id, current_user["id"])
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete document from database")
         
-        # Delete file from filesystem
-        file_path = target_doc["path"]
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as e:
-                # Log but don't fail - database record is already deleted
-                print(f"Warning: Could not delete file {file_path}: {e}")
-        
         return {"status": "deleted", "filename": target_doc["original_name"], "document_id": document_id}
         
     except HTTPException:
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request
 from typing import Optional, List, Dict, Any, Union
-import os
 import math
+import asyncio
 
-from app.models.factory import get_analysis_report_model
+from app.models.factory import get_async_analysis_report_model
+from app.services import async_files
+from app.services.downloads import file_download
 from app.api.routers.auth import get_current_active_user, get_current_admin_user
 from app.models.schemas import (
     AnalysisReportResponse, 
@@ -16,7 +17,7 @@ from app.models.schemas import (
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 # Initialize analysis report model
-analysis_reports = get_analysis_report_model()
+analysis_reports = get_async_analysis_report_model()
 
 
 @router.get("/", response_model=AnalysisReportListResponse)
@@ -32,26 +33,29 @@ async def list_reports(
     offset = (page - 1) * page_size
     
     try:
-        # Get reports from database
-        reports_data = analysis_reports.get_user_reports(
-            user_id=current_user["id"],
-            analysis_type=analysis_type,
-            search_query=search_query,
-            limit=page_size,
-            offset=offset
-        )
-        
-        # Get total count for pagination
-        total_count = analysis_reports.get_reports_count(
-            user_id=current_user["id"],
-            analysis_type=analysis_type
+        # Get reports and the total count for pagination from database, concurrently
+        reports_data, total_count = await asyncio.gather(
+            analysis_reports.get_user_reports(
+                user_id=current_user["id"],
+                analysis_type=analysis_type,
+                search_query=search_query,
+                limit=page_size,
+                offset=offset
+            ),
+            analysis_reports.get_reports_count(
+                user_id=current_user["id"],
+                analysis_type=analysis_type
+            )
         )
         
         # Convert to response format
+        existing_paths = await async_files.existing_files(
+            report_data['report_path'] for report_data in reports_data if report_data['report_path']
+        )
         reports = []
         for report_data in reports_data:
             # Generate download URL
-            download_url = f"/reports/{report_data['id']}/download" if os.path.exists(report_data['report_path']) else None
+            download_url = f"/reports/{report_data['id']}/download" if report_data['report_path'] in existing_paths else None
             
             report = AnalysisReportResponse(
                 id=report_data['id'],
@@ -91,13 +95,13 @@ async def get_report(
     """Get a specific analysis report by ID"""
     
     try:
-        report_data = analysis_reports.get_report(report_id, current_user["id"])
+        report_data = await analysis_reports.get_report(report_id, current_user["id"])
         
         if not report_data:
             raise HTTPException(status_code=404, detail="Report not found")
         
         # Generate download URL
-        download_url = f"/reports/{report_data['id']}/download" if os.path.exists(report_data['report_path']) else None
+        download_url = f"/reports/{report_data['id']}/download" if await async_files.exists(report_data['report_path']) else None
         
         return AnalysisReportResponse(
             id=report_data['id'],
@@ -120,35 +124,41 @@ async def get_report(
         raise HTTPException(status_code=500, detail=f"Error retrieving report: {str(e)}")
 
 
+def _report_filename(report_data: Dict[str, Any]) -> str:
+    """The report's file name with a .md extension"""
+    filename = report_data['file_name']
+    if not filename.endswith('.md'):
+        filename = filename.rsplit('.', 1)[0] + '.md'
+    return filename
+
+
+async def _report_file(request: Request, report_id: str, user_id: str, disposition: str):
+    report_data = await analysis_reports.get_report(report_id, user_id)
+    if not report_data:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    try:
+        return await file_download(
+            request,
+            report_data['report_path'],
+            _report_filename(report_data),
+            media_type='text/markdown; charset=utf-8',
+            disposition=disposition
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Report file not found")
+
+
 @router.get("/{report_id}/download")
 async def download_report(
+    request: Request,
     report_id: str = Path(..., description="Report ID"),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Download an analysis report file"""
+    """Download an analysis report file (supports Range and conditional requests)"""
     
     try:
-        report_data = analysis_reports.get_report(report_id, current_user["id"])
-        
-        if not report_data:
-            raise HTTPException(status_code=404, detail="Report not found")
-        
-        report_path = report_data['report_path']
-        
-        if not os.path.exists(report_path):
-            raise HTTPException(status_code=404, detail="Report file not found")
-        
-        # Return the file as Markdown
-        # Ensure filename has .md extension
-        filename = report_data['file_name']
-        if not filename.endswith('.md'):
-            filename = filename.rsplit('.', 1)[0] + '.md'
-        
-        return FileResponse(
-            path=report_path,
-            filename=filename,
-            media_type='text/markdown'
-        )
+        return await _report_file(request, report_id, current_user["id"], "attachment")
         
     except HTTPException:
         raise
@@ -166,23 +176,23 @@ async def update_report(
     
     try:
         # Check if report exists and belongs to user
-        report_data = analysis_reports.get_report(report_id, current_user["id"])
+        report_data = await analysis_reports.get_report(report_id, current_user["id"])
         if not report_data:
             raise HTTPException(status_code=404, detail="Report not found")
         
         # Update summary if provided
         if update_data.summary is not None:
-            success = analysis_reports.update_report(
+            success = await analysis_reports.update_report(
                 report_id, current_user["id"], summary=update_data.summary
             )
             if not success:
                 raise HTTPException(status_code=500, detail="Failed to update report")
         
         # Get updated report data
-        updated_report_data = analysis_reports.get_report(report_id, current_user["id"])
+        updated_report_data = await analysis_reports.get_report(report_id, current_user["id"])
         
         # Generate download URL
-        download_url = f"/reports/{updated_report_data['id']}/download" if os.path.exists(updated_report_data['report_path']) else None
+        download_url = f"/reports/{updated_report_data['id']}/download" if await async_files.exists(updated_report_data['report_path']) else None
         
         return AnalysisReportResponse(
             id=updated_report_data['id'],
@@ -214,20 +224,20 @@ async def delete_report(
     
     try:
         # Get report data first to get file path
-        report_data = analysis_reports.get_report(report_id, current_user["id"])
+        report_data = await analysis_reports.get_report(report_id, current_user["id"])
         if not report_data:
             raise HTTPException(status_code=404, detail="Report not found")
         
         # Delete from database
-        success = analysis_reports.delete_report(report_id, current_user["id"])
+        success = await analysis_reports.delete_report(report_id, current_user["id"])
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete report from database")
         
         # Delete file if it exists
         report_path = report_data['report_path']
-        if os.path.exists(report_path):
+        if report_path:
             try:
-                os.remove(report_path)
+                await async_files.remove(report_path)
             except Exception as e:
                 # Log error but don't fail the request since DB record is already deleted
                 print(f"Warning: Could not delete file {report_path}: {str(e)}")
@@ -247,12 +257,14 @@ async def get_reports_stats(
     """Get summary statistics for user's analysis reports"""
     
     try:
-        # Get counts by analysis type
-        comprehensive_count = analysis_reports.get_reports_count(current_user["id"], "comprehensive")
-        investment_count = analysis_reports.get_reports_count(current_user["id"], "investment")
-        risk_count = analysis_reports.get_reports_count(current_user["id"], "risk")
-        verification_count = analysis_reports.get_reports_count(current_user["id"], "verification")
-        total_count = analysis_reports.get_reports_count(current_user["id"])
+        # Get counts by analysis type (the queries run concurrently in the database pool)
+        comprehensive_count, investment_count, risk_count, verification_count, total_count = await asyncio.gather(
+            analysis_reports.get_reports_count(current_user["id"], "comprehensive"),
+            analysis_reports.get_reports_count(current_user["id"], "investment"),
+            analysis_reports.get_reports_count(current_user["id"], "risk"),
+            analysis_reports.get_reports_count(current_user["id"], "verification"),
+            analysis_reports.get_reports_count(current_user["id"])
+        )
         
         return {
             "total_reports": total_count,
@@ -279,20 +291,20 @@ async def admin_delete_report(
         # For admin, we need to get the report without user restriction
         # This is a simplified approach - in production you might want to add
         # a special admin method to the repository
-        report_data = analysis_reports.get_report(report_id, current_user["id"])
+        report_data = await analysis_reports.get_report(report_id, current_user["id"])
         if not report_data:
             raise HTTPException(status_code=404, detail="Report not found")
         
         # Delete from database
-        success = analysis_reports.delete_report(report_id, current_user["id"])
+        success = await analysis_reports.delete_report(report_id, current_user["id"])
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete report from database")
         
         # Delete file if it exists
         report_path = report_data['report_path']
-        if os.path.exists(report_path):
+        if report_path:
             try:
-                os.remove(report_path)
+                await async_files.remove(report_path)
             except Exception as e:
                 print(f"Warning: Could not delete file {report_path}: {str(e)}")
         
@@ -312,20 +324,19 @@ async def get_report_content(
     """Get the text content of an analysis report file"""
     try:
         # Get report data
-        report_data = analysis_reports.get_report(report_id, current_user["id"])
+        report_data = await analysis_reports.get_report(report_id, current_user["id"])
         if not report_data:
             raise HTTPException(status_code=404, detail="Report not found")
         
         report_path = report_data['report_path']
         
         # Check if file exists
-        if not os.path.exists(report_path):
+        if not await async_files.exists(report_path):
             raise HTTPException(status_code=404, detail="Report file not found")
         
         # Read file content
         try:
-            with open(report_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = await async_files.read_text(report_path)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error reading report file: {str(e)}")
         
@@ -346,3 +357,23 @@ async def get_report_content(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving report content: {str(e)}")
 
+
+@router.get("/{report_id}/content/stream")
+async def stream_report_content(
+    request: Request,
+    report_id: str = Path(..., description="Report ID"),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Stream the Markdown of an analysis report as text/markdown.
+
+    Unlike /content the file is sent as it is read rather than loaded into a
+    JSON string, and an unchanged report is answered with 304 Not Modified.
+    Report metadata is available from GET /reports/{report_id}.
+    """
+    try:
+        return await _report_file(request, report_id, current_user["id"], "inline")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving report content: {str(e)}")
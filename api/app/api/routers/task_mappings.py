@@ -3,7 +3,7 @@ from typing import Dict, Any, List, Optional
 from math import ceil
 
 from app.api.routers.auth import get_current_active_user
-from app.models.factory import get_task_report_mapping_model
+from app.models.factory import get_async_task_report_mapping_model
 from app.models.schemas import TaskReportMappingResponse, TaskReportMappingListResponse
 
 router = APIRouter(prefix="/task-mappings", tags=["task-mappings"])
@@ -16,15 +16,17 @@ async def get_mapping_by_task_id(
 ):
     """Get task-report mapping by task ID"""
     try:
-        mapping_model = get_task_report_mapping_model()
-        mapping = mapping_model.get_mapping_by_task_id(task_id)
+        mapping_model = get_async_task_report_mapping_model()
+        mapping = await mapping_model.get_mapping_by_task_id(task_id)
         
         if not mapping:
             raise HTTPException(status_code=404, detail="Task mapping not found")
         
-        # Verify user owns this mapping
+        # Verify user owns this mapping, or has a report coalesced onto the task
         if mapping["user_id"] != current_user["id"]:
-            raise HTTPException(status_code=403, detail="Access denied")
+            mapping = (await mapping_model.get_user_task_mappings(current_user["id"], [task_id])).get(task_id)
+            if not mapping:
+                raise HTTPException(status_code=403, detail="Access denied")
         
         return mapping
         
@@ -41,8 +43,8 @@ async def get_mapping_by_report_id(
 ):
     """Get task-report mapping by report ID"""
     try:
-        mapping_model = get_task_report_mapping_model()
-        mapping = mapping_model.get_mapping_by_report_id(report_id)
+        mapping_model = get_async_task_report_mapping_model()
+        mapping = await mapping_model.get_mapping_by_report_id(report_id)
         
         if not mapping:
             raise HTTPException(status_code=404, detail="Report mapping not found")
@@ -67,17 +69,17 @@ async def get_user_mappings(
 ):
     """Get task-report mappings for the current user"""
     try:
-        mapping_model = get_task_report_mapping_model()
+        mapping_model = get_async_task_report_mapping_model()
         offset = (page - 1) * page_size
         
-        mappings = mapping_model.get_user_mappings(
+        mappings = await mapping_model.get_user_mappings(
             user_id=current_user["id"],
             limit=page_size,
             offset=offset
         )
         
         # Get total count (simplified - in production you might want a separate count method)
-        total_mappings = len(mapping_model.get_user_mappings(
+        total_mappings = len(await mapping_model.get_user_mappings(
             user_id=current_user["id"],
             limit=1000,  # Get a large number to count
             offset=0
@@ -104,10 +106,10 @@ async def delete_mapping_by_task_id(
 ):
     """Delete task-report mapping by task ID"""
     try:
-        mapping_model = get_task_report_mapping_model()
+        mapping_model = get_async_task_report_mapping_model()
         
         # First check if mapping exists and user owns it
-        mapping = mapping_model.get_mapping_by_task_id(task_id)
+        mapping = await mapping_model.get_mapping_by_task_id(task_id)
         if not mapping:
             raise HTTPException(status_code=404, detail="Task mapping not found")
         
@@ -115,7 +117,7 @@ async def delete_mapping_by_task_id(
             raise HTTPException(status_code=403, detail="Access denied")
         
         # Delete the mapping
-        success = mapping_model.delete_mapping_by_task_id(task_id)
+        success = await mapping_model.delete_mapping_by_task_id(task_id)
         
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete mapping")
@@ -135,10 +137,10 @@ async def delete_mapping_by_report_id(
 ):
     """Delete task-report mapping by report ID"""
     try:
-        mapping_model = get_task_report_mapping_model()
+        mapping_model = get_async_task_report_mapping_model()
         
         # First check if mapping exists and user owns it
-        mapping = mapping_model.get_mapping_by_report_id(report_id)
+        mapping = await mapping_model.get_mapping_by_report_id(report_id)
         if not mapping:
             raise HTTPException(status_code=404, detail="Report mapping not found")
         
@@ -146,7 +148,7 @@ async def delete_mapping_by_report_id(
             raise HTTPException(status_code=403, detail="Access denied")
         
         # Delete the mapping
-        success = mapping_model.delete_mapping_by_report_id(report_id)
+        success = await mapping_model.delete_mapping_by_report_id(report_id)
         
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete mapping")
@@ -170,8 +172,8 @@ async def cleanup_old_mappings(
         if not current_user.get("is_admin", False):
             raise HTTPException(status_code=403, detail="Admin access required")
         
-        mapping_model = get_task_report_mapping_model()
-        cleaned_count = mapping_model.cleanup_old_mappings(days_old)
+        mapping_model = get_async_task_report_mapping_model()
+        cleaned_count = await mapping_model.cleanup_old_mappings(days_old)
         
         return {
             "message": f"Cleaned up {cleaned_count} old mappings",
@@ -5,98 +5,495 @@ Task Management Endpoints
 This module provides endpoints for monitoring and managing Celery tasks.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any, Optional
+import json
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional, List, Tuple
 from celery.result import AsyncResult
 
-from app.api.routers.auth import get_current_active_user
+from app.api.routers.auth import get_current_active_user, get_current_admin_user
 from app.celery_app import celery_app, TaskStatus
+from app.config import DatabaseConfig
+from app.models.factory import (
+    get_analysis_report_model, get_async_analysis_report_model, get_task_report_mapping_model,
+    get_async_task_report_mapping_model
+)
+from app.models.schemas import ReportStatus, TaskStatusBatchRequest, TaskStatusBatchResponse
+from app.services.coalescing import get_inflight_registry
+from app.services.fair_share import get_fair_share_scheduler
+from app.services.worker_warmup import get_warmup_stats
+from app.services.memory_accounting import get_memory_report
+from app.services.job_sizing import get_time_limit_stats
+from app.services.queue_monitor import get_queue_monitor
+from app.services.admission import get_admission_controller
+from app.services.eta import get_eta_model, poll_interval
+from app.services.cancellation import request_cancellation
+from app.services import task_events
+from app.services.task_events import get_task_event_hub
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
+def _queued_eta(task_id: str, user_id: str) -> Dict[str, Any]:
+    """ETA of a task that has not started, from its queue position and the stage averages"""
+    model = get_eta_model()
+    context = model.task_context(task_id) if model is not None else None
+    if context is None:
+        return {"eta_seconds": None, "jobs_ahead": None}
+
+    snapshot = get_queue_monitor().snapshot() or {}
+    # Everything already handed to the broker or running is ahead of the task
+    jobs_ahead = (
+        sum(snapshot.get("queues", {}).values())
+        + snapshot.get("reserved_count", 0)
+        + len(snapshot.get("active_tasks", []))
+    )
+    scheduler = get_fair_share_scheduler()
+    if scheduler is not None:
+        waiting_ahead = scheduler.jobs_ahead(task_id, user_id)
+        if waiting_ahead is not None:
+            jobs_ahead += waiting_ahead
+
+    slots = sum(
+        int((worker.get("pool") or {}).get("max-concurrency") or 1)
+        for worker in snapshot.get("workers", [])
+    )
+    return {"eta_seconds": model.estimate_queued(context, jobs_ahead, slots), "jobs_ahead": jobs_ahead}
+
+
+def _running_eta(task_id: str, task_info: Dict[str, Any]) -> Optional[float]:
+    """ETA of a running task from its current stage and the stage averages"""
+    model = get_eta_model()
+    context = model.task_context(task_id) if model is not None else None
+    if context is None:
+        return None
+    return model.estimate_running(context, task_info.get('stage'), task_info.get('stage_started_at'))
+
+
+def _task_status(task_id: str, state: str, result: Any, user_id: str,
+                 include_eta: bool = True) -> Dict[str, Any]:
+    """Status response for a task in the given Celery state.
+    
+    result is what the result backend holds for that state: the return value,
+    the exception or the progress meta.
+    """
+    if state == TaskStatus.PENDING:
+        eta = _queued_eta(task_id, user_id) if include_eta else {"eta_seconds": None, "jobs_ahead": None}
+        return {
+            "task_id": task_id,
+            "status": "pending",
+            "progress": 0,
+            "message": "Task is waiting to be processed",
+            **eta,
+            "poll_after_seconds": poll_interval(eta["eta_seconds"])
+        }
+    
+    task_info = result if isinstance(result, dict) else {}
+    
+    if state == TaskStatus.SUCCESS:
+        result = dict(result) if isinstance(result, dict) else result
+        if isinstance(result, dict) and result.get("status") == "cancelled":
+            return {
+                "task_id": task_id,
+                "status": "cancelled",
+                "progress": 100,
+                "message": "Task was cancelled",
+                "result": result
+            }
+        return {
+            "task_id": task_id,
+            "status": "completed",
+            "progress": 100,
+            "message": "Task completed successfully",
+            "result": result
+        }
+    elif state == TaskStatus.FAILURE:
+        error = task_info.get('exc_message') if task_info else result
+        return {
+            "task_id": task_id,
+            "status": "failed",
+            "progress": 0,
+            "message": "Task failed",
+            "error": str(error if error is not None else 'Unknown error')
+        }
+    elif state == TaskStatus.STARTED:
+        eta_seconds = _running_eta(task_id, task_info) if include_eta else None
+        return {
+            "task_id": task_id,
+            "status": "in_progress",
+            "progress": task_info.get('progress', 0),
+            "message": task_info.get('message', 'Task in progress'),
+            "stage": task_info.get('stage'),
+            "eta_seconds": eta_seconds,
+            "poll_after_seconds": poll_interval(eta_seconds)
+        }
+    elif state == TaskStatus.RETRY:
+        return {
+            "task_id": task_id,
+            "status": "retrying",
+            "progress": 0,
+            "message": f"Task is being retried (attempt {task_info.get('retries', 0) + 1})"
+        }
+    else:
+        return {
+            "task_id": task_id,
+            "status": state.lower(),
+            "progress": 0,
+            "message": f"Task status: {state}"
+        }
+
+
+def _read_task_states(task_ids: List[str]) -> Dict[str, Tuple[str, Any]]:
+    """Celery state and result of many tasks, read from the result backend in one MGET"""
+    backend = celery_app.backend
+    if not task_ids:
+        return {}
+    if not hasattr(backend, "mget"):
+        results = {task_id: AsyncResult(task_id, app=celery_app) for task_id in task_ids}
+        return {task_id: (result.state, result.result) for task_id, result in results.items()}
+    
+    values = backend.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+    states = {}
+    for task_id, value in zip(task_ids, values):
+        if value is None:
+            # Celery reports unknown tasks as pending, too
+            states[task_id] = (TaskStatus.PENDING, None)
+            continue
+        meta = backend.meta_from_decoded(backend.decode_result(value))
+        states[task_id] = (meta["status"], meta.get("result"))
+    return states
+
+
+async def _split_owned_tasks(
+    task_ids: List[str], user_id: str, max_tasks: int
+) -> Tuple[List[str], List[str], Dict[str, Dict[str, Any]]]:
+    """Split task IDs into the tasks the user may follow and the rest.
+    
+    Besides the user's own tasks, a task counts when one of the user's
+    reports was coalesced onto it; its mapping then names the user's report.
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    if len(task_ids) > max_tasks:
+        raise HTTPException(status_code=400, detail=f"At most {max_tasks} tasks can be requested at once")
+    
+    mappings = await get_async_task_report_mapping_model().get_user_task_mappings(user_id, task_ids)
+    owned = [task_id for task_id in task_ids if task_id in mappings]
+    unknown = [task_id for task_id in task_ids if task_id not in mappings]
+    return owned, unknown, mappings
+
+
+def _user_event(event: Dict[str, Any], mappings: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """An event as the user sees it: with the user's report, which differs on a shared task"""
+    mapping = mappings.get(event["task_id"])
+    if mapping is None or event.get("report_id") == mapping["report_id"]:
+        return event
+    return {**event, "report_id": mapping["report_id"]}
+
+
+def _user_status(status: Dict[str, Any], mapping: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """A status response pointing at the user's report, which differs on a shared task"""
+    result = status.get("result")
+    if mapping is not None and isinstance(result, dict) and result.get("report_id"):
+        result["report_id"] = mapping["report_id"]
+    return status
+
+
+def _current_events(task_ids: List[str], mappings: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Latest event of each task: the last one published, else one built from the result backend"""
+    try:
+        events = task_events.get_last_events(task_ids)
+    except Exception as e:
+        logger.warning(f"Could not read last task events: {str(e)}")
+        events = {}
+    # Queued tasks and tasks finished before events were published
+    missing = [task_id for task_id in task_ids if task_id not in events]
+    for task_id, (state, result) in _read_task_states(missing).items():
+        events[task_id] = task_events.event_from_state(task_id, state, result, mappings[task_id]["report_id"])
+    return {task_id: _user_event(event, mappings) for task_id, event in events.items()}
+
+
+def _not_found_event(task_id: str) -> Dict[str, Any]:
+    return task_events.build_event(task_id, task_events.STATUS_NOT_FOUND, 0, "Task not found")
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: task\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/events")
+async def stream_task_events(
+    request: Request,
+    task_id: List[str] = Query(..., description="Task IDs to follow; repeat the parameter for each task"),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Stream status events for many tasks over one Server-Sent Events connection.
+    
+    The current state of every task is sent first, then each change as
+    workers publish it (event "task", same fields as the status endpoint).
+    The stream ends with an "end" event once every task has finished. Tasks
+    that do not exist or belong to another user get one not_found event.
+    Clients that cannot keep a stream open use /tasks/events/poll instead.
+    """
+    owned, unknown, mappings = await _split_owned_tasks(
+        task_id, current_user["id"], DatabaseConfig.get_task_events_config()["max_tasks"]
+    )
+    heartbeat_seconds = DatabaseConfig.get_task_events_config()["heartbeat_seconds"]
+    
+    # Subscribe before reading the current state so no change falls in between
+    subscription = await get_task_event_hub().subscribe(owned)
+    try:
+        current = await asyncio.to_thread(_current_events, owned, mappings)
+    except Exception as e:
+        subscription.close()
+        raise HTTPException(status_code=500, detail=f"Error getting task status: {str(e)}")
+    
+    async def event_stream():
+        try:
+            for unknown_task_id in unknown:
+                yield _sse(_not_found_event(unknown_task_id))
+            
+            sent_seq = {}
+            open_tasks = set()
+            for owned_task_id in owned:
+                event = current[owned_task_id]
+                yield _sse(event)
+                sent_seq[owned_task_id] = event.get("seq", 0)
+                if event["status"] not in task_events.TERMINAL_STATUSES:
+                    open_tasks.add(owned_task_id)
+            
+            while open_tasks:
+                event = await subscription.get(timeout=heartbeat_seconds)
+                if event is None:
+                    if await request.is_disconnected():
+                        return
+                    # A comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                # Skip events already sent or older than the state already sent
+                if event["task_id"] not in open_tasks or event["seq"] <= sent_seq[event["task_id"]]:
+                    continue
+                yield _sse(_user_event(event, mappings))
+                sent_seq[event["task_id"]] = event["seq"]
+                if event["status"] in task_events.TERMINAL_STATUSES:
+                    open_tasks.discard(event["task_id"])
+            
+            yield "event: end\ndata: {}\n\n"
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/events/poll")
+async def poll_task_events(
+    task_id: List[str] = Query(..., description="Task IDs to follow; repeat the parameter for each task"),
+    since: Optional[int] = Query(None, ge=0, description="Cursor returned by the previous poll; omit for the current state"),
+    timeout: Optional[float] = Query(None, ge=0, le=60, description="Seconds to wait for a change"),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Long-polling fallback for /tasks/events.
+    
+    Returns at once with the latest event of every task that changed after
+    since, or of every task when since is omitted. Otherwise the request
+    waits up to timeout seconds for the next change. Pass the returned cursor
+    as since on the next poll; it is the event sequence number (seq) up to
+    which changes have been returned.
+    """
+    owned, unknown, mappings = await _split_owned_tasks(
+        task_id, current_user["id"], DatabaseConfig.get_task_events_config()["max_tasks"]
+    )
+    if timeout is None:
+        timeout = DatabaseConfig.get_task_events_config()["long_poll_timeout_seconds"]
+    
+    subscription = await get_task_event_hub().subscribe(owned)
+    try:
+        if since is None:
+            # Read before the state, so changes after it are newer than the cursor
+            cursor = await asyncio.to_thread(task_events.current_sequence)
+            events = list((await asyncio.to_thread(_current_events, owned, mappings)).values())
+        else:
+            cursor = since
+            last_events = await asyncio.to_thread(task_events.get_last_events, owned)
+            events = [event for event in last_events.values() if event.get("seq", 0) > since]
+            if not events and owned:
+                event = await subscription.get(timeout=timeout)
+                events = ([event] if event else []) + subscription.drain()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting task events: {str(e)}")
+    finally:
+        subscription.close()
+    
+    # Only the latest event of each task matters
+    latest = {}
+    for event in events:
+        if event["task_id"] not in latest or event.get("seq", 0) >= latest[event["task_id"]].get("seq", 0):
+            latest[event["task_id"]] = event
+    
+    return {
+        "events": [_user_event(event, mappings) for event in latest.values()],
+        "not_found": unknown,
+        "cursor": max([cursor] + [event.get("seq", 0) for event in latest.values()])
+    }
+
+
 @router.get("/{task_id}/status")
 async def get_task_status(
     task_id: str,
+    include_content: bool = Query(True, description="Load the report content for completed tasks"),
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Get the status of a specific task"""
+    """Get the status of a specific task.
+    
+    Completed tasks only keep a result pointer (report ID, sizes, timings) in
+    the result backend; the report content is loaded from the report store.
+    Pending and running tasks include an ETA (from historical stage timings
+    and the queue position) and poll_after_seconds, the suggested wait before
+    polling again.
+    """
     try:
-        # Get task result
-        task_result = AsyncResult(task_id, app=celery_app)
-        
-        # Check if task exists
-        if task_result.state == TaskStatus.PENDING:
-            return {
-                "task_id": task_id,
-                "status": "pending",
-                "progress": 0,
-                "message": "Task is waiting to be processed"
-            }
+        def build_status() -> Dict[str, Any]:
+            # Reading the state and result queries the result backend
+            task_result = AsyncResult(task_id, app=celery_app)
+            return _task_status(task_id, task_result.state, task_result.result, current_user["id"])
         
-        # Get task info
-        task_info = task_result.info or {}
+        status = await asyncio.to_thread(build_status)
+        # A report coalesced onto another user's task reads its own report
+        mappings = await get_async_task_report_mapping_model().get_user_task_mappings(current_user["id"], [task_id])
+        status = _user_status(status, mappings.get(task_id))
         
-        if task_result.state == TaskStatus.SUCCESS:
-            return {
-                "task_id": task_id,
-                "status": "completed",
-                "progress": 100,
-                "message": "Task completed successfully",
-                "result": task_result.result
-            }
-        elif task_result.state == TaskStatus.FAILURE:
-            return {
-                "task_id": task_id,
-                "status": "failed",
-                "progress": 0,
-                "message": "Task failed",
-                "error": str(task_info.get('exc_message', 'Unknown error'))
-            }
-        elif task_result.state == TaskStatus.STARTED:
-            progress = task_info.get('progress', 0)
-            message = task_info.get('message', 'Task in progress')
-            return {
-                "task_id": task_id,
-                "status": "in_progress",
-                "progress": progress,
-                "message": message
-            }
-        elif task_result.state == TaskStatus.RETRY:
-            return {
-                "task_id": task_id,
-                "status": "retrying",
-                "progress": 0,
-                "message": f"Task is being retried (attempt {task_info.get('retries', 0) + 1})"
-            }
-        else:
-            return {
-                "task_id": task_id,
-                "status": task_result.state.lower(),
-                "progress": 0,
-                "message": f"Task status: {task_result.state}"
-            }
+        result = status.get("result")
+        if (include_content and status["status"] == "completed" and isinstance(result, dict)
+                and "result" not in result and result.get("report_id")):
+            report = await get_async_analysis_report_model().get_report(result["report_id"], current_user["id"])
+            result["result"] = report.get("summary") if report else None
+        return status
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting task status: {str(e)}")
 
 
+@router.post("/status:batch", response_model=TaskStatusBatchResponse)
+async def get_task_statuses(
+    batch: TaskStatusBatchRequest,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Get the status of many tasks in one request.
+    
+    Ownership of all tasks is checked with one task-report mapping query (and
+    one for reports coalesced onto another user's task) and
+    their states are read from the result backend with one MGET. Completed
+    tasks carry their result pointer (report ID) without the report content.
+    ETAs need queue lookups per task, so they are only estimated with
+    include_eta.
+    """
+    max_tasks = DatabaseConfig.get_task_events_config()["status_batch_max_tasks"]
+    owned, unknown, mappings = await _split_owned_tasks(batch.task_ids, current_user["id"], max_tasks)
+    
+    def build_statuses() -> List[Dict[str, Any]]:
+        states = _read_task_states(owned)
+        return [
+            _user_status(
+                _task_status(task_id, *states[task_id], current_user["id"], include_eta=batch.include_eta),
+                mappings[task_id]
+            )
+            for task_id in owned
+        ]
+    
+    try:
+        tasks = await asyncio.to_thread(build_statuses)
+        return TaskStatusBatchResponse(tasks=tasks, not_found=unknown)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting task statuses: {str(e)}")
+
+
+def _cancel_owned_task(task_id: str, mapping: Dict[str, Any]) -> str:
+    """Flag the user's own task for cancellation; returns the response status"""
+    if not request_cancellation(task_id):
+        # Without Redis there is no flag to check, so stop the task the hard way
+        celery_app.control.revoke(task_id, terminate=True)
+        return "cancelled"
+    
+    if AsyncResult(task_id, app=celery_app).state != TaskStatus.PENDING:
+        return "cancelling"
+    
+    get_analysis_report_model().update_report(
+        report_id=mapping["report_id"],
+        user_id=mapping["user_id"],
+        summary="Analysis cancelled before it started",
+        status=ReportStatus.CANCELLED.value
+    )
+    # With coalesced submissions waiting the task is not over: the worker hands it to them
+    registry = get_inflight_registry()
+    if registry is None or registry.follower_count(task_id) == 0:
+        task_events.publish_task_event(
+            task_id, task_events.STATUS_CANCELLED, 0, "Task was cancelled", report_id=mapping["report_id"]
+        )
+    return "cancelled"
+
+
+def _detach_follower(task_id: str, follower: Dict[str, Any]) -> bool:
+    """Take the user's coalesced report off another user's task; False if it no longer waits on it"""
+    registry = get_inflight_registry()
+    if registry is None or not registry.detach_follower(task_id, follower["report_id"], follower["user_id"]):
+        return False
+    
+    get_analysis_report_model().update_report(
+        report_id=follower["report_id"],
+        user_id=follower["user_id"],
+        summary="Analysis cancelled",
+        status=ReportStatus.CANCELLED.value
+    )
+    get_task_report_mapping_model().delete_follower_by_report_id(follower["report_id"])
+    return True
+
+
 @router.post("/{task_id}/cancel")
 async def cancel_task(
     task_id: str,
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Cancel a running task"""
+    """Cancel a queued or running task.
+    
+    The task is flagged rather than killed: a running task stops at its next
+    pipeline stage or crew step, keeps its partial output on the report and
+    marks it cancelled, and the worker process moves on to the next task.
+    A task that has not started yet has its report marked cancelled now.
+    
+    Other users' submissions coalesced onto the task are not affected: the
+    run is handed to the first of them and carries on. Cancelling a shared
+    task from a coalesced submission cancels only that submission's report.
+    """
     try:
-        # Revoke the task
-        celery_app.control.revoke(task_id, terminate=True)
+        mapping_model = get_async_task_report_mapping_model()
+        mapping = (await mapping_model.get_user_task_mappings(current_user["id"], [task_id])).get(task_id)
+        if not mapping:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        owner = await mapping_model.get_mapping_by_task_id(task_id)
+        if owner and owner["report_id"] == mapping["report_id"]:
+            status = await asyncio.to_thread(_cancel_owned_task, task_id, mapping)
+        elif await asyncio.to_thread(_detach_follower, task_id, mapping):
+            status = "cancelled"
+        else:
+            raise HTTPException(status_code=409, detail="Report is no longer waiting on this task")
         
         return {
             "task_id": task_id,
-            "status": "cancelled",
-            "message": "Task has been cancelled"
+            "status": status,
+            "message": "Task has been cancelled" if status == "cancelled"
+                       else "Task will stop at its next step and keep its partial results"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error cancelling task: {str(e)}")
 
@@ -105,34 +502,15 @@ async def cancel_task(
 async def get_active_tasks(
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Get all active tasks"""
+    """Get all active tasks (from the latest queue monitor snapshot)"""
     try:
-        # Get active tasks from all workers
-        inspect = celery_app.control.inspect()
-        active_tasks = inspect.active()
-        
-        if not active_tasks:
-            return {
-                "active_tasks": [],
-                "total_count": 0
-            }
-        
-        # Flatten the results
-        all_tasks = []
-        for worker, tasks in active_tasks.items():
-            for task in tasks:
-                all_tasks.append({
-                    "task_id": task.get('id'),
-                    "name": task.get('name'),
-                    "worker": worker,
-                    "args": task.get('args', []),
-                    "kwargs": task.get('kwargs', {}),
-                    "time_start": task.get('time_start')
-                })
+        snapshot = await get_queue_monitor().get_snapshot()
         
         return {
-            "active_tasks": all_tasks,
-            "total_count": len(all_tasks)
+            "active_tasks": snapshot["active_tasks"],
+            "total_count": len(snapshot["active_tasks"]),
+            "collected_at": snapshot["collected_at"],
+            "age_seconds": snapshot["age_seconds"]
         }
         
     except Exception as e:
@@ -143,39 +521,20 @@ async def get_active_tasks(
 async def get_task_stats(
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Get task statistics"""
+    """Get task statistics (from the latest queue monitor snapshot)"""
     try:
-        # Get worker stats
-        inspect = celery_app.control.inspect()
-        stats = inspect.stats()
-        
-        if not stats:
-            return {
-                "workers": [],
-                "total_workers": 0,
-                "total_active_tasks": 0
-            }
-        
-        # Process stats
-        worker_stats = []
-        total_active = 0
-        
-        for worker, worker_stat in stats.items():
-            active_tasks = worker_stat.get('total', {}).get('active_tasks', 0)
-            total_active += active_tasks
-            
-            worker_stats.append({
-                "worker": worker,
-                "active_tasks": active_tasks,
-                "total_tasks": worker_stat.get('total', {}).get('total_tasks', 0),
-                "pool": worker_stat.get('pool', {}),
-                "rusage": worker_stat.get('rusage', {})
-            })
+        snapshot = await get_queue_monitor().get_snapshot()
+        workers = snapshot["workers"]
+        warmup = await asyncio.to_thread(get_warmup_stats)
         
         return {
-            "workers": worker_stats,
-            "total_workers": len(worker_stats),
-            "total_active_tasks": total_active
+            "workers": workers,
+            "total_workers": len(workers),
+            "total_active_tasks": sum(worker["active_tasks"] for worker in workers),
+            "total_reserved_tasks": snapshot["reserved_count"],
+            "warmup": warmup,
+            "collected_at": snapshot["collected_at"],
+            "age_seconds": snapshot["age_seconds"]
         }
         
     except Exception as e:
@@ -186,24 +545,89 @@ async def get_task_stats(
 async def get_queue_info(
     current_user: Dict[str, Any] = Depends(get_current_active_user)
 ):
-    """Get information about task queues"""
+    """Get information about task queues (from the latest queue monitor snapshot)"""
     try:
-        # Get queue lengths from Redis
-        from app.celery_app import REDIS_URL
-        import redis
-        
-        redis_client = redis.from_url(REDIS_URL)
-        
-        # Get queue lengths
-        queues = {
-            "analysis": redis_client.llen("celery"),
-            "default": redis_client.llen("celery"),
-        }
+        snapshot = await get_queue_monitor().get_snapshot()
+        queues = snapshot["queues"]
+        fair_share_pending = sum(snapshot["fair_share_pending"].values())
         
         return {
             "queues": queues,
-            "total_pending": sum(queues.values())
+            "reserved": snapshot["reserved_count"],
+            "active": len(snapshot["active_tasks"]),
+            "fair_share_pending": fair_share_pending,
+            "fair_share_pending_by_lane": snapshot["fair_share_pending"],
+            "total_pending": sum(queues.values()) + fair_share_pending,
+            "collected_at": snapshot["collected_at"],
+            "age_seconds": snapshot["age_seconds"]
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting queue info: {str(e)}")
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats(
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """Get fair-share queue depths and per-user queue-wait percentiles (admin only)"""
+    scheduler = get_fair_share_scheduler()
+    if scheduler is None:
+        return {"enabled": False}
+    
+    try:
+        return {"enabled": True, **scheduler.get_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting scheduler stats: {str(e)}")
+
+
+@router.get("/memory")
+async def get_memory_stats(
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """Get peak worker RSS per analysis type and document size bucket (admin only)"""
+    try:
+        worker_config = DatabaseConfig.get_worker_config()
+        return {
+            "recycle_policy": {
+                "max_memory_per_child_mb": worker_config["max_memory_per_child_mb"],
+                "max_tasks_per_child": worker_config["max_tasks_per_child"]
+            },
+            "by_analysis_type": get_memory_report()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting memory stats: {str(e)}")
+
+
+@router.get("/time-limits")
+async def get_time_limit_kill_stats(
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """Get time-limit kills per limit policy and document size class (admin only)"""
+    try:
+        return {
+            "size_routing_enabled": DatabaseConfig.get_job_sizing_config()["enabled"],
+            "by_policy": get_time_limit_stats()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting time limit stats: {str(e)}")
+
+
+@router.get("/autoscaling")
+async def get_autoscaling_signal(
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """Get the backlog estimate and desired worker count for autoscalers (admin only)"""
+    controller = get_admission_controller()
+    if controller is None:
+        return {"enabled": False}
+    
+    try:
+        snapshot = await get_queue_monitor().get_snapshot()
+        return {
+            "enabled": True,
+            "max_backlog_seconds": controller.max_backlog_seconds,
+            **controller.estimate(snapshot, additional_jobs=0)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting autoscaling signal: {str(e)}")
@@ -0,0 +1,161 @@
+"""
+Resumable Upload Endpoints
+==========================
+
+Chunked, resumable uploads for large documents (see
+app.services.resumable_uploads). Create a session, PUT chunks at byte
+offsets, check which ranges are still missing after a failure, and complete
+the session to register the document.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+
+from app.api.routers.auth import get_current_active_user
+from app.api.routers.documents import DocumentMetadata, DATA_DIR, document_download_url
+from app.models.factory import get_async_document_model
+from app.models.schemas import UploadSessionRequest, UploadSessionResponse, UploadCompleteRequest
+from app.services.uploads import UploadTooLarge
+from app.services.resumable_uploads import get_resumable_upload_store, UploadSessionError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/documents/uploads", tags=["documents"])
+
+
+def _session_response(store, session: Dict[str, Any]) -> UploadSessionResponse:
+    received = store.received_ranges(session)
+    return UploadSessionResponse(
+        upload_id=session["upload_id"],
+        filename=session["filename"],
+        size_bytes=session["size_bytes"],
+        chunk_bytes=session["chunk_bytes"],
+        received_bytes=sum(end - start for start, end in received),
+        received_ranges=[list(r) for r in received],
+        missing_ranges=[list(r) for r in store.missing_ranges(session)],
+        expires_at=session["expires_at"],
+        upload_url=f"/documents/uploads/{session['upload_id']}"
+    )
+
+
+async def _get_session(store, upload_id: str, user_id: str) -> Dict[str, Any]:
+    try:
+        session = await asyncio.to_thread(store.get_session, upload_id, user_id)
+    except UploadSessionError:
+        session = None
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload session not found or expired")
+    return session
+
+
+@router.post("", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    upload_request: UploadSessionRequest,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Start a resumable upload"""
+    store = get_resumable_upload_store()
+    try:
+        session = await asyncio.to_thread(
+            store.create_session,
+            current_user["id"],
+            upload_request.name or upload_request.filename,
+            upload_request.size_bytes,
+            upload_request.sha256
+        )
+        return await asyncio.to_thread(_session_response, store, session)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating upload session: {str(e)}")
+
+
+@router.put("/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk in the file"),
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Store one chunk (the raw request body) at the given offset.
+
+    Chunks may arrive in any order and be resent; the response lists the
+    ranges still missing.
+    """
+    store = get_resumable_upload_store()
+    session = await _get_session(store, upload_id, current_user["id"])
+    try:
+        await store.write_chunk(session, offset, request.stream())
+        return await asyncio.to_thread(_session_response, store, session)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error storing upload chunk: {str(e)}")
+
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    upload_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Get the received and missing byte ranges of an upload"""
+    store = get_resumable_upload_store()
+    session = await _get_session(store, upload_id, current_user["id"])
+    return await asyncio.to_thread(_session_response, store, session)
+
+
+@router.post("/{upload_id}/complete", response_model=DocumentMetadata)
+async def complete_upload(
+    upload_id: str,
+    complete_request: UploadCompleteRequest,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Assemble the chunks, verify the SHA-256 and register the document"""
+    store = get_resumable_upload_store()
+    session = await _get_session(store, upload_id, current_user["id"])
+    staged = None
+    try:
+        staged = await asyncio.to_thread(store.assemble, session, DATA_DIR, complete_request.sha256)
+        doc_result = await get_async_document_model().create_document_from_upload(
+            user_id=current_user["id"],
+            original_name=session["filename"],
+            staged_upload=staged,
+            upload_path=DATA_DIR
+        )
+        staged = None
+        await asyncio.to_thread(store.delete_session, upload_id)
+
+        return DocumentMetadata(
+            id=str(doc_result["id"]),
+            name=doc_result["original_name"],
+            size_bytes=doc_result["size_bytes"],
+            modified_at=doc_result["created_at"],
+            path=doc_result["path"],
+            download_url=document_download_url(doc_result["id"])
+        )
+
+    except UploadSessionError as e:
+        # Chunks are kept so an incomplete or corrupted upload can be repaired
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error completing upload: {str(e)}")
+    finally:
+        if staged is not None:
+            staged.discard()
+
+
+@router.delete("/{upload_id}")
+async def abort_upload(
+    upload_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_active_user)
+):
+    """Abandon an upload and delete its chunks"""
+    store = get_resumable_upload_store()
+    await _get_session(store, upload_id, current_user["id"])
+    await asyncio.to_thread(store.delete_session, upload_id)
+    return {"status": "deleted", "upload_id": upload_id}
@@ -10,17 +10,24 @@ from celery import Celery
 from celery.signals import worker_ready, worker_shutdown
 from dotenv import load_dotenv
 
+from app.config import DatabaseConfig
+
 # Load environment variables
 load_dotenv(".env")
 
-# Redis configuration
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# In embedded mode tasks run inside the API process (app.services.embedded_executor)
+# and their results live in a local SQLite backend instead of Redis
+EMBEDDED_EXECUTOR = DatabaseConfig.get_executor_config()["backend"] == "embedded"
+
+# Redis configuration. Embedded mode needs no Redis, so Redis-backed features
+# are only enabled there when REDIS_URL is set explicitly
+REDIS_URL = os.getenv("REDIS_URL", "" if EMBEDDED_EXECUTOR else "redis://localhost:6379/0")
 
 # Create Celery app
 celery_app = Celery(
     'financial_analyzer',
-    broker=REDIS_URL,
-    backend=REDIS_URL,
+    broker=REDIS_URL or 'memory://',
+    backend='app.services.embedded_executor:SQLiteResultBackend' if EMBEDDED_EXECUTOR else REDIS_URL,
     include=['app.celery_tasks']
 )
 
@@ -34,8 +41,13 @@ celery_app.conf.update(
     enable_utc=True,
     
     # Task execution
-    task_always_eager=False,  # Set to True for testing
-    task_eager_propagates=True,
+    # Never eager: that would run analyses inside the request. Use
+    # EXECUTOR_BACKEND=embedded for single-node deployments and tests instead
+    task_always_eager=False,
+    # The embedded executor runs tasks with apply(); keep their states and results.
+    # Propagating errors would skip storing the failure and abort eager retries
+    task_eager_propagates=not EMBEDDED_EXECUTOR,
+    task_store_eager_result=EMBEDDED_EXECUTOR,
     
     # Task routing
     task_routes={
@@ -45,17 +57,29 @@ celery_app.conf.update(
         'app.celery_tasks.process_verification_analysis': {'queue': 'analysis'},
     },
     
-    # Task time limits
+    # Task time limits (defaults; analyses get per-task limits from their
+    # estimated size and large documents go to the analysis_large queue)
     task_soft_time_limit=300,  # 5 minutes
     task_time_limit=600,       # 10 minutes
     
     # Worker configuration
     worker_prefetch_multiplier=1,
-    worker_max_tasks_per_child=50,
+    # Recycle children by memory rather than blindly by task count: a child
+    # whose RSS exceeds the threshold after a task is replaced (prefork only)
+    worker_max_memory_per_child=DatabaseConfig.get_worker_config()["max_memory_per_child_mb"] * 1024,
+    worker_max_tasks_per_child=DatabaseConfig.get_worker_config()["max_tasks_per_child"],
+    # Child processes prewarm crews and clients on start (app.celery_tasks)
+    worker_proc_alive_timeout=float(os.getenv("WORKER_PROC_ALIVE_TIMEOUT", "30")),
     
     # Result backend settings
     result_expires=3600,  # 1 hour
     
+    # Priority lanes: Redis emulates priorities with one list per step, 0 is highest
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'queue_order_strategy': 'priority',
+    },
+    
     # Task retry settings
     task_acks_late=True,
     worker_disable_rate_limits=False,
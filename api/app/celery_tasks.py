@@ -6,40 +6,103 @@ This module contains all Celery tasks for background processing of financial doc
 """
 
 import os
+import time
+import shutil
 import logging
+import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
-from celery import current_task
-from celery.exceptions import Retry
+from typing import Optional, Dict, Any, List
+from celery import Task
+from celery.exceptions import Retry, SoftTimeLimitExceeded
+from celery.worker.request import Request
+from celery.signals import task_prerun, task_postrun, task_revoked, worker_init, worker_ready, worker_process_init
 
 from app.celery_app import celery_app, TaskStatus
+from app.config import DatabaseConfig
 from app.domain.agents import financial_analyst, investment_advisor, risk_assessor, verifier
 from app.domain.task import analyze_financial_document, investment_analysis, risk_assessment, verification
-from app.models.factory import get_analysis_report_model
+from app.models.factory import get_analysis_report_model, get_task_report_mapping_model
 from app.models.schemas import ReportStatus
+from app.services.coalescing import get_inflight_registry
+from app.services.result_cache import get_result_cache
+from app.services.batches import get_batch_store
+from app.services.fair_share import get_fair_share_scheduler
+from app.services import worker_warmup
+from app.services.memory_accounting import TaskMemoryTracker, record_task_memory, document_size
+from app.services.job_sizing import record_time_limit_event
+from app.services.admission import record_completion, release_admitted
+from app.services.eta import get_eta_model, record_timings
+from app.services.progress import ProgressReporter
+from app.services.cancellation import CancellationToken, TaskCancelled
+from app.services import task_events
+from app.services.storage import get_storage, get_worker_file_cache
 
 logger = logging.getLogger(__name__)
 
 
-def _run_crew_sync(agents, tasks, query: str, file_path: str):
-    """Run CrewAI crew synchronously"""
-    from crewai import Crew, Process
+# Crew templates built once per worker process (see prewarm_worker_process)
+_CREW_TEMPLATES: Dict[str, Any] = {}
+_CREW_TEMPLATES_LOCK = threading.Lock()
+
+# Bounds concurrent crew runs per process when a thread or gevent pool runs
+# more tasks than the LLM provider should see at once
+_CREW_SLOTS = threading.BoundedSemaphore(DatabaseConfig.get_worker_config()["max_concurrent_crews"])
+
+# Task states that free a fair-share in-flight slot
+FINISHED_STATES = (TaskStatus.SUCCESS, TaskStatus.FAILURE, TaskStatus.REVOKED)
+
+# Seconds between refreshes of a running task's fair-share in-flight entry
+FAIR_SHARE_HEARTBEAT_SECONDS = 60
+
+
+def _get_crew(analysis_type: str):
+    """Get a crew for an analysis type, copied from the per-process template"""
+    with _CREW_TEMPLATES_LOCK:
+        template = _CREW_TEMPLATES.get(analysis_type)
+        if template is None:
+            from crewai import Crew, Process
+            
+            pipeline = ANALYSIS_PIPELINES[analysis_type]
+            template = Crew(
+                agents=pipeline["agents"],
+                tasks=pipeline["tasks"],
+                process=Process.sequential,
+            )
+            _CREW_TEMPLATES[analysis_type] = template
     
-    crew = Crew(
-        agents=agents,
-        tasks=tasks,
-        process=Process.sequential,
-    )
-    return crew.kickoff(inputs={"query": query, "file_path": file_path})
+    # Each run gets its own copy (agents and tasks included) so concurrent
+    # runs in a thread or gevent pool never share task outputs or agent state
+    return template.copy()
 
 
-def _update_task_progress(progress: int, message: str = ""):
-    """Update task progress"""
-    if current_task:
-        current_task.update_state(
-            state=TaskStatus.STARTED,
-            meta={'progress': progress, 'message': message}
-        )
+def _build_crew_templates() -> int:
+    """Build the crew template for every analysis type"""
+    for analysis_type in ANALYSIS_PIPELINES:
+        _get_crew(analysis_type)
+    return len(_CREW_TEMPLATES)
+
+
+def _run_crew_sync(analysis_type: str, query: str, file_path: str, step_callback=None, task_callback=None):
+    """Run CrewAI crew synchronously"""
+    crew = _get_crew(analysis_type)
+    if step_callback is not None:
+        crew.step_callback = step_callback
+    if task_callback is not None:
+        crew.task_callback = task_callback
+    with _CREW_SLOTS:
+        return crew.kickoff(inputs={"query": query, "file_path": file_path})
+
+
+def _task_pages(task_id: str) -> Optional[int]:
+    """Page count registered with the task at submission"""
+    model = get_eta_model()
+    if model is None:
+        return None
+    try:
+        context = model.task_context(task_id)
+    except Exception:
+        return None
+    return context.get("pages") if context else None
 
 
 def _generate_report_file(analysis_type: str, user_id: str, query: str, file_name: str, result: str) -> str:
@@ -67,284 +130,399 @@ def _generate_report_file(analysis_type: str, user_id: str, query: str, file_nam
     return report_path
 
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def process_comprehensive_analysis(self, report_id: str, query: str, file_path: str, file_name: str, user_id: str, document_id: Optional[str] = None):
-    """Process comprehensive analysis in the background using Celery"""
+# Agents, tasks, status labels and default queries for each analysis type
+ANALYSIS_PIPELINES = {
+    "comprehensive": {
+        "agents": [financial_analyst],
+        "tasks": [analyze_financial_document],
+        "label": "Analysis",
+        "default_query": "Analyze this financial document for comprehensive insights",
+    },
+    "investment": {
+        "agents": [investment_advisor],
+        "tasks": [investment_analysis],
+        "label": "Investment analysis",
+        "default_query": "Analyze this financial document for investment opportunities",
+    },
+    "risk": {
+        "agents": [risk_assessor],
+        "tasks": [risk_assessment],
+        "label": "Risk analysis",
+        "default_query": "Analyze this financial document for risk assessment",
+    },
+    "verification": {
+        "agents": [verifier],
+        "tasks": [verification],
+        "label": "Verification analysis",
+        "default_query": "Verify if this is a valid financial document",
+    },
+}
+
+
+def _complete_followers(followers, result: str, report_path: str):
+    """Fill in the reports of coalesced submissions from the shared result"""
     analysis_reports = get_analysis_report_model()
     
-    try:
-        _update_task_progress(10, "Starting comprehensive analysis...")
-        
-        # Update status to in_progress
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary="Analysis in progress...",
-            status=ReportStatus.IN_PROGRESS.value
-        )
-        
-        _update_task_progress(30, "Running AI analysis...")
-        
-        # Run crew analysis
-        result = _run_crew_sync(
-            [financial_analyst],
-            [analyze_financial_document],
-            query,
-            file_path
-        )
-        
-        _update_task_progress(70, "Generating report...")
-        
-        # Generate report file
-        report_path = _generate_report_file(
-            "comprehensive", user_id, query, file_name, str(result)
-        )
-        
-        _update_task_progress(90, "Saving results...")
-        
-        # Update report with results
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary=str(result),
-            status=ReportStatus.COMPLETED.value,
-            report_path=report_path
-        )
-        
-        _update_task_progress(100, "Analysis completed successfully")
-        
-        logger.info(f"Comprehensive analysis completed for report {report_id}")
-        
-        return {
-            "status": "success",
-            "report_id": report_id,
-            "result": str(result),
-            "report_path": report_path
-        }
-        
-    except Exception as exc:
-        logger.error(f"Error processing comprehensive analysis for report {report_id}: {str(exc)}")
-        
-        # Update status to failed
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary=f"Analysis failed: {str(exc)}",
-            status=ReportStatus.FAILED.value
-        )
-        
-        # Retry with exponential backoff
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+    for follower in followers:
+        try:
+            report = analysis_reports.get_report(follower["report_id"], follower["user_id"])
+            if not report:
+                continue
+            
+            # Each follower keeps its own report file so deleting one report
+            # never removes the result another user is looking at; a follower
+            # whose path names the shared file (same user, same second) gets
+            # one suffixed with its report ID
+            follower_path = report.get("report_path")
+            if not follower_path or os.path.abspath(follower_path) == os.path.abspath(report_path):
+                root, ext = os.path.splitext(report_path)
+                follower_path = f"{root}_{follower['report_id']}{ext}"
+            shutil.copyfile(report_path, follower_path)
+            analysis_reports.update_report(
+                report_id=follower["report_id"],
+                user_id=follower["user_id"],
+                summary=result,
+                status=ReportStatus.COMPLETED.value,
+                report_path=follower_path
+            )
+        except Exception as e:
+            logger.error(f"Error completing coalesced report {follower.get('report_id')}: {str(e)}")
 
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def process_investment_analysis(self, report_id: str, query: str, file_path: str, file_name: str, user_id: str, document_id: Optional[str] = None):
-    """Process investment analysis in the background using Celery"""
+def _fail_followers(followers, message: str):
+    """Mark the reports of coalesced submissions as failed"""
     analysis_reports = get_analysis_report_model()
     
+    for follower in followers:
+        try:
+            analysis_reports.update_report(
+                report_id=follower["report_id"],
+                user_id=follower["user_id"],
+                summary=message,
+                status=ReportStatus.FAILED.value
+            )
+        except Exception as e:
+            logger.error(f"Error failing coalesced report {follower.get('report_id')}: {str(e)}")
+
+
+def _release_coalesce_key(coalesce_key: Optional[str], task_id: str):
+    """Release the in-flight registry entry owned by this task and return its followers"""
+    if not coalesce_key:
+        return []
+    
+    registry = get_inflight_registry()
+    if registry is None:
+        return []
+    
     try:
-        _update_task_progress(10, "Starting investment analysis...")
-        
-        # Update status to in_progress
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary="Investment analysis in progress...",
-            status=ReportStatus.IN_PROGRESS.value
-        )
-        
-        _update_task_progress(30, "Running AI analysis...")
-        
-        # Run crew analysis
-        result = _run_crew_sync(
-            [investment_advisor],
-            [investment_analysis],
-            query,
-            file_path
-        )
-        
-        _update_task_progress(70, "Generating report...")
-        
-        # Generate report file
-        report_path = _generate_report_file(
-            "investment", user_id, query, file_name, str(result)
-        )
-        
-        _update_task_progress(90, "Saving results...")
-        
-        # Update report with results
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary=str(result),
-            status=ReportStatus.COMPLETED.value,
-            report_path=report_path
-        )
-        
-        _update_task_progress(100, "Investment analysis completed successfully")
-        
-        logger.info(f"Investment analysis completed for report {report_id}")
-        
-        return {
-            "status": "success",
-            "report_id": report_id,
-            "result": str(result),
-            "report_path": report_path
-        }
-        
-    except Exception as exc:
-        logger.error(f"Error processing investment analysis for report {report_id}: {str(exc)}")
-        
-        # Update status to failed
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary=f"Investment analysis failed: {str(exc)}",
-            status=ReportStatus.FAILED.value
-        )
-        
-        # Retry with exponential backoff
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+        return registry.release(coalesce_key, task_id)
+    except Exception as e:
+        logger.warning(f"Could not release in-flight entry {coalesce_key}: {str(e)}")
+        return []
 
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def process_risk_analysis(self, report_id: str, query: str, file_path: str, file_name: str, user_id: str, document_id: Optional[str] = None):
-    """Process risk analysis in the background using Celery"""
-    analysis_reports = get_analysis_report_model()
+def _promote_follower(coalesce_key: Optional[str], task_id: str) -> Optional[Dict[str, str]]:
+    """Take the first coalesced submission off the registry to carry on a cancelled run"""
+    if not coalesce_key:
+        return None
+    
+    registry = get_inflight_registry()
+    if registry is None:
+        return None
+    return registry.promote_follower(coalesce_key, task_id)
+
+
+def _store_cached_result(result_fingerprint: Optional[str], result: str):
+    """Store a completed result so identical later submissions skip the crew run"""
+    if not result_fingerprint:
+        return
+    
+    result_cache = get_result_cache()
+    if result_cache is None:
+        return
     
     try:
-        _update_task_progress(10, "Starting risk analysis...")
+        result_cache.store(result_fingerprint, result)
+    except Exception as e:
+        logger.warning(f"Could not cache analysis result {result_fingerprint}: {str(e)}")
+
+
+class AnalysisRequest(Request):
+    """Worker-side request that counts time-limit kills of analysis tasks"""
+    
+    def on_timeout(self, soft, timeout):
+        super().on_timeout(soft, timeout)
+        # Hard kills never reach the task body, so they can only be seen here
+        record_time_limit_event(self.kwargs.get("size_class"), "soft_kills" if soft else "hard_kills")
+        if not soft:
+            task_events.publish_task_event(
+                self.id, task_events.STATUS_FAILED, 0, "Task failed",
+                report_id=self.kwargs.get("report_id"), error=f"Time limit exceeded ({timeout}s)"
+            )
+
+
+class AnalysisTask(Task):
+    """Base class for the analysis tasks"""
+    Request = AnalysisRequest
+
+
+def _release_input(file_key: Optional[str], delete_input: bool) -> None:
+    """Remove a one-off upload from storage once no retry will read it again"""
+    if not file_key or not delete_input:
+        return
+    try:
+        get_storage().delete(file_key)
+        get_worker_file_cache().forget(file_key)
+    except Exception as e:
+        logger.warning(f"Could not remove analysis input {file_key}: {str(e)}")
+
+
+def _process_analysis(task, analysis_type: str, report_id: str, query: str, file_path: str,
+                      file_name: str, user_id: str, coalesce_key: Optional[str] = None,
+                      result_fingerprint: Optional[str] = None, batch_id: Optional[str] = None,
+                      size_class: Optional[str] = None, file_key: Optional[str] = None,
+                      delete_input: bool = False):
+    """Run the analysis pipeline for one report, shared by all analysis tasks.
+    
+    file_key names the input in document storage (see app.services.storage);
+    file_path is only used by tasks queued before inputs were passed by key.
+    """
+    pipeline = ANALYSIS_PIPELINES[analysis_type]
+    label = pipeline["label"]
+    analysis_reports = get_analysis_report_model()
+    
+    started_at = time.monotonic()
+    worker_config = DatabaseConfig.get_worker_config()
+    # Peak tracking resets process-wide counters: only prefork children run one task at a time
+    memory_tracker = TaskMemoryTracker(
+        trace_allocations=worker_config["trace_allocations"],
+        track_peak=worker_config["pool"] == "prefork" and not task.request.is_eager
+    )
+    memory_tracker.start()
+    reporter = ProgressReporter(
+        task, report_id, user_id, analysis_reports,
+        min_interval_seconds=worker_config["progress_min_interval_seconds"],
+        min_delta=worker_config["progress_min_delta"]
+    )
+    
+    def hand_off() -> bool:
+        """On cancellation by the owner, carry on for the first coalesced submission instead"""
+        nonlocal report_id, user_id
+        follower = _promote_follower(coalesce_key, task.request.id)
+        if follower is None:
+            return False
         
-        # Update status to in_progress
         analysis_reports.update_report(
             report_id=report_id,
             user_id=user_id,
-            summary="Risk analysis in progress...",
-            status=ReportStatus.IN_PROGRESS.value
+            summary=f"{label} cancelled",
+            status=ReportStatus.CANCELLED.value
         )
+        reporter.retarget(follower["report_id"], follower["user_id"], summary=f"{label} in progress...")
+        try:
+            get_task_report_mapping_model().hand_over_task(task.request.id, follower["report_id"], follower["user_id"])
+        except Exception as e:
+            logger.warning(f"Could not move task {task.request.id} to report {follower['report_id']}: {str(e)}")
+        logger.info(f"Report {report_id} cancelled; task {task.request.id} continues for report {follower['report_id']}")
+        report_id, user_id = follower["report_id"], follower["user_id"]
+        return True
+    
+    cancellation = CancellationToken(task.request.id, on_cancel=hand_off)
+    heartbeat = _fair_share_heartbeat(task)
+    # Outputs of the crew's finished tasks, kept in case the run is cancelled
+    partial_outputs: List[str] = []
+    
+    def on_crew_step(step_output):
+        reporter.crew_step(step_output)
+        heartbeat()
+        cancellation.check()
+    
+    try:
+        cancellation.check()
+        if file_key:
+            file_path = get_worker_file_cache().get(file_key)
+        reporter.update(10, f"Starting {analysis_type} analysis...", stage="starting",
+                        report_status=ReportStatus.IN_PROGRESS.value, summary=f"{label} in progress...")
         
-        _update_task_progress(30, "Running AI analysis...")
+        reporter.update(30, "Running AI analysis...", stage="crew")
         
-        # Run crew analysis
+        # Run crew analysis; agent steps advance progress from 30 to 70
+        reporter.start_crew(30, 70)
         result = _run_crew_sync(
-            [risk_assessor],
-            [risk_assessment],
-            query,
-            file_path
+            analysis_type, query, file_path,
+            step_callback=on_crew_step,
+            task_callback=lambda task_output: partial_outputs.append(str(task_output))
         )
         
-        _update_task_progress(70, "Generating report...")
+        crew_finished_at = time.monotonic()
+        cancellation.check()
+        reporter.update(70, "Generating report...", stage="report")
         
         # Generate report file
         report_path = _generate_report_file(
-            "risk", user_id, query, file_name, str(result)
+            analysis_type, user_id, query, file_name, str(result)
         )
-        
-        _update_task_progress(90, "Saving results...")
+        report_finished_at = time.monotonic()
         
         # Update report with results
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary=str(result),
-            status=ReportStatus.COMPLETED.value,
-            report_path=report_path
-        )
-        
-        _update_task_progress(100, "Risk analysis completed successfully")
-        
-        logger.info(f"Risk analysis completed for report {report_id}")
-        
-        return {
-            "status": "success",
-            "report_id": report_id,
-            "result": str(result),
-            "report_path": report_path
-        }
-        
-    except Exception as exc:
-        logger.error(f"Error processing risk analysis for report {report_id}: {str(exc)}")
-        
-        # Update status to failed
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary=f"Risk analysis failed: {str(exc)}",
-            status=ReportStatus.FAILED.value
-        )
-        
-        # Retry with exponential backoff
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
-
-
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def process_verification_analysis(self, report_id: str, query: str, file_path: str, file_name: str, user_id: str, document_id: Optional[str] = None):
-    """Process verification analysis in the background using Celery"""
-    analysis_reports = get_analysis_report_model()
-    
-    try:
-        _update_task_progress(10, "Starting verification analysis...")
-        
-        # Update status to in_progress
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary="Verification analysis in progress...",
-            status=ReportStatus.IN_PROGRESS.value
-        )
+        reporter.update(90, "Saving results...", stage="saving",
+                        report_status=ReportStatus.COMPLETED.value,
+                        summary=str(result), report_path=report_path)
         
-        _update_task_progress(30, "Running AI analysis...")
+        _store_cached_result(result_fingerprint, str(result))
         
-        # Run crew analysis
-        result = _run_crew_sync(
-            [verifier],
-            [verification],
-            query,
-            file_path
-        )
+        followers = _release_coalesce_key(coalesce_key, task.request.id)
+        if followers:
+            _complete_followers(followers, str(result), report_path)
+            logger.info(f"Completed {len(followers)} coalesced reports from report {report_id}")
         
-        _update_task_progress(70, "Generating report...")
+        reporter.update(100, f"{label} completed successfully", stage="completed")
         
-        # Generate report file
-        report_path = _generate_report_file(
-            "verification", user_id, query, file_name, str(result)
-        )
+        timings = {
+            "crew_seconds": round(crew_finished_at - started_at, 3),
+            "report_seconds": round(report_finished_at - crew_finished_at, 3),
+            "total_seconds": round(time.monotonic() - started_at, 3)
+        }
+        record_completion(task.request.id, timings)
+        record_timings(analysis_type, _task_pages(task.request.id), timings)
         
-        _update_task_progress(90, "Saving results...")
+        document_bytes = document_size(file_path)
+        memory = memory_tracker.stop()
+        memory["document_bytes"] = document_bytes
+        # Samples of tasks sharing the process would count the other tasks' memory
+        if memory_tracker.track_peak:
+            record_task_memory(analysis_type, document_bytes, memory["peak_rss_mb"])
         
-        # Update report with results
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary=str(result),
-            status=ReportStatus.COMPLETED.value,
-            report_path=report_path
-        )
+        record_time_limit_event(size_class, "completed")
+        _release_input(file_key, delete_input)
+        logger.info(f"{label} completed for report {report_id} (peak RSS {memory['peak_rss_mb']} MB)")
         
-        _update_task_progress(100, "Verification analysis completed successfully")
+        # Only a pointer goes to the result backend; content is read from the report store
+        return {
+            "status": "success",
+            "report_id": report_id,
+            "analysis_type": analysis_type,
+            "result_chars": len(str(result)),
+            "report_bytes": os.path.getsize(report_path),
+            "timings": timings,
+            "memory": memory
+        }
         
-        logger.info(f"Verification analysis completed for report {report_id}")
+    except TaskCancelled:
+        memory_tracker.stop()
+        partial = "\n\n".join(partial_outputs)
+        report_path = None
+        if partial:
+            report_path = _generate_report_file(analysis_type, user_id, query, file_name, partial)
+            summary = f"{label} cancelled. Partial results:\n\n{partial}"
+        else:
+            summary = f"{label} cancelled before producing results"
+        
+        reporter.update(reporter.progress, f"{label} cancelled", stage="cancelled",
+                        report_status=ReportStatus.CANCELLED.value,
+                        summary=summary, report_path=report_path)
+        
+        followers = _release_coalesce_key(coalesce_key, task.request.id)
+        _fail_followers(followers, "Shared analysis was cancelled")
+        _release_input(file_key, delete_input)
+        logger.info(f"{label} cancelled for report {report_id} ({len(partial_outputs)} crew tasks finished)")
         
         return {
-            "status": "success",
+            "status": "cancelled",
             "report_id": report_id,
-            "result": str(result),
-            "report_path": report_path
+            "analysis_type": analysis_type,
+            "result_chars": len(partial),
+            "report_bytes": os.path.getsize(report_path) if report_path else 0
         }
         
     except Exception as exc:
-        logger.error(f"Error processing verification analysis for report {report_id}: {str(exc)}")
+        logger.error(f"Error processing {analysis_type} analysis for report {report_id}: {str(exc)}")
+        memory_tracker.stop()
         
         # Update status to failed
-        analysis_reports.update_report(
-            report_id=report_id,
-            user_id=user_id,
-            summary=f"Verification analysis failed: {str(exc)}",
-            status=ReportStatus.FAILED.value
-        )
+        reporter.update(reporter.progress, f"{label} failed: {str(exc)}", stage="failed",
+                        report_status=ReportStatus.FAILED.value)
+        
+        # Retrying with the same time limit would only be killed again
+        out_of_time = isinstance(exc, SoftTimeLimitExceeded)
+        
+        # Followers stay attached while retries remain
+        if out_of_time or task.request.retries >= task.max_retries:
+            followers = _release_coalesce_key(coalesce_key, task.request.id)
+            _fail_followers(followers, f"{label} failed: {str(exc)}")
+            _release_input(file_key, delete_input)
+            
+            # A raised error would abort the batch chord, so report the failure instead
+            if batch_id:
+                return {
+                    "status": "failed",
+                    "report_id": report_id,
+                    "analysis_type": analysis_type,
+                    "error": str(exc)
+                }
+            
+            if out_of_time:
+                raise
         
         # Retry with exponential backoff
-        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+        raise task.retry(exc=exc, countdown=60 * (2 ** task.request.retries))
+
+
+@celery_app.task(bind=True, base=AnalysisTask, max_retries=3, default_retry_delay=60)
+def process_comprehensive_analysis(self, report_id: str, query: str, file_path: str, file_name: str, user_id: str, document_id: Optional[str] = None, coalesce_key: Optional[str] = None, result_fingerprint: Optional[str] = None, batch_id: Optional[str] = None, size_class: Optional[str] = None, file_key: Optional[str] = None, delete_input: bool = False):
+    """Process comprehensive analysis in the background using Celery"""
+    return _process_analysis(self, "comprehensive", report_id, query, file_path, file_name, user_id, coalesce_key, result_fingerprint, batch_id, size_class, file_key, delete_input)
+
+
+@celery_app.task(bind=True, base=AnalysisTask, max_retries=3, default_retry_delay=60)
+def process_investment_analysis(self, report_id: str, query: str, file_path: str, file_name: str, user_id: str, document_id: Optional[str] = None, coalesce_key: Optional[str] = None, result_fingerprint: Optional[str] = None, batch_id: Optional[str] = None, size_class: Optional[str] = None, file_key: Optional[str] = None, delete_input: bool = False):
+    """Process investment analysis in the background using Celery"""
+    return _process_analysis(self, "investment", report_id, query, file_path, file_name, user_id, coalesce_key, result_fingerprint, batch_id, size_class, file_key, delete_input)
+
+
+@celery_app.task(bind=True, base=AnalysisTask, max_retries=3, default_retry_delay=60)
+def process_risk_analysis(self, report_id: str, query: str, file_path: str, file_name: str, user_id: str, document_id: Optional[str] = None, coalesce_key: Optional[str] = None, result_fingerprint: Optional[str] = None, batch_id: Optional[str] = None, size_class: Optional[str] = None, file_key: Optional[str] = None, delete_input: bool = False):
+    """Process risk analysis in the background using Celery"""
+    return _process_analysis(self, "risk", report_id, query, file_path, file_name, user_id, coalesce_key, result_fingerprint, batch_id, size_class, file_key, delete_input)
+
+
+@celery_app.task(bind=True, base=AnalysisTask, max_retries=3, default_retry_delay=60)
+def process_verification_analysis(self, report_id: str, query: str, file_path: str, file_name: str, user_id: str, document_id: Optional[str] = None, coalesce_key: Optional[str] = None, result_fingerprint: Optional[str] = None, batch_id: Optional[str] = None, size_class: Optional[str] = None, file_key: Optional[str] = None, delete_input: bool = False):
+    """Process verification analysis in the background using Celery"""
+    return _process_analysis(self, "verification", report_id, query, file_path, file_name, user_id, coalesce_key, result_fingerprint, batch_id, size_class, file_key, delete_input)
+
+
+@celery_app.task(bind=True)
+def summarize_batch(self, results, batch_id: str):
+    """Chord callback that summarizes a finished batch of analyses"""
+    by_analysis_type: Dict[str, Dict[str, int]] = {}
+    failed_reports = []
+    
+    for result in results:
+        result = result or {}
+        analysis_type = result.get("analysis_type", "unknown")
+        counts = by_analysis_type.setdefault(analysis_type, {"succeeded": 0, "failed": 0})
+        if result.get("status") == "success":
+            counts["succeeded"] += 1
+        else:
+            counts["failed"] += 1
+            failed_reports.append({"report_id": result.get("report_id"), "error": result.get("error")})
+    
+    succeeded = sum(counts["succeeded"] for counts in by_analysis_type.values())
+    summary = {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "by_analysis_type": by_analysis_type,
+        "failed_reports": failed_reports
+    }
+    
+    batch_store = get_batch_store()
+    if batch_store is not None:
+        batch_store.set_summary(batch_id, summary)
+    
+    logger.info(f"Batch {batch_id} finished: {succeeded}/{len(results)} analyses succeeded")
+    return summary
 
 
 # Task mapping for easy access
@@ -362,3 +540,127 @@ def get_celery_task(analysis_type: str):
         raise ValueError(f"Unknown analysis type: {analysis_type}")
     
     return TASK_MAP[analysis_type]
+
+
+def _fair_share_header(task) -> Optional[Dict[str, Any]]:
+    """Read the fair-share header set at dispatch, wherever the protocol put it"""
+    header = getattr(task.request, "fair_share", None)
+    if header is None and isinstance(task.request.headers, dict):
+        header = task.request.headers.get("fair_share")
+    return header
+
+
+def _task_queue(task) -> Optional[str]:
+    """Celery queue a task was delivered from, for its fair-share in-flight count"""
+    header = _fair_share_header(task) or {}
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return header.get("queue") or delivery_info.get("routing_key")
+
+
+def _fair_share_heartbeat(task):
+    """Step hook refreshing the task's fair-share in-flight entry, at most every FAIR_SHARE_HEARTBEAT_SECONDS"""
+    scheduler = get_fair_share_scheduler()
+    queue = _task_queue(task)
+    last_beat = [time.monotonic()]
+    
+    def beat():
+        if scheduler is None or time.monotonic() - last_beat[0] < FAIR_SHARE_HEARTBEAT_SECONDS:
+            return
+        last_beat[0] = time.monotonic()
+        try:
+            scheduler.heartbeat(task.request.id, queue)
+        except Exception as e:
+            logger.warning(f"Fair-share heartbeat failed for task {task.request.id}: {str(e)}")
+    
+    return beat
+
+
+@worker_process_init.connect
+def prewarm_worker_process(**kwargs):
+    """Prewarm each worker child so its first analysis does not pay cold-start costs"""
+    worker_config = DatabaseConfig.get_worker_config()
+    if not worker_config["prewarm_enabled"]:
+        return
+    try:
+        worker_warmup.prewarm_process(_build_crew_templates, worker_config["warmup_parse_file"])
+    except Exception as e:
+        # A failed prewarm only means the first task starts cold
+        logger.warning(f"Worker prewarm failed: {str(e)}")
+
+
+@worker_init.connect
+def prewarm_worker_pool(sender=None, **kwargs):
+    """Prewarm thread and gevent pools, which run tasks in the main process"""
+    pool_cls = getattr(sender, "pool_cls", None)
+    pool_name = getattr(pool_cls, "__module__", str(pool_cls)).lower()
+    if pool_cls is None or "prefork" in pool_name or "processes" in pool_name:
+        return
+    prewarm_worker_process()
+
+
+@task_prerun.connect
+def analysis_task_prerun(sender=None, task_id=None, task=None, **kwargs):
+    """Record warm-up timing, count the task in flight and record how long it waited"""
+    if sender not in TASK_MAP.values():
+        return
+    worker_warmup.record_task_start(task_id)
+    release_admitted([task_id])
+    scheduler = get_fair_share_scheduler()
+    if scheduler is None:
+        return
+    try:
+        scheduler.task_started(task_id, _fair_share_header(task), queue=_task_queue(task))
+    except Exception as e:
+        logger.warning(f"Failed to record fair-share start for task {task_id}: {str(e)}")
+
+
+def _publish_final_event(task_id: str, state: Optional[str], retval: Any, report_id: Optional[str]) -> None:
+    """Publish a task's outcome; task_postrun runs after the result backend has it"""
+    if state in (TaskStatus.SUCCESS, TaskStatus.FAILURE, TaskStatus.RETRY):
+        task_events.publish_event(task_events.event_from_state(task_id, state, retval, report_id))
+
+
+@task_postrun.connect
+def analysis_task_postrun(sender=None, task_id=None, task=None, **kwargs):
+    """Publish the outcome, record warm-up timing, free the task's slot and dispatch the next queued analysis"""
+    if sender not in TASK_MAP.values():
+        return
+    _publish_final_event(task_id, kwargs.get("state"), kwargs.get("retval"),
+                         (kwargs.get("kwargs") or {}).get("report_id"))
+    worker_warmup.record_task_end(task_id)
+    # A retried task waits in Celery for its countdown and keeps its slot; its
+    # next run's prerun signal records it again
+    if kwargs.get("state") in FINISHED_STATES:
+        _free_fair_share_slot(task_id, _task_queue(task) if task is not None else None)
+
+
+@task_revoked.connect
+def analysis_task_revoked(sender=None, request=None, **kwargs):
+    """Free the slot of a task revoked before or while running (no postrun signal follows)"""
+    if sender not in TASK_MAP.values() or request is None:
+        return
+    delivery_info = getattr(request, "delivery_info", None) or {}
+    _free_fair_share_slot(request.id, delivery_info.get("routing_key"))
+
+
+def _free_fair_share_slot(task_id: str, queue: Optional[str]) -> None:
+    """Free a finished task's in-flight slot and dispatch the next queued analysis"""
+    scheduler = get_fair_share_scheduler()
+    if scheduler is None:
+        return
+    try:
+        scheduler.task_finished(task_id, queue=queue)
+    except Exception as e:
+        logger.warning(f"Failed to dispatch after task {task_id}: {str(e)}")
+
+
+@worker_ready.connect
+def fair_share_worker_ready(sender=None, **kwargs):
+    """Drain anything queued while no worker was running"""
+    scheduler = get_fair_share_scheduler()
+    if scheduler is None:
+        return
+    try:
+        scheduler.dispatch()
+    except Exception as e:
+        logger.warning(f"Failed to dispatch queued analyses on worker start: {str(e)}")
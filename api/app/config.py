@@ -45,5 +45,178 @@ class DatabaseConfig:
             "debug": os.getenv("DEBUG", "false").lower() == "true",
             "cors_origins": os.getenv("CORS_ORIGINS", "*").split(","),
             "rate_limit_requests": int(os.getenv("RATE_LIMIT_REQUESTS", "100")),
-            "rate_limit_window": int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "3600"))
+            "rate_limit_window": int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "3600")),
+            # Threads running database calls for async request handlers
+            "db_thread_pool_size": int(os.getenv("DB_THREAD_POOL_SIZE", "16"))
+        }
+    
+    @staticmethod
+    def get_upload_config() -> Dict[str, Any]:
+        """Get upload streaming configuration from environment variables"""
+        return {
+            "chunk_bytes": int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024))),
+            # 0 disables the limit
+            "max_bytes": int(os.getenv("UPLOAD_MAX_BYTES", "0")),
+            "blob_dir": os.getenv("UPLOAD_BLOB_DIR", os.path.join("data", "blobs")),
+            "sessions_dir": os.getenv("UPLOAD_SESSIONS_DIR", os.path.join("data", ".uploads")),
+            "resumable_chunk_bytes": int(os.getenv("UPLOAD_RESUMABLE_CHUNK_BYTES", str(8 * 1024 * 1024))),
+            "resumable_max_chunk_bytes": int(os.getenv("UPLOAD_RESUMABLE_MAX_CHUNK_BYTES", str(64 * 1024 * 1024))),
+            "session_ttl_seconds": int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", "86400")),
+            "bulk_max_files": int(os.getenv("UPLOAD_BULK_MAX_FILES", "500")),
+            "bulk_concurrency": int(os.getenv("UPLOAD_BULK_CONCURRENCY", "4"))
+        }
+    
+    @staticmethod
+    def get_storage_config() -> Dict[str, Any]:
+        """Get document storage configuration from environment variables"""
+        return {
+            # local: API and workers share STORAGE_LOCAL_ROOT; s3: an S3-compatible bucket
+            "backend": os.getenv("STORAGE_BACKEND", "local"),
+            "local_root": os.getenv("STORAGE_LOCAL_ROOT", "data"),
+            "s3_bucket": os.getenv("STORAGE_S3_BUCKET", ""),
+            "s3_prefix": os.getenv("STORAGE_S3_PREFIX", "documents/"),
+            "s3_endpoint_url": os.getenv("STORAGE_S3_ENDPOINT_URL") or None,
+            "s3_region": os.getenv("STORAGE_S3_REGION") or None,
+            "cache_dir": os.getenv("STORAGE_CACHE_DIR", os.path.join("data", ".cache")),
+            "cache_max_bytes": int(os.getenv("STORAGE_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+        }
+    
+    @staticmethod
+    def get_download_config() -> Dict[str, Any]:
+        """Get file download configuration from environment variables"""
+        return {
+            # Internal nginx location files are handed to with X-Accel-Redirect; empty serves them from the API
+            "accel_redirect_prefix": os.getenv("DOWNLOAD_ACCEL_REDIRECT_PREFIX", ""),
+            # Directory that location maps to (the API working directory, holding data/ and outputs/)
+            "accel_redirect_root": os.getenv("DOWNLOAD_ACCEL_REDIRECT_ROOT", ".")
+        }
+    
+    @staticmethod
+    def get_analysis_config() -> Dict[str, Any]:
+        """Get analysis pipeline configuration from environment variables"""
+        return {
+            "coalesce_enabled": os.getenv("ANALYSIS_COALESCE_ENABLED", "true").lower() == "true",
+            "coalesce_ttl_seconds": int(os.getenv("ANALYSIS_COALESCE_TTL_SECONDS", "3600")),
+            "result_cache_enabled": os.getenv("ANALYSIS_RESULT_CACHE_ENABLED", "true").lower() == "true",
+            "result_cache_ttl_seconds": int(os.getenv("ANALYSIS_RESULT_CACHE_TTL_SECONDS", "86400")),
+            "batch_max_jobs": int(os.getenv("ANALYSIS_BATCH_MAX_JOBS", "200")),
+            "batch_ttl_seconds": int(os.getenv("ANALYSIS_BATCH_TTL_SECONDS", "604800"))
+        }
+    
+    @staticmethod
+    def get_scheduler_config() -> Dict[str, Any]:
+        """Get fair-share scheduler configuration from environment variables"""
+        tier_weights = {}
+        for entry in os.getenv("SCHEDULER_TIER_WEIGHTS", "standard:1,premium:2,admin:2").split(","):
+            if ":" in entry:
+                tier, weight = entry.split(":", 1)
+                tier_weights[tier.strip()] = max(1, int(weight))
+        
+        # Per Celery queue ("analysis:4,analysis_large:2") or one number for every queue;
+        # unset queues follow the worker slots the queue monitor reports
+        max_inflight = {}
+        for entry in os.getenv("SCHEDULER_MAX_INFLIGHT", "").split(","):
+            if ":" in entry:
+                queue, cap = entry.split(":", 1)
+                max_inflight[queue.strip()] = max(1, int(cap))
+            elif entry.strip():
+                max_inflight["*"] = max(1, int(entry))
+        
+        # In-flight entries outlive the longest hard time limit, so only dead tasks' entries expire
+        sizing_config = DatabaseConfig.get_job_sizing_config()
+        stale_after_seconds = (
+            sizing_config["max_time_limit_seconds"] + sizing_config["hard_limit_grace_seconds"] + 600
+        )
+        
+        return {
+            "fair_share_enabled": os.getenv("SCHEDULER_FAIR_SHARE_ENABLED", "true").lower() == "true",
+            "max_inflight": max_inflight,
+            # Cap for queues without worker slots reported yet
+            "default_max_inflight": int(os.getenv("SCHEDULER_DEFAULT_MAX_INFLIGHT", "2")),
+            "tier_weights": tier_weights,
+            "interactive_priority": int(os.getenv("SCHEDULER_INTERACTIVE_PRIORITY", "0")),
+            "batch_priority": int(os.getenv("SCHEDULER_BATCH_PRIORITY", "9")),
+            "stale_after_seconds": int(os.getenv("SCHEDULER_STALE_AFTER_SECONDS", str(stale_after_seconds)))
+        }
+    
+    @staticmethod
+    def get_job_sizing_config() -> Dict[str, Any]:
+        """Get size-aware routing and time limit configuration from environment variables"""
+        return {
+            "enabled": os.getenv("ANALYSIS_SIZE_ROUTING_ENABLED", "true").lower() == "true",
+            "large_pages": int(os.getenv("ANALYSIS_LARGE_DOC_PAGES", "60")),
+            "large_bytes": int(os.getenv("ANALYSIS_LARGE_DOC_BYTES", str(10 * 1024 * 1024))),
+            "bytes_per_page": int(os.getenv("ANALYSIS_BYTES_PER_PAGE_ESTIMATE", "100000")),
+            "base_time_limit_seconds": int(os.getenv("ANALYSIS_BASE_TIME_LIMIT_SECONDS", "240")),
+            "per_page_seconds": float(os.getenv("ANALYSIS_TIME_LIMIT_PER_PAGE_SECONDS", "6")),
+            "max_time_limit_seconds": int(os.getenv("ANALYSIS_MAX_TIME_LIMIT_SECONDS", "3600")),
+            "hard_limit_grace_seconds": int(os.getenv("ANALYSIS_HARD_LIMIT_GRACE_SECONDS", "120"))
+        }
+    
+    @staticmethod
+    def get_admission_config() -> Dict[str, Any]:
+        """Get admission control and autoscaling configuration from environment variables"""
+        return {
+            "enabled": os.getenv("ADMISSION_ENABLED", "true").lower() == "true",
+            "max_backlog_seconds": int(os.getenv("ADMISSION_MAX_BACKLOG_SECONDS", "1800")),
+            "batch_max_backlog_seconds": int(os.getenv("ADMISSION_BATCH_MAX_BACKLOG_SECONDS", "14400")),
+            "window_seconds": int(os.getenv("ADMISSION_THROUGHPUT_WINDOW_SECONDS", "900")),
+            "target_drain_seconds": int(os.getenv("AUTOSCALE_TARGET_DRAIN_SECONDS", "900")),
+            "min_workers": int(os.getenv("AUTOSCALE_MIN_WORKERS", "1")),
+            "max_workers": int(os.getenv("AUTOSCALE_MAX_WORKERS", "10"))
+        }
+    
+    @staticmethod
+    def get_monitor_config() -> Dict[str, Any]:
+        """Get queue/worker monitor configuration from environment variables"""
+        return {
+            "enabled": os.getenv("MONITOR_ENABLED", "true").lower() == "true",
+            "interval_seconds": float(os.getenv("MONITOR_INTERVAL_SECONDS", "5")),
+            "inspect_timeout_seconds": float(os.getenv("MONITOR_INSPECT_TIMEOUT_SECONDS", "1"))
+        }
+    
+    @staticmethod
+    def get_task_events_config() -> Dict[str, Any]:
+        """Get task status push channel configuration from environment variables"""
+        return {
+            "max_tasks": int(os.getenv("TASK_EVENTS_MAX_TASKS", "100")),
+            "status_batch_max_tasks": int(os.getenv("TASK_STATUS_BATCH_MAX_TASKS", "100")),
+            "heartbeat_seconds": float(os.getenv("TASK_EVENTS_HEARTBEAT_SECONDS", "15")),
+            "long_poll_timeout_seconds": float(os.getenv("TASK_EVENTS_LONG_POLL_TIMEOUT_SECONDS", "25")),
+            "last_event_ttl_seconds": int(os.getenv("TASK_EVENTS_LAST_EVENT_TTL_SECONDS", "86400"))
+        }
+    
+    @staticmethod
+    def get_executor_config() -> Dict[str, Any]:
+        """Get task executor configuration from environment variables"""
+        return {
+            "backend": os.getenv("EXECUTOR_BACKEND", "celery").lower(),
+            "max_workers": int(os.getenv("EMBEDDED_MAX_WORKERS", "2")),
+            "db_path": os.getenv("EMBEDDED_DB_PATH", "embedded_tasks.db")
+        }
+    
+    @staticmethod
+    def get_worker_config() -> Dict[str, Any]:
+        """Get Celery worker process configuration from environment variables"""
+        pool = os.getenv("WORKER_POOL", "prefork").lower()
+        # Thread and gevent pools spend most of their time waiting on the LLM,
+        # so they default to many more concurrent tasks than prefork processes.
+        # The fair-share scheduler's per-queue caps follow the worker slots the
+        # queue monitor reports, so these slots get work (unless
+        # SCHEDULER_MAX_INFLIGHT pins a lower cap)
+        default_concurrency = "2" if pool == "prefork" else "16"
+        concurrency = int(os.getenv("WORKER_CONCURRENCY", default_concurrency))
+        
+        return {
+            "pool": pool,
+            "queues": os.getenv("WORKER_QUEUES", "analysis,analysis_large,celery"),
+            "concurrency": concurrency,
+            "max_concurrent_crews": int(os.getenv("WORKER_MAX_CONCURRENT_CREWS", str(concurrency))),
+            "max_memory_per_child_mb": int(os.getenv("WORKER_MAX_MEMORY_PER_CHILD_MB", "1536")),
+            "max_tasks_per_child": int(os.getenv("WORKER_MAX_TASKS_PER_CHILD", "500")),
+            "trace_allocations": os.getenv("WORKER_TRACE_ALLOCATIONS", "false").lower() == "true",
+            "prewarm_enabled": os.getenv("WORKER_PREWARM_ENABLED", "true").lower() == "true",
+            "warmup_parse_file": os.getenv("WORKER_WARMUP_PARSE_FILE", "") or None,
+            "progress_min_interval_seconds": float(os.getenv("WORKER_PROGRESS_MIN_INTERVAL_SECONDS", "2")),
+            "progress_min_delta": int(os.getenv("WORKER_PROGRESS_MIN_DELTA", "5"))
         }
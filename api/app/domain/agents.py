@@ -14,16 +14,20 @@ from app.services.tools import (
 )
 
 ### Loading LLM
-llm = LLM(
-    model="openai/gpt-4o-mini",  # Using cheaper model to reduce costs
-    temperature=0.3,  # Lower temperature for more consistent financial analysis
-    max_tokens=1500,  # Reduced to control costs while maintaining quality
-    top_p=0.9,
-    frequency_penalty=0.1,
-    presence_penalty=0.1,
-    stop=["END"],
-    seed=42
-)
+# Kept as plain data so callers can fingerprint the model configuration
+# (e.g. to decide whether two analyses would produce the same result)
+LLM_SETTINGS = {
+    "model": "openai/gpt-4o-mini",  # Using cheaper model to reduce costs
+    "temperature": 0.3,  # Lower temperature for more consistent financial analysis
+    "max_tokens": 1500,  # Reduced to control costs while maintaining quality
+    "top_p": 0.9,
+    "frequency_penalty": 0.1,
+    "presence_penalty": 0.1,
+    "stop": ["END"],
+    "seed": 42
+}
+
+llm = LLM(**LLM_SETTINGS)
 
 # Creating an Experienced Financial Analyst agent
 financial_analyst = Agent(
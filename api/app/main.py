@@ -4,7 +4,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.middleware import create_auth_middleware, create_rate_limit_middleware
 from app.api.routers.auth import router as auth_router
 from app.api.routers.documents import router as documents_router
+from app.api.routers.uploads import router as uploads_router
 from app.api.routers.analysis import router as analysis_router
+from app.api.routers.batches import router as batches_router
 from app.api.routers.reports import router as reports_router
 from app.api.routers.tasks import router as tasks_router
 from app.api.routers.task_mappings import router as task_mappings_router
@@ -34,11 +36,39 @@ def create_app() -> FastAPI:
     # Routers must be added before wrapping with custom middleware
     app.include_router(auth_router)
     app.include_router(documents_router)
+    app.include_router(uploads_router)
     app.include_router(analysis_router)
+    app.include_router(batches_router)
     app.include_router(reports_router)
     app.include_router(tasks_router)
     app.include_router(task_mappings_router)
 
+    # Queue/worker monitor feeding the /tasks monitoring endpoints
+    monitor_config = DatabaseConfig.get_monitor_config()
+    if monitor_config["enabled"]:
+        from app.services.queue_monitor import get_queue_monitor
+
+        @app.on_event("startup")
+        async def start_queue_monitor():
+            get_queue_monitor().start()
+
+        @app.on_event("shutdown")
+        async def stop_queue_monitor():
+            await get_queue_monitor().stop()
+
+    # Single-node mode: analyses run in the API process instead of on Celery workers
+    executor_config = DatabaseConfig.get_executor_config()
+    if executor_config["backend"] == "embedded":
+        from app.services.embedded_executor import get_embedded_executor
+
+        @app.on_event("startup")
+        async def start_embedded_executor():
+            get_embedded_executor().recover()
+
+        @app.on_event("shutdown")
+        async def stop_embedded_executor():
+            get_embedded_executor().shutdown()
+
     # Basic endpoints
     @app.get("/")
     async def root():
@@ -0,0 +1,64 @@
+"""
+Async Model Access
+==================
+
+Awaitable wrappers around the synchronous models, for use in async request
+handlers. The sqlite3 and pymongo repositories block, and calling them from
+an async handler stalls every request on the event loop while a query runs.
+AsyncModel runs each model call in a dedicated, bounded database thread
+pool instead, so the loop keeps serving other requests and the number of
+concurrent database calls stays capped (DB_THREAD_POOL_SIZE).
+
+Both backends go through the same wrapper, so every repository method added
+to the sync interfaces is available to async handlers without a second
+implementation.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Get the thread pool database calls from async handlers run in"""
+    if not hasattr(get_db_executor, '_instance'):
+        from app.config import DatabaseConfig
+        pool_size = DatabaseConfig.get_app_config()["db_thread_pool_size"]
+        get_db_executor._instance = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="db")
+
+    return get_db_executor._instance
+
+
+async def run_in_db_pool(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call (usually database work) in the database thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(func, *args, **kwargs))
+
+
+class AsyncModel:
+    """Exposes a synchronous model's methods as coroutines run in the database pool"""
+
+    def __init__(self, model):
+        self._model = model
+
+    @property
+    def sync(self):
+        """The wrapped synchronous model"""
+        return self._model
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._model, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            return await run_in_db_pool(attribute, *args, **kwargs)
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
@@ -104,11 +104,26 @@ class DocumentRepository(ABC):
         """Create a new document record and return document ID"""
         pass
     
+    @abstractmethod
+    def create_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """Create many document records at once and return their IDs in order"""
+        pass
+    
+    @abstractmethod
+    def get_documents_by_checksums(self, user_id: str, checksums: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get a user's documents with any of the given checksums, keyed by checksum"""
+        pass
+    
     @abstractmethod
     def get_document(self, document_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get document by ID for a specific user"""
         pass
     
+    @abstractmethod
+    def get_document_by_stored_name(self, user_id: str, stored_name: str) -> Optional[Dict[str, Any]]:
+        """Get a user's document by its stored file name"""
+        pass
+    
     @abstractmethod
     def get_user_documents(self, user_id: str, search_query: Optional[str] = None,
                           limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
@@ -124,6 +139,11 @@ class DocumentRepository(ABC):
     def get_documents_count(self, user_id: str) -> int:
         """Get total count of documents for a user"""
         pass
+    
+    @abstractmethod
+    def count_documents_by_path(self, path: str) -> int:
+        """Count the documents (of any user) stored at a path"""
+        pass
 
 
 class AnalysisReportRepository(ABC):
@@ -136,6 +156,11 @@ class AnalysisReportRepository(ABC):
         """Create a new analysis report and return report ID"""
         pass
     
+    @abstractmethod
+    def create_reports(self, reports: List[Dict[str, Any]]) -> List[str]:
+        """Create many analysis reports in one operation and return their IDs in order"""
+        pass
+    
     @abstractmethod
     def get_report(self, report_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get analysis report by ID for a user"""
@@ -172,11 +197,21 @@ class TaskReportMappingRepository(ABC):
         """Create a new task-report mapping and return mapping ID"""
         pass
     
+    @abstractmethod
+    def create_mappings(self, mappings: List[Dict[str, Any]]) -> List[str]:
+        """Create many task-report mappings in one operation and return their IDs in order"""
+        pass
+    
     @abstractmethod
     def get_mapping_by_task_id(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get mapping by task ID"""
         pass
     
+    @abstractmethod
+    def get_mappings_by_task_ids(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the mappings of many tasks in one query, keyed by task ID"""
+        pass
+    
     @abstractmethod
     def get_mapping_by_report_id(self, report_id: str) -> Optional[Dict[str, Any]]:
         """Get mapping by report ID"""
@@ -206,3 +241,28 @@ class TaskReportMappingRepository(ABC):
     def cleanup_old_mappings(self, days_old: int = 30) -> int:
         """Clean up old mappings and return count of cleaned mappings"""
         pass
+    
+    @abstractmethod
+    def reassign_mapping(self, task_id: str, report_id: str, user_id: str) -> bool:
+        """Point a task's mapping at another report (the run was handed to it)"""
+        pass
+    
+    @abstractmethod
+    def create_follower(self, task_id: str, report_id: str, user_id: str, analysis_type: str) -> str:
+        """Record a report coalesced onto another submission's task and return the record ID"""
+        pass
+    
+    @abstractmethod
+    def get_follower_by_report_id(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """Get the follower record of a coalesced report"""
+        pass
+    
+    @abstractmethod
+    def get_user_followers_by_task_ids(self, user_id: str, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get a user's follower records on many tasks in one query, keyed by task ID"""
+        pass
+    
+    @abstractmethod
+    def delete_follower_by_report_id(self, report_id: str) -> bool:
+        """Delete the follower record of a coalesced report"""
+        pass
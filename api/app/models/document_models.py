@@ -1,11 +1,14 @@
 import os
 import hashlib
 import re
-from typing import Optional, Dict, Any, List
+import uuid
+import tempfile
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import logging
 
 from app.models.database import DocumentRepository, AnalysisReportRepository
+from app.services.uploads import StagedUpload
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +16,17 @@ logger = logging.getLogger(__name__)
 class Document:
     """Document model for file management"""
     
-    def __init__(self, document_repo: DocumentRepository):
+    def __init__(self, document_repo: DocumentRepository, blob_store=None):
         self.document_repo = document_repo
+        self._blob_store = blob_store
+    
+    @property
+    def blob_store(self):
+        """Content-addressed store the document files live in"""
+        if self._blob_store is None:
+            from app.services.blob_store import get_blob_store
+            self._blob_store = get_blob_store()
+        return self._blob_store
     
     def create_document(self, user_id: int, original_name: str, file_content: bytes, 
                        upload_path: str = "data/") -> Dict[str, Any]:
@@ -23,55 +35,151 @@ class Document:
             # Ensure upload directory exists
             os.makedirs(upload_path, exist_ok=True)
             
-            # Sanitize filename
-            sanitized_name = self._sanitize_filename(original_name)
-            
-            # Generate unique filename to prevent conflicts
-            base_name, ext = os.path.splitext(sanitized_name)
-            stored_name = f"{base_name}_{user_id}_{hashlib.md5(file_content).hexdigest()[:8]}{ext}"
-            
-            # Full file path
-            file_path = os.path.join(upload_path, stored_name)
-            
-            # Save file
-            with open(file_path, "wb") as f:
+            # Stage the bytes like an upload so they go through the blob store
+            fd, temp_path = tempfile.mkstemp(dir=upload_path, prefix=".upload-", suffix=".part")
+            with os.fdopen(fd, "wb") as f:
                 f.write(file_content)
+            staged_upload = StagedUpload(temp_path, len(file_content),
+                                         hashlib.md5(file_content).hexdigest(),
+                                         hashlib.sha256(file_content).hexdigest())
             
-            # Calculate checksum
-            checksum = hashlib.sha256(file_content).hexdigest()
+            try:
+                return self.create_document_from_upload(user_id, original_name, staged_upload, upload_path)
+            finally:
+                staged_upload.discard()
             
-            # Create database record
-            document_id = self.document_repo.create_document(
-                user_id=user_id,
-                original_name=original_name,
-                stored_name=stored_name,
-                path=file_path,
-                size_bytes=len(file_content),
-                checksum=checksum
-            )
+        except Exception as e:
+            logger.error(f"Error creating document: {str(e)}")
+            raise
+    
+    def create_document_from_upload(self, user_id: int, original_name: str, staged_upload,
+                                    upload_path: str = "data/") -> Dict[str, Any]:
+        """Create a new document record from an upload streamed to a temporary file.
+        
+        The digests were computed while streaming (see app.services.uploads),
+        so the file is only renamed into its blob, never read again. When a
+        blob with the same content exists the upload is dropped and the new
+        record points at the existing blob.
+        """
+        try:
+            stored_name = self._stored_name(original_name, user_id, staged_upload.md5)
+            checksum = staged_upload.sha256
             
-            # Fetch the created document to get full data including timestamps
-            created_doc = self.document_repo.get_document(document_id, user_id)
-            if created_doc:
-                return created_doc
-            else:
-                # Fallback if get_document fails
-                return {
-                    "id": document_id,
-                    "user_id": user_id,
-                    "original_name": original_name,
-                    "stored_name": stored_name,
-                    "path": file_path,
-                    "size_bytes": len(file_content),
-                    "checksum": checksum,
-                    "created_at": datetime.utcnow().isoformat(),
-                    "updated_at": datetime.utcnow().isoformat()
-                }
+            with self.blob_store.lock(checksum):
+                file_path = self.blob_store.put(staged_upload, os.path.splitext(stored_name)[1])
+                try:
+                    return self._register_document(user_id, original_name, stored_name, file_path,
+                                                   staged_upload.size_bytes, checksum)
+                except Exception:
+                    self._release_blob(file_path)
+                    raise
             
         except Exception as e:
             logger.error(f"Error creating document: {str(e)}")
             raise
     
+    def create_documents_from_uploads(self, user_id: int, uploads: List[Tuple[str, Any]],
+                                      upload_path: str = "data/") -> List[Dict[str, Any]]:
+        """Create document records for many staged uploads with one repository call.
+        
+        uploads is a list of (original_name, staged_upload) pairs. The files
+        are moved into their blobs first, and blobs left without a reference
+        are removed again if the batch insert fails.
+        """
+        try:
+            records = []
+            with self.blob_store.lock(*[staged_upload.sha256 for _, staged_upload in uploads]):
+                try:
+                    for original_name, staged_upload in uploads:
+                        stored_name = self._stored_name(original_name, user_id, staged_upload.md5)
+                        records.append({
+                            "user_id": user_id,
+                            "original_name": original_name,
+                            "stored_name": stored_name,
+                            "path": self.blob_store.put(staged_upload, os.path.splitext(stored_name)[1]),
+                            "size_bytes": staged_upload.size_bytes,
+                            "checksum": staged_upload.sha256
+                        })
+                    document_ids = self.document_repo.create_documents(records)
+                except Exception:
+                    for path in {record["path"] for record in records}:
+                        self._release_blob(path)
+                    raise
+            
+            now = datetime.utcnow().isoformat()
+            for document_id, record in zip(document_ids, records):
+                record.update({"id": document_id, "created_at": now, "updated_at": now})
+            return records
+            
+        except Exception as e:
+            logger.error(f"Error creating documents: {str(e)}")
+            raise
+    
+    def get_documents_by_checksums(self, user_id: int, checksums: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get a user's documents with any of the given checksums, keyed by checksum"""
+        try:
+            return self.document_repo.get_documents_by_checksums(user_id, checksums)
+        except Exception as e:
+            logger.error(f"Error getting documents by checksum: {str(e)}")
+            raise
+    
+    def _release_blob(self, file_path: str) -> None:
+        """Remove a blob no document refers to any more; call with its lock held"""
+        try:
+            if self.document_repo.count_documents_by_path(file_path) == 0:
+                self.blob_store.remove(file_path)
+                self._delete_stored_object(file_path)
+        except Exception as e:
+            logger.warning(f"Could not release blob {file_path}: {str(e)}")
+    
+    def _delete_stored_object(self, file_path: str) -> None:
+        """Delete the copy of a released blob kept in the workers' object storage"""
+        from app.services.storage import delete_for_workers
+        try:
+            delete_for_workers(file_path)
+        except Exception as e:
+            logger.warning(f"Could not delete stored object for {file_path}: {str(e)}")
+    
+    def _stored_name(self, original_name: str, user_id: int, md5_hex: str) -> str:
+        """Build the unique stored file name for an upload"""
+        # Sanitize filename
+        sanitized_name = self._sanitize_filename(original_name)
+        
+        # Generate unique filename to prevent conflicts
+        base_name, ext = os.path.splitext(sanitized_name)
+        return f"{base_name}_{user_id}_{md5_hex[:8]}{ext}"
+    
+    def _register_document(self, user_id: int, original_name: str, stored_name: str, file_path: str,
+                           size_bytes: int, checksum: str) -> Dict[str, Any]:
+        """Create the database record for a stored file and return the document"""
+        # Create database record
+        document_id = self.document_repo.create_document(
+            user_id=user_id,
+            original_name=original_name,
+            stored_name=stored_name,
+            path=file_path,
+            size_bytes=size_bytes,
+            checksum=checksum
+        )
+        
+        # Fetch the created document to get full data including timestamps
+        created_doc = self.document_repo.get_document(document_id, user_id)
+        if created_doc:
+            return created_doc
+        else:
+            # Fallback if get_document fails
+            return {
+                "id": document_id,
+                "user_id": user_id,
+                "original_name": original_name,
+                "stored_name": stored_name,
+                "path": file_path,
+                "size_bytes": size_bytes,
+                "checksum": checksum,
+                "created_at": datetime.utcnow().isoformat(),
+                "updated_at": datetime.utcnow().isoformat()
+            }
+    
     def get_document(self, document_id: int, user_id: int) -> Optional[Dict[str, Any]]:
         """Get document by ID for a user"""
         try:
@@ -80,6 +188,14 @@ class Document:
             logger.error(f"Error getting document: {str(e)}")
             raise
     
+    def get_document_by_stored_name(self, user_id: int, stored_name: str) -> Optional[Dict[str, Any]]:
+        """Get a user's document by its stored file name"""
+        try:
+            return self.document_repo.get_document_by_stored_name(user_id, stored_name)
+        except Exception as e:
+            logger.error(f"Error getting document by stored name: {str(e)}")
+            raise
+    
     def get_user_documents(self, user_id: int, search_query: Optional[str] = None,
                           limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get documents for a user with optional search"""
@@ -97,15 +213,22 @@ class Document:
             if not document_data:
                 return False
             
-            # Delete file if it exists
-            if os.path.exists(document_data['path']):
-                try:
-                    os.remove(document_data['path'])
-                except Exception as e:
-                    logger.warning(f"Could not delete file {document_data['path']}: {str(e)}")
+            file_path = document_data['path']
+            if not self.blob_store.contains(file_path):
+                # Stored before the blob store: the file belongs to this document alone
+                if os.path.exists(file_path):
+                    try:
+                        os.remove(file_path)
+                    except Exception as e:
+                        logger.warning(f"Could not delete file {file_path}: {str(e)}")
+                return self.document_repo.delete_document(document_id, user_id)
             
-            # Delete from database
-            return self.document_repo.delete_document(document_id, user_id)
+            # The blob goes only with its last reference
+            with self.blob_store.lock(document_data['checksum']):
+                deleted = self.document_repo.delete_document(document_id, user_id)
+                if deleted:
+                    self._release_blob(file_path)
+                return deleted
         except Exception as e:
             logger.error(f"Error deleting document: {str(e)}")
             raise
@@ -202,6 +325,49 @@ class AnalysisReport:
             logger.error(f"Error creating analysis report: {str(e)}")
             raise
     
+    def create_pending_reports(self, user_id: int, entries: List[Dict[str, Any]],
+                               output_dir: str = "outputs") -> List[str]:
+        """Create placeholder report files and pending report records in one repository call.
+        
+        Each entry needs analysis_type, query, file_name and optionally
+        document_id and summary. Returns report IDs in entry order.
+        """
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            
+            reports = []
+            for entry in entries:
+                # Many reports share the same second, so add a short unique suffix
+                report_filename = f"{entry['analysis_type']}_{user_id}_{timestamp}_{uuid.uuid4().hex[:8]}.md"
+                report_path = os.path.join(output_dir, report_filename)
+                summary = entry.get("summary") or "Analysis queued..."
+                
+                with open(report_path, "w", encoding="utf-8") as f:
+                    f.write(f"# {entry['analysis_type'].title()} Analysis Report\n\n")
+                    f.write(f"**Query:** {entry['query']}\n\n")
+                    f.write(f"**Original File:** {entry['file_name']}\n\n")
+                    f.write(f"**Generated:** {datetime.now().isoformat()}\n\n")
+                    f.write("---\n\n")
+                    f.write(summary)
+                
+                reports.append({
+                    "user_id": user_id,
+                    "analysis_type": entry["analysis_type"],
+                    "query": entry["query"],
+                    "file_name": entry["file_name"],
+                    "report_path": report_path,
+                    "document_id": entry.get("document_id"),
+                    "summary": summary,
+                    "status": "pending"
+                })
+            
+            return self.report_repo.create_reports(reports)
+            
+        except Exception as e:
+            logger.error(f"Error creating pending analysis reports: {str(e)}")
+            raise
+    
     def get_report(self, report_id: int, user_id: int) -> Optional[Dict[str, Any]]:
         """Get analysis report by ID for a user"""
         try:
@@ -12,6 +12,7 @@ from app.models.mongodb_sync_db import (
 )
 from app.models.auth_models import User, Session
 from app.models.document_models import Document, AnalysisReport
+from app.models.async_models import AsyncModel
 from app.models.task_report_mapping_models import TaskReportMapping
 
 logger = logging.getLogger(__name__)
@@ -160,3 +161,29 @@ def get_analysis_report_model() -> AnalysisReport:
 def get_task_report_mapping_model() -> TaskReportMapping:
     """Get task-report mapping model instance"""
     return get_model_manager().get_task_report_mapping_model()
+
+
+# Awaitable models for async request handlers (see app.models.async_models)
+def get_async_user_model() -> AsyncModel:
+    """Get user model whose methods run in the database thread pool"""
+    return AsyncModel(get_user_model())
+
+
+def get_async_session_model() -> AsyncModel:
+    """Get session model whose methods run in the database thread pool"""
+    return AsyncModel(get_session_model())
+
+
+def get_async_document_model() -> AsyncModel:
+    """Get document model whose methods run in the database thread pool"""
+    return AsyncModel(get_document_model())
+
+
+def get_async_analysis_report_model() -> AsyncModel:
+    """Get analysis report model whose methods run in the database thread pool"""
+    return AsyncModel(get_analysis_report_model())
+
+
+def get_async_task_report_mapping_model() -> AsyncModel:
+    """Get task-report mapping model whose methods run in the database thread pool"""
+    return AsyncModel(get_task_report_mapping_model())
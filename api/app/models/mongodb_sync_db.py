@@ -79,6 +79,9 @@ class MongoDBDatabase(DatabaseInterface):
             self.db.documents.create_index("user_id")
             self.db.documents.create_index("original_name")
             self.db.documents.create_index("stored_name", unique=True)
+            self.db.documents.create_index([("user_id", 1), ("stored_name", 1)])
+            self.db.documents.create_index([("user_id", 1), ("checksum", 1)])
+            self.db.documents.create_index("path")
             
             # Analysis reports collection indexes
             self.db.analysis_reports.create_index("user_id")
@@ -93,6 +96,11 @@ class MongoDBDatabase(DatabaseInterface):
             self.db.task_report_mappings.create_index("analysis_type")
             self.db.task_report_mappings.create_index("created_at")
             
+            # Task followers (reports coalesced onto another submission's task) indexes
+            self.db.task_followers.create_index("report_id", unique=True)
+            self.db.task_followers.create_index([("user_id", 1), ("task_id", 1)])
+            self.db.task_followers.create_index("created_at")
+            
             logger.info("Database indexes created successfully")
             
         except Exception as e:
@@ -343,6 +351,46 @@ class MongoDBDocumentRepository(DocumentRepository):
             logger.error(f"Error creating document: {str(e)}")
             raise
     
+    def create_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """Create many document records with a single insert_many"""
+        try:
+            now = datetime.utcnow()
+            document_docs = [
+                {
+                    "user_id": str(document["user_id"]),
+                    "original_name": document["original_name"],
+                    "stored_name": document["stored_name"],
+                    "path": document["path"],
+                    "size_bytes": document["size_bytes"],
+                    "checksum": document.get("checksum"),
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for document in documents
+            ]
+            result = self.db.db.documents.insert_many(document_docs, ordered=True)
+            return [str(inserted_id) for inserted_id in result.inserted_ids]
+        except Exception as e:
+            logger.error(f"Error creating documents: {str(e)}")
+            raise
+    
+    def get_documents_by_checksums(self, user_id: str, checksums: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get a user's documents with any of the given checksums, keyed by checksum"""
+        try:
+            if not checksums:
+                return {}
+            documents = {}
+            cursor = self.db.db.documents.find({
+                "user_id": str(user_id),
+                "checksum": {"$in": list(checksums)}
+            }).sort("created_at", 1)
+            for document_doc in cursor:
+                documents.setdefault(document_doc["checksum"], self._convert_document_doc(document_doc))
+            return documents
+        except Exception as e:
+            logger.error(f"Error getting documents by checksum: {str(e)}")
+            raise
+    
     def get_document(self, document_id: int, user_id: int) -> Optional[Dict[str, Any]]:
         """Get document by ID for a specific user"""
         try:
@@ -357,6 +405,20 @@ class MongoDBDocumentRepository(DocumentRepository):
             logger.error(f"Error getting document: {str(e)}")
             raise
     
+    def get_document_by_stored_name(self, user_id: int, stored_name: str) -> Optional[Dict[str, Any]]:
+        """Get a user's document by its stored file name"""
+        try:
+            document_doc = self.db.db.documents.find_one({
+                "user_id": str(user_id),
+                "stored_name": stored_name
+            })
+            if document_doc:
+                return self._convert_document_doc(document_doc)
+            return None
+        except Exception as e:
+            logger.error(f"Error getting document by stored name: {str(e)}")
+            raise
+    
     def get_user_documents(self, user_id: str, search_query: Optional[str] = None,
                           limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get documents for a user with optional search"""
@@ -392,6 +454,14 @@ class MongoDBDocumentRepository(DocumentRepository):
             logger.error(f"Error getting documents count: {str(e)}")
             raise
     
+    def count_documents_by_path(self, path: str) -> int:
+        """Count the documents (of any user) stored at a path"""
+        try:
+            return self.db.db.documents.count_documents({"path": path})
+        except Exception as e:
+            logger.error(f"Error counting documents by path: {str(e)}")
+            raise
+    
     def _convert_document_doc(self, document_doc: Dict[str, Any]) -> Dict[str, Any]:
         """Convert MongoDB document to document dict"""
         return {
@@ -436,6 +506,31 @@ class MongoDBAnalysisReportRepository(AnalysisReportRepository):
             logger.error(f"Error creating analysis report: {str(e)}")
             raise
     
+    def create_reports(self, reports: List[Dict[str, Any]]) -> List[str]:
+        """Create many analysis reports with a single insert_many"""
+        try:
+            now = datetime.utcnow()
+            report_docs = [
+                {
+                    "user_id": str(report["user_id"]),
+                    "analysis_type": report["analysis_type"],
+                    "query": report["query"],
+                    "file_name": report["file_name"],
+                    "report_path": report["report_path"],
+                    "document_id": str(report["document_id"]) if report.get("document_id") else None,
+                    "summary": report.get("summary"),
+                    "status": report.get("status", "completed"),
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for report in reports
+            ]
+            result = self.db.db.analysis_reports.insert_many(report_docs, ordered=True)
+            return [str(inserted_id) for inserted_id in result.inserted_ids]
+        except Exception as e:
+            logger.error(f"Error creating analysis reports: {str(e)}")
+            raise
+    
     def get_report(self, report_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get analysis report by ID for a user"""
         try:
@@ -548,6 +643,27 @@ class MongoDBTaskReportMappingRepository(TaskReportMappingRepository):
             logger.error(f"Error creating task-report mapping: {str(e)}")
             raise
     
+    def create_mappings(self, mappings: List[Dict[str, Any]]) -> List[str]:
+        """Create many task-report mappings with a single insert_many"""
+        try:
+            now = datetime.utcnow()
+            mapping_docs = [
+                {
+                    "task_id": mapping["task_id"],
+                    "report_id": str(mapping["report_id"]),
+                    "user_id": str(mapping["user_id"]),
+                    "analysis_type": mapping["analysis_type"],
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for mapping in mappings
+            ]
+            result = self.db.db.task_report_mappings.insert_many(mapping_docs, ordered=True)
+            return [str(inserted_id) for inserted_id in result.inserted_ids]
+        except Exception as e:
+            logger.error(f"Error creating task-report mappings: {str(e)}")
+            raise
+    
     def get_mapping_by_task_id(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get mapping by task ID"""
         try:
@@ -559,6 +675,20 @@ class MongoDBTaskReportMappingRepository(TaskReportMappingRepository):
             logger.error(f"Error getting mapping by task ID: {str(e)}")
             raise
     
+    def get_mappings_by_task_ids(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the mappings of many tasks in one query, keyed by task ID"""
+        try:
+            if not task_ids:
+                return {}
+            cursor = self.db.db.task_report_mappings.find({"task_id": {"$in": list(task_ids)}})
+            return {
+                mapping_doc["task_id"]: self._convert_mapping_doc(mapping_doc)
+                for mapping_doc in cursor
+            }
+        except Exception as e:
+            logger.error(f"Error getting mappings by task IDs: {str(e)}")
+            raise
+    
     def get_mapping_by_report_id(self, report_id: str) -> Optional[Dict[str, Any]]:
         """Get mapping by report ID"""
         try:
@@ -615,11 +745,79 @@ class MongoDBTaskReportMappingRepository(TaskReportMappingRepository):
             from datetime import timedelta
             cutoff_date = datetime.utcnow() - timedelta(days=days_old)
             result = self.db.db.task_report_mappings.delete_many({"created_at": {"$lt": cutoff_date}})
-            return result.deleted_count
+            followers_result = self.db.db.task_followers.delete_many({"created_at": {"$lt": cutoff_date}})
+            return result.deleted_count + followers_result.deleted_count
         except Exception as e:
             logger.error(f"Error cleaning up old mappings: {str(e)}")
             raise
     
+    def reassign_mapping(self, task_id: str, report_id: str, user_id: str) -> bool:
+        """Point a task's mapping at another report (the run was handed to it)"""
+        try:
+            result = self.db.db.task_report_mappings.update_one(
+                {"task_id": task_id},
+                {"$set": {"report_id": str(report_id), "user_id": str(user_id), "updated_at": datetime.utcnow()}}
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            logger.error(f"Error reassigning mapping: {str(e)}")
+            raise
+    
+    def create_follower(self, task_id: str, report_id: str, user_id: str, analysis_type: str) -> str:
+        """Record a report coalesced onto another submission's task and return the record ID"""
+        try:
+            follower_doc = {
+                "task_id": task_id,
+                "report_id": str(report_id),
+                "user_id": str(user_id),
+                "analysis_type": analysis_type,
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }
+            
+            result = self.db.db.task_followers.insert_one(follower_doc)
+            return str(result.inserted_id)
+        except Exception as e:
+            logger.error(f"Error creating task follower: {str(e)}")
+            raise
+    
+    def get_follower_by_report_id(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """Get the follower record of a coalesced report"""
+        try:
+            follower_doc = self.db.db.task_followers.find_one({"report_id": str(report_id)})
+            if follower_doc:
+                return self._convert_mapping_doc(follower_doc)
+            return None
+        except Exception as e:
+            logger.error(f"Error getting follower by report ID: {str(e)}")
+            raise
+    
+    def get_user_followers_by_task_ids(self, user_id: str, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get a user's follower records on many tasks in one query, keyed by task ID"""
+        try:
+            if not task_ids:
+                return {}
+            cursor = self.db.db.task_followers.find(
+                {"user_id": str(user_id), "task_id": {"$in": list(task_ids)}}
+            ).sort("created_at", 1)
+            # A user with several reports on one task gets the latest
+            return {
+                follower_doc["task_id"]: self._convert_mapping_doc(follower_doc)
+                for follower_doc in cursor
+            }
+        except Exception as e:
+            logger.error(f"Error getting followers by task IDs: {str(e)}")
+            raise
+    
+    def delete_follower_by_report_id(self, report_id: str) -> bool:
+        """Delete the follower record of a coalesced report"""
+        try:
+            result = self.db.db.task_followers.delete_one({"report_id": str(report_id)})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error(f"Error deleting follower by report ID: {str(e)}")
+            raise
+    
     def _convert_mapping_doc(self, mapping_doc: Dict[str, Any]) -> Dict[str, Any]:
         """Convert MongoDB document to standard format"""
         return {
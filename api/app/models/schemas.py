@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict, Any
 from datetime import datetime
 from enum import Enum
 
@@ -10,6 +10,7 @@ class ReportStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 # User Schemas
@@ -219,6 +220,85 @@ class AnalysisResponse(BaseModel):
     report_download_url: str
 
 
+# Batch Analysis Schemas
+class BatchAnalysisRequest(BaseModel):
+    document_ids: List[str] = Field(..., min_length=1, description="Documents to analyze")
+    analysis_types: List[str] = Field(default_factory=lambda: ["comprehensive"], min_length=1, description="Analysis types to run for every document")
+    query: Optional[str] = Field(None, description="Query for every analysis; defaults per analysis type when omitted")
+
+
+class BatchAnalysisJob(BaseModel):
+    task_id: str
+    report_id: str
+    document_id: str
+    analysis_type: str
+    status: Optional[str] = None
+    progress: Optional[int] = None
+
+
+class BatchAnalysisResponse(BaseModel):
+    batch_id: str
+    status: str
+    total_jobs: int
+    jobs: List[BatchAnalysisJob]
+    batch_status_url: str
+    eta_seconds: Optional[float] = None
+
+
+class BatchAnalysisStatusResponse(BaseModel):
+    batch_id: str
+    status: str
+    total_jobs: int
+    progress: int
+    counts: dict
+    jobs: List[BatchAnalysisJob]
+    summary: Optional[dict] = None
+    created_at: str
+
+
+# Resumable Upload Schemas
+class UploadSessionRequest(BaseModel):
+    filename: str = Field(..., min_length=1)
+    size_bytes: int = Field(..., gt=0, description="Total size of the file")
+    sha256: Optional[str] = Field(None, description="Expected SHA-256; may instead be given on completion")
+    name: Optional[str] = Field(None, description="Document name; defaults to the filename")
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    size_bytes: int
+    chunk_bytes: int
+    received_bytes: int
+    received_ranges: List[List[int]]
+    missing_ranges: List[List[int]]
+    expires_at: float
+    upload_url: str
+
+
+class UploadCompleteRequest(BaseModel):
+    sha256: Optional[str] = None
+
+
+# Bulk Upload Schemas
+class BulkUploadItem(BaseModel):
+    name: str
+    status: str = Field(..., description="created, duplicate or failed")
+    document_id: Optional[str] = Field(None, description="New document, or the existing one for duplicates")
+    size_bytes: Optional[int] = None
+    checksum: Optional[str] = None
+    pages: Optional[int] = None
+    download_url: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkUploadResponse(BaseModel):
+    created: int
+    duplicates: int
+    failed: int
+    items: List[BulkUploadItem]
+
+
 # Statistics Schemas
 class UserStatsResponse(BaseModel):
     total_documents: int
@@ -281,3 +361,14 @@ class TaskReportMappingListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+
+
+# Task Status Schemas
+class TaskStatusBatchRequest(BaseModel):
+    task_ids: List[str] = Field(..., min_length=1, description="Tasks to get the status of")
+    include_eta: bool = Field(False, description="Estimate ETAs of pending and running tasks (extra queue lookups per task)")
+
+
+class TaskStatusBatchResponse(BaseModel):
+    tasks: List[Dict[str, Any]] = Field(..., description="Status of each of the user's tasks, in request order")
+    not_found: List[str] = Field(default_factory=list, description="Tasks that do not exist or belong to another user")
@@ -91,6 +91,11 @@ class SQLiteDatabase(DatabaseInterface):
                     """
                 )
                 
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_documents_user_checksum ON documents (user_id, checksum)"
+                )
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_path ON documents (path)")
+                
                 # Create analysis_reports table
                 cursor.execute(
                     """
@@ -129,6 +134,27 @@ class SQLiteDatabase(DatabaseInterface):
                     """
                 )
                 
+                # Reports coalesced onto another submission's task (task_id is
+                # unique in task_report_mappings, so they are kept apart)
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS task_followers (
+                        id TEXT PRIMARY KEY,
+                        task_id TEXT NOT NULL,
+                        report_id TEXT NOT NULL UNIQUE,
+                        user_id TEXT NOT NULL,
+                        analysis_type TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (user_id) REFERENCES users (id),
+                        FOREIGN KEY (report_id) REFERENCES analysis_reports (id)
+                    )
+                    """
+                )
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_task_followers_user_task ON task_followers (user_id, task_id)"
+                )
+                
                 conn.commit()
                 logger.info("SQLite database initialized successfully")
                 
@@ -492,6 +518,62 @@ class SQLiteDocumentRepository(DocumentRepository):
             logger.error(f"Error creating document: {str(e)}")
             raise
     
+    def create_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """Create many document records in one transaction and return their IDs in order"""
+        try:
+            document_ids = [str(uuid.uuid4()) for _ in documents]
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    """
+                    INSERT INTO documents (id, user_id, original_name, stored_name, path, size_bytes, checksum)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (
+                            document_id, document["user_id"], document["original_name"], document["stored_name"],
+                            document["path"], document["size_bytes"], document.get("checksum")
+                        )
+                        for document_id, document in zip(document_ids, documents)
+                    ]
+                )
+                conn.commit()
+                return document_ids
+        except Exception as e:
+            logger.error(f"Error creating documents: {str(e)}")
+            raise
+    
+    def get_documents_by_checksums(self, user_id: str, checksums: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get a user's documents with any of the given checksums, keyed by checksum"""
+        try:
+            if not checksums:
+                return {}
+            placeholders = ", ".join("?" for _ in checksums)
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT id, user_id, original_name, stored_name, path, size_bytes, checksum, created_at, updated_at FROM documents WHERE user_id = ? AND checksum IN ({placeholders}) ORDER BY created_at",
+                    (user_id, *checksums)
+                )
+                documents = {}
+                for row in cursor.fetchall():
+                    # The oldest copy wins when a checksum was stored more than once
+                    documents.setdefault(row[6], {
+                        "id": row[0],
+                        "user_id": row[1],
+                        "original_name": row[2],
+                        "stored_name": row[3],
+                        "path": row[4],
+                        "size_bytes": row[5],
+                        "checksum": row[6],
+                        "created_at": row[7],
+                        "updated_at": row[8]
+                    })
+                return documents
+        except Exception as e:
+            logger.error(f"Error getting documents by checksum: {str(e)}")
+            raise
+    
     def get_document(self, document_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get document by ID for a specific user"""
         try:
@@ -519,6 +601,33 @@ class SQLiteDocumentRepository(DocumentRepository):
             logger.error(f"Error getting document: {str(e)}")
             raise
     
+    def get_document_by_stored_name(self, user_id: str, stored_name: str) -> Optional[Dict[str, Any]]:
+        """Get a user's document by its stored file name (uses the UNIQUE(user_id, stored_name) index)"""
+        try:
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id, user_id, original_name, stored_name, path, size_bytes, checksum, created_at, updated_at FROM documents WHERE user_id = ? AND stored_name = ?",
+                    (user_id, stored_name)
+                )
+                row = cursor.fetchone()
+                if row:
+                    return {
+                        "id": row[0],
+                        "user_id": row[1],
+                        "original_name": row[2],
+                        "stored_name": row[3],
+                        "path": row[4],
+                        "size_bytes": row[5],
+                        "checksum": row[6],
+                        "created_at": row[7],
+                        "updated_at": row[8]
+                    }
+                return None
+        except Exception as e:
+            logger.error(f"Error getting document by stored name: {str(e)}")
+            raise
+    
     def get_user_documents(self, user_id: str, search_query: Optional[str] = None,
                           limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get documents for a user with optional search"""
@@ -584,6 +693,17 @@ class SQLiteDocumentRepository(DocumentRepository):
         except Exception as e:
             logger.error(f"Error getting documents count: {str(e)}")
             raise
+    
+    def count_documents_by_path(self, path: str) -> int:
+        """Count the documents (of any user) stored at a path"""
+        try:
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM documents WHERE path = ?", (path,))
+                return cursor.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error counting documents by path: {str(e)}")
+            raise
 
 
 class SQLiteAnalysisReportRepository(AnalysisReportRepository):
@@ -614,6 +734,33 @@ class SQLiteAnalysisReportRepository(AnalysisReportRepository):
             logger.error(f"Error creating analysis report: {str(e)}")
             raise
     
+    def create_reports(self, reports: List[Dict[str, Any]]) -> List[str]:
+        """Create many analysis reports in one transaction and return their IDs in order"""
+        try:
+            report_ids = [str(uuid.uuid4()) for _ in reports]
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    """
+                    INSERT INTO analysis_reports 
+                    (id, user_id, document_id, analysis_type, query, file_name, report_path, status, summary)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (
+                            report_id, report["user_id"], report.get("document_id"), report["analysis_type"],
+                            report["query"], report["file_name"], report["report_path"],
+                            report.get("status", "completed"), report.get("summary")
+                        )
+                        for report_id, report in zip(report_ids, reports)
+                    ]
+                )
+                conn.commit()
+                return report_ids
+        except Exception as e:
+            logger.error(f"Error creating analysis reports: {str(e)}")
+            raise
+    
     def get_report(self, report_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get analysis report by ID for a user"""
         try:
@@ -713,7 +860,7 @@ class SQLiteAnalysisReportRepository(AnalysisReportRepository):
             set_clauses = []
             values = []
             for key, value in kwargs.items():
-                if key in ['summary', 'status']:
+                if key in ['summary', 'status', 'report_path']:
                     set_clauses.append(f"{key} = ?")
                     values.append(value)
             
@@ -799,6 +946,29 @@ class SQLiteTaskReportMappingRepository(TaskReportMappingRepository):
             logger.error(f"Error creating task-report mapping: {str(e)}")
             raise
     
+    def create_mappings(self, mappings: List[Dict[str, Any]]) -> List[str]:
+        """Create many task-report mappings in one transaction and return their IDs in order"""
+        try:
+            mapping_ids = [str(uuid.uuid4()) for _ in mappings]
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    """
+                    INSERT INTO task_report_mappings 
+                    (id, task_id, report_id, user_id, analysis_type)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (mapping_id, mapping["task_id"], mapping["report_id"], mapping["user_id"], mapping["analysis_type"])
+                        for mapping_id, mapping in zip(mapping_ids, mappings)
+                    ]
+                )
+                conn.commit()
+                return mapping_ids
+        except Exception as e:
+            logger.error(f"Error creating task-report mappings: {str(e)}")
+            raise
+    
     def get_mapping_by_task_id(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get mapping by task ID"""
         try:
@@ -828,6 +998,38 @@ class SQLiteTaskReportMappingRepository(TaskReportMappingRepository):
             logger.error(f"Error getting mapping by task ID: {str(e)}")
             raise
     
+    def get_mappings_by_task_ids(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the mappings of many tasks in one query, keyed by task ID"""
+        try:
+            if not task_ids:
+                return {}
+            placeholders = ", ".join("?" for _ in task_ids)
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"""
+                    SELECT id, task_id, report_id, user_id, analysis_type, created_at, updated_at
+                    FROM task_report_mappings 
+                    WHERE task_id IN ({placeholders})
+                    """,
+                    list(task_ids)
+                )
+                return {
+                    row[1]: {
+                        "id": row[0],
+                        "task_id": row[1],
+                        "report_id": row[2],
+                        "user_id": row[3],
+                        "analysis_type": row[4],
+                        "created_at": row[5],
+                        "updated_at": row[6]
+                    }
+                    for row in cursor.fetchall()
+                }
+        except Exception as e:
+            logger.error(f"Error getting mappings by task IDs: {str(e)}")
+            raise
+    
     def get_mapping_by_report_id(self, report_id: str) -> Optional[Dict[str, Any]]:
         """Get mapping by report ID"""
         try:
@@ -945,8 +1147,132 @@ class SQLiteTaskReportMappingRepository(TaskReportMappingRepository):
                     WHERE created_at < datetime('now', '-{} days')
                     """.format(days_old)
                 )
+                cleaned_count = cursor.rowcount
+                cursor.execute(
+                    """
+                    DELETE FROM task_followers 
+                    WHERE created_at < datetime('now', '-{} days')
+                    """.format(days_old)
+                )
                 conn.commit()
-                return cursor.rowcount
+                return cleaned_count + cursor.rowcount
         except Exception as e:
             logger.error(f"Error cleaning up old mappings: {str(e)}")
             raise
+    
+    def reassign_mapping(self, task_id: str, report_id: str, user_id: str) -> bool:
+        """Point a task's mapping at another report (the run was handed to it)"""
+        try:
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    UPDATE task_report_mappings 
+                    SET report_id = ?, user_id = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE task_id = ?
+                    """,
+                    (report_id, user_id, task_id)
+                )
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error reassigning mapping: {str(e)}")
+            raise
+    
+    def create_follower(self, task_id: str, report_id: str, user_id: str, analysis_type: str) -> str:
+        """Record a report coalesced onto another submission's task and return the record ID"""
+        try:
+            follower_id = str(uuid.uuid4())
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    INSERT INTO task_followers 
+                    (id, task_id, report_id, user_id, analysis_type)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (follower_id, task_id, report_id, user_id, analysis_type)
+                )
+                conn.commit()
+                return follower_id
+        except Exception as e:
+            logger.error(f"Error creating task follower: {str(e)}")
+            raise
+    
+    def get_follower_by_report_id(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """Get the follower record of a coalesced report"""
+        try:
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT id, task_id, report_id, user_id, analysis_type, created_at, updated_at
+                    FROM task_followers 
+                    WHERE report_id = ?
+                    """,
+                    (report_id,)
+                )
+                row = cursor.fetchone()
+                if row:
+                    return {
+                        "id": row[0],
+                        "task_id": row[1],
+                        "report_id": row[2],
+                        "user_id": row[3],
+                        "analysis_type": row[4],
+                        "created_at": row[5],
+                        "updated_at": row[6]
+                    }
+                return None
+        except Exception as e:
+            logger.error(f"Error getting follower by report ID: {str(e)}")
+            raise
+    
+    def get_user_followers_by_task_ids(self, user_id: str, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get a user's follower records on many tasks in one query, keyed by task ID"""
+        try:
+            if not task_ids:
+                return {}
+            placeholders = ", ".join("?" for _ in task_ids)
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"""
+                    SELECT id, task_id, report_id, user_id, analysis_type, created_at, updated_at
+                    FROM task_followers 
+                    WHERE user_id = ? AND task_id IN ({placeholders})
+                    ORDER BY created_at
+                    """,
+                    [user_id] + list(task_ids)
+                )
+                # A user with several reports on one task gets the latest
+                return {
+                    row[1]: {
+                        "id": row[0],
+                        "task_id": row[1],
+                        "report_id": row[2],
+                        "user_id": row[3],
+                        "analysis_type": row[4],
+                        "created_at": row[5],
+                        "updated_at": row[6]
+                    }
+                    for row in cursor.fetchall()
+                }
+        except Exception as e:
+            logger.error(f"Error getting followers by task IDs: {str(e)}")
+            raise
+    
+    def delete_follower_by_report_id(self, report_id: str) -> bool:
+        """Delete the follower record of a coalesced report"""
+        try:
+            with sqlite3.connect(self.db.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "DELETE FROM task_followers WHERE report_id = ?",
+                    (report_id,)
+                )
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error deleting follower by report ID: {str(e)}")
+            raise
@@ -43,6 +43,16 @@ class TaskReportMapping:
             logger.error(f"Error creating task-report mapping: {str(e)}")
             raise
     
+    def create_mappings(self, mappings: List[Dict[str, Any]]) -> List[str]:
+        """Create many task-report mappings in one repository call"""
+        try:
+            if not mappings:
+                return []
+            return self.mapping_repo.create_mappings(mappings)
+        except Exception as e:
+            logger.error(f"Error creating task-report mappings: {str(e)}")
+            raise
+    
     def get_mapping_by_task_id(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get mapping by task ID"""
         try:
@@ -51,10 +61,72 @@ class TaskReportMapping:
             logger.error(f"Error getting mapping by task ID: {str(e)}")
             raise
     
+    def get_mappings_by_task_ids(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the mappings of many tasks in one query, keyed by task ID"""
+        try:
+            return self.mapping_repo.get_mappings_by_task_ids(task_ids)
+        except Exception as e:
+            logger.error(f"Error getting mappings by task IDs: {str(e)}")
+            raise
+    
+    def get_user_task_mappings(self, user_id: str, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the tasks a user may follow, keyed by task ID.
+        
+        Covers the user's own tasks and tasks the user's coalesced reports
+        are waiting on; for the latter the mapping names the user's report.
+        """
+        try:
+            if not task_ids:
+                return {}
+            mappings = {
+                task_id: mapping
+                for task_id, mapping in self.mapping_repo.get_mappings_by_task_ids(task_ids).items()
+                if str(mapping["user_id"]) == str(user_id)
+            }
+            others = [task_id for task_id in task_ids if task_id not in mappings]
+            if others:
+                mappings.update(self.mapping_repo.get_user_followers_by_task_ids(user_id, others))
+            return mappings
+        except Exception as e:
+            logger.error(f"Error getting user task mappings: {str(e)}")
+            raise
+    
+    def create_follower(self, task_id: str, report_id: str, user_id: str, analysis_type: str) -> str:
+        """Record a report coalesced onto another submission's task"""
+        try:
+            return self.mapping_repo.create_follower(
+                task_id=task_id,
+                report_id=report_id,
+                user_id=user_id,
+                analysis_type=analysis_type
+            )
+        except Exception as e:
+            logger.error(f"Error creating task follower: {str(e)}")
+            raise
+    
+    def hand_over_task(self, task_id: str, report_id: str, user_id: str) -> bool:
+        """Make a follower's report the one a task is mapped to, after its owner left the run"""
+        try:
+            reassigned = self.mapping_repo.reassign_mapping(task_id, report_id, user_id)
+            self.mapping_repo.delete_follower_by_report_id(report_id)
+            return reassigned
+        except Exception as e:
+            logger.error(f"Error handing over task {task_id}: {str(e)}")
+            raise
+    
+    def delete_follower_by_report_id(self, report_id: str) -> bool:
+        """Delete the follower record of a coalesced report"""
+        try:
+            return self.mapping_repo.delete_follower_by_report_id(report_id)
+        except Exception as e:
+            logger.error(f"Error deleting follower by report ID: {str(e)}")
+            raise
+    
     def get_mapping_by_report_id(self, report_id: str) -> Optional[Dict[str, Any]]:
-        """Get mapping by report ID"""
+        """Get mapping by report ID; a coalesced report maps to the task it shares"""
         try:
-            return self.mapping_repo.get_mapping_by_report_id(report_id)
+            return (self.mapping_repo.get_mapping_by_report_id(report_id)
+                    or self.mapping_repo.get_follower_by_report_id(report_id))
         except Exception as e:
             logger.error(f"Error getting mapping by report ID: {str(e)}")
             raise
@@ -86,7 +158,8 @@ class TaskReportMapping:
     def delete_mapping_by_report_id(self, report_id: str) -> bool:
         """Delete mapping by report ID"""
         try:
-            return self.mapping_repo.delete_mapping_by_report_id(report_id)
+            return (self.mapping_repo.delete_mapping_by_report_id(report_id)
+                    or self.mapping_repo.delete_follower_by_report_id(report_id))
         except Exception as e:
             logger.error(f"Error deleting mapping by report ID: {str(e)}")
             raise
@@ -0,0 +1,250 @@
+"""
+Analysis Admission Control
+==========================
+
+Estimates how long a new analysis would take to complete from the current
+backlog and recent per-stage throughput recorded by the workers. Submissions
+whose estimated completion exceeds the backlog budget are rejected with 429
+and a Retry-After; accepted submissions get the estimate in their response.
+
+The monitor snapshot can be several seconds old, so every admitted job is
+also recorded in a Redis sorted set until its task starts (or the submission
+is abandoned, e.g. coalesced). A submission is added before its estimate is
+computed, so a burst within one monitor interval sees itself. Waiting jobs
+are the larger of that set and the queued jobs the snapshot and the live
+fair-share queues show; running jobs come from the snapshot. Throughput is
+capped by the fair-share dispatcher's in-flight caps, which bound how many
+worker slots can be busy; without a snapshot or dispatcher the minimum
+worker count's slots are assumed, so submissions are still estimated.
+
+The same estimate yields a desired worker count, published to Redis and the
+autoscaling endpoint for an external autoscaler.
+"""
+
+import json
+import math
+import time
+import logging
+from typing import Optional, Dict, Any, List
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis:admission"
+COMPLETIONS_KEY = f"{KEY_PREFIX}:completions"
+STAGES_KEY = f"{KEY_PREFIX}:stages"
+AUTOSCALE_KEY = f"{KEY_PREFIX}:autoscale"
+ADMITTED_KEY = f"{KEY_PREFIX}:admitted"
+STAGE_SAMPLES = 200
+
+
+def record_completion(task_id: str, timings: Dict[str, float]) -> None:
+    """Record a finished analysis and its stage timings (called by workers)"""
+    from app.config import DatabaseConfig
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return
+    window_seconds = DatabaseConfig.get_admission_config()["window_seconds"]
+    now = time.time()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zadd(COMPLETIONS_KEY, {task_id: now})
+        pipe.zremrangebyscore(COMPLETIONS_KEY, 0, now - window_seconds)
+        pipe.lpush(STAGES_KEY, json.dumps(timings))
+        pipe.ltrim(STAGES_KEY, 0, STAGE_SAMPLES - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not record completion of task {task_id}: {str(e)}")
+
+
+def release_admitted(task_ids: List[str]) -> None:
+    """Stop counting admitted jobs as waiting: their task started or will never run"""
+    redis_client = get_redis_client()
+    if redis_client is None or not task_ids:
+        return
+    try:
+        redis_client.zrem(ADMITTED_KEY, *task_ids)
+    except Exception as e:
+        logger.warning(f"Could not release admitted tasks {task_ids}: {str(e)}")
+
+
+class AdmissionController:
+    """Backlog-based admission decisions and autoscaling signal"""
+
+    def __init__(self, redis_client, max_backlog_seconds: int = 1800,
+                 batch_max_backlog_seconds: int = 14400, window_seconds: int = 900,
+                 target_drain_seconds: int = 900, min_workers: int = 1, max_workers: int = 10,
+                 default_slots_per_worker: int = 2, admitted_ttl_seconds: int = 14400):
+        self.redis = redis_client
+        self.max_backlog_seconds = max_backlog_seconds
+        self.batch_max_backlog_seconds = batch_max_backlog_seconds
+        self.window_seconds = window_seconds
+        self.target_drain_seconds = target_drain_seconds
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.default_slots_per_worker = default_slots_per_worker
+        # Admitted jobs that never report a start (lost tasks) stop counting after this
+        self.admitted_ttl_seconds = admitted_ttl_seconds
+
+    def estimate(self, snapshot: Optional[Dict[str, Any]], additional_jobs: int = 1,
+                 recorded_jobs: int = 0) -> Dict[str, Any]:
+        """Estimate completion time of additional_jobs submitted now.
+
+        recorded_jobs of them are already in the admitted set and are not
+        counted twice.
+        """
+        backlog = self._backlog(snapshot, recorded_jobs)
+        stage_seconds = self._average_stage_seconds()
+        service_seconds = stage_seconds.get("total_seconds")
+
+        workers = (snapshot or {}).get("workers", [])
+        slots = sum(self._worker_slots(worker) for worker in workers)
+        slots_per_worker = math.ceil(slots / len(workers)) if workers else self.default_slots_per_worker
+
+        # No more slots are busy than the dispatcher lets into Celery; without a
+        # snapshot its caps are the best guess at the slots
+        dispatch_capacity = self._dispatch_capacity()
+        if dispatch_capacity:
+            slots = min(slots, dispatch_capacity) if slots else dispatch_capacity
+        elif not slots:
+            slots = self.min_workers * self.default_slots_per_worker
+
+        # Observed completions understate capacity when workers are not saturated,
+        # so take the larger of them and the slots' rate at the recent stage timings
+        completions = self.redis.zcount(COMPLETIONS_KEY, time.time() - self.window_seconds, "+inf")
+        throughput = completions / self.window_seconds
+        if slots and service_seconds:
+            throughput = max(throughput, slots / service_seconds)
+
+        eta_seconds = None
+        if throughput:
+            eta_seconds = (backlog + additional_jobs) / throughput
+            if service_seconds:
+                # The last job still has to run after it leaves the queue
+                eta_seconds = max(eta_seconds, service_seconds)
+
+        desired_workers = self.min_workers
+        if service_seconds:
+            needed_slots = (backlog + additional_jobs) * service_seconds / self.target_drain_seconds
+            desired_workers = math.ceil(needed_slots / max(1, slots_per_worker))
+        desired_workers = max(self.min_workers, min(self.max_workers, desired_workers))
+
+        return {
+            "backlog": backlog,
+            "throughput_per_minute": round(throughput * 60, 2),
+            "stage_seconds": stage_seconds,
+            "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None,
+            "worker_slots": slots,
+            "current_workers": len(workers),
+            "desired_workers": desired_workers
+        }
+
+    def check(self, snapshot: Optional[Dict[str, Any]], task_ids: List[str],
+              batch: bool = False) -> Dict[str, Any]:
+        """Decide whether to admit a submission of the given (not yet queued) tasks.
+
+        Admitted tasks count as waiting until release_admitted() is called
+        for them. The returned estimate has "admitted" and, when rejected,
+        "retry_after_seconds" (time until the backlog is back within budget).
+        """
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(ADMITTED_KEY, 0, now - self.admitted_ttl_seconds)
+        pipe.zadd(ADMITTED_KEY, {task_id: now for task_id in task_ids})
+        pipe.execute()
+
+        try:
+            estimate = self.estimate(snapshot, len(task_ids), recorded_jobs=len(task_ids))
+        except BaseException:
+            self.redis.zrem(ADMITTED_KEY, *task_ids)
+            raise
+        budget = self.batch_max_backlog_seconds if batch else self.max_backlog_seconds
+        eta_seconds = estimate["eta_seconds"]
+
+        # Without throughput data there is nothing to base a rejection on
+        estimate["admitted"] = eta_seconds is None or eta_seconds <= budget
+        if not estimate["admitted"]:
+            self.redis.zrem(ADMITTED_KEY, *task_ids)
+            estimate["retry_after_seconds"] = max(1, math.ceil(eta_seconds - budget))
+        return estimate
+
+    def publish(self, estimate: Dict[str, Any]) -> None:
+        """Publish the autoscaling signal for external autoscalers"""
+        self.redis.hset(AUTOSCALE_KEY, mapping={
+            "desired_workers": estimate["desired_workers"],
+            "current_workers": estimate["current_workers"],
+            "backlog": estimate["backlog"],
+            "eta_seconds": estimate["eta_seconds"] if estimate["eta_seconds"] is not None else "",
+            "updated_at": time.time()
+        })
+
+    def _backlog(self, snapshot: Optional[Dict[str, Any]], recorded_jobs: int = 0) -> int:
+        """Jobs waiting or running, leaving out recorded_jobs of the admitted set"""
+        from app.services.fair_share import get_fair_share_scheduler
+        admitted = max(0, self.redis.zcard(ADMITTED_KEY) - recorded_jobs)
+
+        scheduler = get_fair_share_scheduler()
+        if scheduler is not None:
+            fair_share_pending = scheduler.pending_count()
+        else:
+            fair_share_pending = sum((snapshot or {}).get("fair_share_pending", {}).values())
+
+        queued = fair_share_pending
+        running = 0
+        if snapshot:
+            queued += sum(snapshot["queues"].values()) + snapshot["reserved_count"]
+            running = len(snapshot["active_tasks"])
+        # Both count jobs admitted before the snapshot; the admitted set also
+        # has the ones admitted since, the snapshot the ones never admitted
+        return max(admitted, queued) + running
+
+    def _dispatch_capacity(self) -> int:
+        """Total in-flight cap of the fair-share dispatcher, 0 when it is not in use"""
+        from app.services.fair_share import get_fair_share_scheduler
+        scheduler = get_fair_share_scheduler()
+        if scheduler is None:
+            return 0
+        return scheduler.total_capacity()
+
+    def _average_stage_seconds(self) -> Dict[str, float]:
+        """Average duration of each stage over the recent completions"""
+        samples: List[Dict[str, float]] = [
+            json.loads(raw) for raw in self.redis.lrange(STAGES_KEY, 0, -1)
+        ]
+        if not samples:
+            return {}
+        stages = {stage for sample in samples for stage in sample}
+        return {
+            stage: round(sum(sample.get(stage, 0) for sample in samples) / len(samples), 2)
+            for stage in sorted(stages)
+        }
+
+    def _worker_slots(self, worker: Dict[str, Any]) -> int:
+        """Concurrent task slots of a worker from its pool stats"""
+        pool = worker.get("pool") or {}
+        return int(pool.get("max-concurrency") or self.default_slots_per_worker)
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Get the shared admission controller, or None when admission control is disabled"""
+    if not hasattr(get_admission_controller, '_instance'):
+        from app.config import DatabaseConfig
+        admission_config = DatabaseConfig.get_admission_config()
+        redis_client = get_redis_client()
+
+        if not admission_config["enabled"] or redis_client is None:
+            get_admission_controller._instance = None
+        else:
+            get_admission_controller._instance = AdmissionController(
+                redis_client,
+                max_backlog_seconds=admission_config["max_backlog_seconds"],
+                batch_max_backlog_seconds=admission_config["batch_max_backlog_seconds"],
+                window_seconds=admission_config["window_seconds"],
+                target_drain_seconds=admission_config["target_drain_seconds"],
+                min_workers=admission_config["min_workers"],
+                max_workers=admission_config["max_workers"],
+                admitted_ttl_seconds=admission_config["batch_max_backlog_seconds"]
+            )
+
+    return get_admission_controller._instance
@@ -0,0 +1,54 @@
+"""
+Async File Helpers
+==================
+
+Filesystem calls for async request handlers. os.path.exists, open() and
+friends block the event loop for as long as the disk (or a network mount)
+takes to answer, so handlers await these instead; each runs in a worker
+thread.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+
+async def exists(path: str) -> bool:
+    return await asyncio.to_thread(os.path.exists, path)
+
+
+async def isfile(path: str) -> bool:
+    return await asyncio.to_thread(os.path.isfile, path)
+
+
+async def existing_files(paths: Iterable[str]) -> Set[str]:
+    """The paths that are regular files, checked in a single thread hop"""
+    paths = list(paths)
+    return await asyncio.to_thread(lambda: {path for path in paths if os.path.isfile(path)})
+
+
+async def stat(path: str) -> os.stat_result:
+    return await asyncio.to_thread(os.stat, path)
+
+
+async def remove(path: str) -> bool:
+    """Remove a file; returns False when it did not exist"""
+    def _remove() -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    return await asyncio.to_thread(_remove)
+
+
+async def read_text(path: str, encoding: str = "utf-8") -> str:
+    def _read() -> str:
+        with open(path, "r", encoding=encoding) as f:
+            return f.read()
+
+    return await asyncio.to_thread(_read)
@@ -0,0 +1,77 @@
+"""
+Batch Analysis Records
+======================
+
+Redis-backed records for batch analysis submissions. A record lists every
+job (task ID, report ID, document, analysis type) in the batch and, once the
+chord callback has run, the batch summary.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis:batch"
+
+
+class BatchStore:
+    """Store for batch analysis records"""
+
+    def __init__(self, redis_client, ttl_seconds: int = 604800):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+
+    def create(self, batch_id: str, user_id: str, jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create a batch record"""
+        record = {
+            "batch_id": batch_id,
+            "user_id": str(user_id),
+            "jobs": jobs,
+            "summary": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "completed_at": None
+        }
+        self.redis.set(self._key(batch_id), json.dumps(record), ex=self.ttl_seconds)
+        return record
+
+    def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Get a batch record"""
+        raw = self.redis.get(self._key(batch_id))
+        return json.loads(raw) if raw else None
+
+    def set_summary(self, batch_id: str, summary: Dict[str, Any]) -> bool:
+        """Attach the final summary to a batch record"""
+        record = self.get(batch_id)
+        if not record:
+            return False
+
+        record["summary"] = summary
+        record["completed_at"] = datetime.utcnow().isoformat()
+        self.redis.set(self._key(batch_id), json.dumps(record), ex=self.ttl_seconds)
+        return True
+
+    @staticmethod
+    def _key(batch_id: str) -> str:
+        return f"{KEY_PREFIX}:{batch_id}"
+
+
+def get_batch_store() -> Optional[BatchStore]:
+    """Get the shared batch store, or None when Redis is not configured"""
+    if not hasattr(get_batch_store, '_instance'):
+        from app.config import DatabaseConfig
+        analysis_config = DatabaseConfig.get_analysis_config()
+        redis_client = get_redis_client()
+
+        if redis_client is None:
+            get_batch_store._instance = None
+        else:
+            get_batch_store._instance = BatchStore(
+                redis_client, ttl_seconds=analysis_config["batch_ttl_seconds"]
+            )
+
+    return get_batch_store._instance
@@ -0,0 +1,105 @@
+"""
+Content-Addressed Blob Store
+============================
+
+Uploaded documents are stored once per distinct content under
+data/blobs/<aa>/<sha256><ext>, where <aa> is the first two hex digits of
+the SHA-256. Document records point at the blob, so the same filing
+uploaded by many users (or many times by one user) takes its disk space
+once, and anything derived from the file (such as the extracted text
+cached next to it as <blob>.<artifact>) is computed once as well.
+
+A blob's reference count is the number of document records whose path is
+the blob; the repositories answer that with an indexed count, so there is
+no separate counter to drift. Adding a reference and dropping the last one
+happen under a per-blob file lock (striped by hash prefix), held across the
+database write, so a blob is never removed while a new record is pointing
+at it.
+"""
+
+import os
+import re
+import glob
+import fcntl
+import logging
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.services.uploads import StagedUpload
+
+logger = logging.getLogger(__name__)
+
+LOCK_DIR = ".locks"
+
+_SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """Files stored by SHA-256 under a root directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, LOCK_DIR), exist_ok=True)
+
+    def blob_path(self, sha256: str, ext: str = "") -> str:
+        """Path of the blob with this content and file extension"""
+        if not _SHA256_PATTERN.match(sha256):
+            raise ValueError(f"Invalid SHA-256: {sha256}")
+        return os.path.join(self.root, sha256[:2], f"{sha256}{ext.lower()}")
+
+    def contains(self, path: str) -> bool:
+        """Whether path is a blob of this store (documents stored before it are not)"""
+        root = os.path.abspath(self.root)
+        return os.path.commonpath([os.path.abspath(path), root]) == root
+
+    @contextmanager
+    def lock(self, *sha256s: str) -> Iterator[None]:
+        """Hold the locks of the given blobs; taken in a fixed order so batches cannot deadlock"""
+        handles = []
+        try:
+            for stripe in sorted({sha256[:2] for sha256 in sha256s}):
+                handle = open(os.path.join(self.root, LOCK_DIR, f"{stripe}.lock"), "a")
+                handles.append(handle)
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the file releases its lock
+            for handle in reversed(handles):
+                handle.close()
+
+    def put(self, staged_upload: StagedUpload, ext: str = "") -> str:
+        """Move a staged upload into the store, or drop it if the blob already exists.
+
+        Call with the blob's lock held.
+        """
+        path = self.blob_path(staged_upload.sha256, ext)
+        if os.path.exists(path):
+            staged_upload.discard()
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            staged_upload.commit(path)
+        # The blob belongs to the store now; discarding the upload must not remove it
+        staged_upload.temp_path = None
+        return path
+
+    def artifact_path(self, blob_path: str, name: str) -> str:
+        """Path of a file derived from a blob, removed together with it"""
+        return f"{blob_path}.{name}"
+
+    def remove(self, blob_path: str) -> None:
+        """Delete a blob and its artifacts; call with the blob's lock held"""
+        for path in [blob_path] + glob.glob(glob.escape(blob_path) + ".*"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        logger.info(f"Removed unreferenced blob {blob_path}")
+
+
+def get_blob_store() -> BlobStore:
+    """Get the shared blob store"""
+    if not hasattr(get_blob_store, '_instance'):
+        from app.config import DatabaseConfig
+        get_blob_store._instance = BlobStore(DatabaseConfig.get_upload_config()["blob_dir"])
+
+    return get_blob_store._instance
@@ -0,0 +1,164 @@
+"""
+Bulk Uploads
+============
+
+Ingests many documents in one request, either as multipart files or as a
+ZIP archive. Every file is streamed into a staged upload (see
+app.services.uploads) with several copies running at once, ZIP entries are
+extracted one by one straight from the archive without unpacking it first,
+and the staged files are deduplicated by SHA-256 against each other and the
+user's existing documents. The new documents are then registered with a
+single batched repository call and their PDFs are opened in parallel to
+count pages, so a broken file shows up in the manifest right away rather
+than at analysis time.
+"""
+
+import os
+import asyncio
+import logging
+import zipfile
+from typing import List, Dict, Any, Optional, BinaryIO
+
+from fastapi import UploadFile
+
+from app.services.uploads import StagedUpload, UploadTooLarge, stage_upload, _copy_stream
+
+logger = logging.getLogger(__name__)
+
+STATUS_CREATED = "created"
+STATUS_DUPLICATE = "duplicate"
+STATUS_FAILED = "failed"
+
+
+class BulkUploadError(Exception):
+    """Raised when a bulk upload cannot be processed at all"""
+
+
+class BulkItem:
+    """One file of a bulk upload and what happened to it"""
+
+    def __init__(self, name: str, staged: Optional[StagedUpload] = None, error: Optional[str] = None):
+        self.name = name
+        self.staged = staged
+        self.error = error
+        self.status = STATUS_FAILED if error else None
+        self.document: Optional[Dict[str, Any]] = None
+        self.pages: Optional[int] = None
+
+    def discard(self) -> None:
+        """Remove the staged file unless it was committed"""
+        if self.staged is not None and self.status != STATUS_CREATED:
+            self.staged.discard()
+
+
+def _is_archive_member(info: zipfile.ZipInfo) -> bool:
+    """Skip directories and the metadata entries archivers add"""
+    if info.is_dir():
+        return False
+    parts = info.filename.replace("\\", "/").split("/")
+    return parts[0] != "__MACOSX" and not parts[-1].startswith(".")
+
+
+def _extract_archive(source: BinaryIO, directory: str, chunk_bytes: int, max_bytes: int,
+                     max_files: int) -> List[BulkItem]:
+    """Stream every file of a ZIP archive into its own staged upload"""
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile:
+        raise BulkUploadError("archive is not a valid ZIP file")
+
+    items = []
+    with archive:
+        members = [info for info in archive.infolist() if _is_archive_member(info)]
+        if len(members) > max_files:
+            raise BulkUploadError(f"Archive contains {len(members)} files; the limit is {max_files}")
+
+        for info in members:
+            name = os.path.basename(info.filename.replace("\\", "/"))
+            # The declared size can lie, so _copy_stream enforces the limit as well
+            if max_bytes and info.file_size > max_bytes:
+                items.append(BulkItem(name, error=f"File exceeds the maximum size of {max_bytes} bytes"))
+                continue
+            try:
+                with archive.open(info) as entry:
+                    items.append(BulkItem(name, staged=_copy_stream(entry, directory, chunk_bytes, max_bytes)))
+            except (UploadTooLarge, zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+                # Corrupt, encrypted or oversized entries fail alone
+                items.append(BulkItem(name, error=str(e)))
+    return items
+
+
+async def stage_files(files: List[UploadFile], directory: str, concurrency: int) -> List[BulkItem]:
+    """Stage multipart files, several at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def stage(upload: UploadFile) -> BulkItem:
+        name = upload.filename or "unnamed_file"
+        async with semaphore:
+            try:
+                return BulkItem(name, staged=await stage_upload(upload, directory))
+            except Exception as e:
+                return BulkItem(name, error=str(e))
+
+    return list(await asyncio.gather(*[stage(upload) for upload in files]))
+
+
+async def stage_archive(archive: UploadFile, directory: str, max_files: int) -> List[BulkItem]:
+    """Stage the files of an uploaded ZIP archive (off the event loop)"""
+    from app.config import DatabaseConfig
+    upload_config = DatabaseConfig.get_upload_config()
+
+    await archive.seek(0)
+    return await asyncio.to_thread(
+        _extract_archive, archive.file, directory,
+        upload_config["chunk_bytes"], upload_config["max_bytes"], max_files
+    )
+
+
+def register_items(document_model, user_id: str, items: List[BulkItem], upload_path: str) -> None:
+    """Deduplicate staged items by checksum and create the new documents in one batch"""
+    staged_items = [item for item in items if item.staged is not None and item.status is None]
+
+    existing = document_model.get_documents_by_checksums(
+        user_id, sorted({item.staged.sha256 for item in staged_items})
+    )
+    first_by_checksum: Dict[str, BulkItem] = {}
+    new_items = []
+    for item in staged_items:
+        checksum = item.staged.sha256
+        if checksum in existing:
+            item.status = STATUS_DUPLICATE
+            item.document = existing[checksum]
+        elif checksum in first_by_checksum:
+            # Resolved to the first copy's document once that is created
+            item.status = STATUS_DUPLICATE
+        else:
+            first_by_checksum[checksum] = item
+            new_items.append(item)
+
+    if new_items:
+        documents = document_model.create_documents_from_uploads(
+            user_id, [(item.name, item.staged) for item in new_items], upload_path
+        )
+        for item, document in zip(new_items, documents):
+            item.status = STATUS_CREATED
+            item.document = document
+
+    for item in staged_items:
+        if item.status == STATUS_DUPLICATE and item.document is None:
+            item.document = first_by_checksum[item.staged.sha256].document
+        item.discard()
+
+
+async def ingest_items(items: List[BulkItem], concurrency: int) -> None:
+    """Open the new documents in parallel and record their page counts"""
+    from app.services.job_sizing import count_pdf_pages
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def ingest(item: BulkItem) -> None:
+        async with semaphore:
+            item.pages = await asyncio.to_thread(count_pdf_pages, item.document["path"])
+
+    created = [item for item in items if item.status == STATUS_CREATED and item.name.lower().endswith(".pdf")]
+    await asyncio.gather(*[ingest(item) for item in created])
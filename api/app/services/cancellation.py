@@ -0,0 +1,134 @@
+"""
+Cooperative Task Cancellation
+=============================
+
+Cancelling an analysis sets a flag in Redis instead of killing the worker
+process. The running task checks the flag between pipeline stages and after
+each crew step, persists whatever partial output it has and stops, leaving
+the worker slot free for the next task. Tasks that have not started yet see
+the flag before doing any work. With the embedded executor the flag is kept
+in its job table instead.
+
+A task that other submissions were coalesced onto is not stopped when its
+owner cancels it: the token's on_cancel hook hands the run to the first
+waiting submission and withdraws the flag, and the task carries on for it.
+"""
+
+import time
+import logging
+from typing import Callable, Optional
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis:cancel"
+
+# Long enough to outlive any queued or running task
+FLAG_TTL_SECONDS = 86400
+
+# Delete KEYS[1] only if it still holds the request ARGV[1]
+_CLEAR_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when its cancellation has been requested"""
+
+
+def request_cancellation(task_id: str) -> bool:
+    """Flag a task for cancellation; False when there is nowhere to keep the flag"""
+    from app.services.embedded_executor import get_embedded_executor
+    executor = get_embedded_executor()
+    if executor is not None:
+        executor.cancel(task_id)
+        return True
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return False
+    redis_client.set(f"{KEY_PREFIX}:{task_id}", time.time(), ex=FLAG_TTL_SECONDS)
+    return True
+
+
+def get_cancellation_flag(task_id: str) -> Optional[str]:
+    """The pending cancellation request of a task, or None"""
+    from app.services.embedded_executor import get_embedded_executor
+    executor = get_embedded_executor()
+    if executor is not None:
+        return executor.cancel_flag(task_id)
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return None
+    return redis_client.get(f"{KEY_PREFIX}:{task_id}")
+
+
+def is_cancellation_requested(task_id: str) -> bool:
+    """Whether cancellation of a task has been requested"""
+    return get_cancellation_flag(task_id) is not None
+
+
+def clear_cancellation(task_id: str, flag: str) -> bool:
+    """Withdraw the cancellation request flag; False when a newer request replaced it"""
+    from app.services.embedded_executor import get_embedded_executor
+    executor = get_embedded_executor()
+    if executor is not None:
+        return executor.clear_cancel(task_id, flag)
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return False
+    return bool(redis_client.register_script(_CLEAR_SCRIPT)(keys=[f"{KEY_PREFIX}:{task_id}"], args=[flag]))
+
+
+class CancellationToken:
+    """Checks a task's cancellation flag, at most once per min_interval_seconds.
+    
+    on_cancel, when given, is called once the flag has been withdrawn; it
+    returns True when it took the cancellation over (the run was handed to
+    another submission) and the task should carry on.
+    """
+
+    def __init__(self, task_id: str, min_interval_seconds: float = 1.0,
+                 on_cancel: Optional[Callable[[], bool]] = None):
+        self.task_id = task_id
+        self.min_interval_seconds = min_interval_seconds
+        self.on_cancel = on_cancel
+        self.cancelled = False
+        self._checked_at: Optional[float] = None
+
+    def check(self) -> None:
+        """Raise TaskCancelled if cancellation has been requested"""
+        now = time.monotonic()
+        if not self.cancelled and (
+            self._checked_at is None or now - self._checked_at >= self.min_interval_seconds
+        ):
+            self._checked_at = now
+            try:
+                flag = get_cancellation_flag(self.task_id)
+            except Exception as e:
+                logger.warning(f"Could not check cancellation of task {self.task_id}: {str(e)}")
+                flag = None
+            if flag is not None:
+                self.cancelled = self._cancel(flag)
+        if self.cancelled:
+            raise TaskCancelled(self.task_id)
+
+    def _cancel(self, flag: str) -> bool:
+        """Whether the request seen as flag stops the task"""
+        if self.on_cancel is None:
+            return True
+        try:
+            # Withdrawn first, so one request is never handed over twice; a
+            # newer request is picked up by the next check
+            if not clear_cancellation(self.task_id, flag):
+                return False
+            return not self.on_cancel()
+        except Exception as e:
+            logger.warning(f"Could not hand over cancelled task {self.task_id}: {str(e)}")
+            return True
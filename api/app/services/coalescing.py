@@ -0,0 +1,186 @@
+"""
+In-Flight Analysis Coalescing
+=============================
+
+Redis-backed registry of analyses that are currently queued or running.
+Submissions for the same document checksum, analysis type, normalized query
+and model configuration attach to the task already in flight instead of
+starting another crew run. Each attached submission keeps its own report,
+which the owning task fills in when it finishes.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Optional, Dict, Any, List
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis:inflight"
+STATS_KEY = f"{KEY_PREFIX}:stats"
+
+# Attach a follower to the task owning KEYS[1], or claim the key for ARGV[1].
+# Returns the owning task ID when attached, nil when the key was claimed.
+_CLAIM_OR_ATTACH_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner then
+    local followers_key = KEYS[1] .. ':followers:' .. owner
+    redis.call('RPUSH', followers_key, ARGV[3])
+    redis.call('EXPIRE', followers_key, ARGV[2])
+    redis.call('HINCRBY', KEYS[2], 'deduplicated', 1)
+    redis.call('HINCRBY', KEYS[2], 'deduplicated:' .. ARGV[4], 1)
+    return owner
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[3], KEYS[1], 'EX', ARGV[2])
+redis.call('HINCRBY', KEYS[2], 'primary', 1)
+redis.call('HINCRBY', KEYS[2], 'primary:' .. ARGV[4], 1)
+return false
+"""
+
+# Release KEYS[1] if it is still owned by ARGV[1] and drain its followers.
+_RELEASE_SCRIPT = """
+local followers_key = KEYS[1] .. ':followers:' .. ARGV[1]
+local followers = redis.call('LRANGE', followers_key, 0, -1)
+redis.call('DEL', followers_key)
+redis.call('DEL', KEYS[2])
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+return followers
+"""
+
+
+# Hand the run of ARGV[1], owner of KEYS[1], to its first follower and return
+# that follower, or release the key (so nobody attaches any more) when none waits.
+_PROMOTE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return false
+end
+local follower = redis.call('LPOP', KEYS[1] .. ':followers:' .. ARGV[1])
+if follower then
+    return follower
+end
+redis.call('DEL', KEYS[1])
+redis.call('DEL', KEYS[2])
+return false
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings coalesce"""
+    return " ".join((query or "").lower().split())
+
+
+def analysis_fingerprint(checksum: str, analysis_type: str, query: str,
+                         model_config: Optional[Dict[str, Any]] = None) -> str:
+    """Fingerprint the inputs that determine an analysis result"""
+    query_hash = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()[:32]
+    model_hash = hashlib.sha256(
+        json.dumps(model_config or {}, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{checksum}:{analysis_type}:{query_hash}:{model_hash}"
+
+
+def build_coalesce_key(checksum: str, analysis_type: str, query: str,
+                       model_config: Optional[Dict[str, Any]] = None) -> str:
+    """Build the registry key for an analysis request"""
+    return f"{KEY_PREFIX}:{analysis_fingerprint(checksum, analysis_type, query, model_config)}"
+
+
+class InFlightRegistry:
+    """Registry of in-flight analysis tasks keyed by request fingerprint"""
+
+    def __init__(self, redis_client, ttl_seconds: int = 3600):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self._claim_or_attach = redis_client.register_script(_CLAIM_OR_ATTACH_SCRIPT)
+        self._release = redis_client.register_script(_RELEASE_SCRIPT)
+        self._promote = redis_client.register_script(_PROMOTE_SCRIPT)
+
+    def claim_or_attach(self, key: str, task_id: str, analysis_type: str,
+                        report_id: str, user_id: str) -> Optional[str]:
+        """Claim the key for task_id, or attach the report to the task already owning it.
+
+        Returns the owning task ID when the report was attached, None when the
+        caller now owns the key and must enqueue task_id itself.
+        """
+        return self._claim_or_attach(
+            keys=[key, STATS_KEY, self._task_key(task_id)],
+            args=[task_id, self.ttl_seconds, self._follower(report_id, user_id), analysis_type]
+        )
+
+    def release(self, key: str, task_id: str) -> List[Dict[str, str]]:
+        """Release the key owned by task_id and return the attached followers"""
+        followers = self._release(keys=[key, self._task_key(task_id)], args=[task_id])
+        return [json.loads(follower) for follower in followers or []]
+
+    def promote_follower(self, key: str, task_id: str) -> Optional[Dict[str, str]]:
+        """Detach the first follower of task_id to take the run over from its cancelled owner.
+
+        Returns None, and releases the key, when no follower is waiting.
+        """
+        follower = self._promote(keys=[key, self._task_key(task_id)], args=[task_id])
+        return json.loads(follower) if follower else None
+
+    def detach_follower(self, task_id: str, report_id: str, user_id: str) -> bool:
+        """Stop filling in a follower's report when task_id finishes; False if it was not attached"""
+        key = self.redis.get(self._task_key(task_id))
+        if not key:
+            return False
+        removed = self.redis.lrem(f"{key}:followers:{task_id}", 0, self._follower(report_id, user_id))
+        return removed > 0
+
+    def follower_count(self, task_id: str) -> int:
+        """Number of reports waiting on task_id besides its owner's"""
+        key = self.redis.get(self._task_key(task_id))
+        if not key:
+            return 0
+        return self.redis.llen(f"{key}:followers:{task_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        raw = self.redis.hgetall(STATS_KEY) or {}
+        primary = int(raw.get("primary", 0))
+        deduplicated = int(raw.get("deduplicated", 0))
+        by_type: Dict[str, Dict[str, int]] = {}
+        for field, value in raw.items():
+            if ":" not in field:
+                continue
+            counter, analysis_type = field.split(":", 1)
+            by_type.setdefault(analysis_type, {"primary": 0, "deduplicated": 0})[counter] = int(value)
+
+        total = primary + deduplicated
+        return {
+            "crew_runs": primary,
+            "deduplicated": deduplicated,
+            "dedup_ratio": round(deduplicated / total, 4) if total else 0.0,
+            "by_analysis_type": by_type
+        }
+
+    @staticmethod
+    def _follower(report_id: str, user_id: str) -> str:
+        return json.dumps({"report_id": str(report_id), "user_id": str(user_id)})
+
+    @staticmethod
+    def _task_key(task_id: str) -> str:
+        return f"{KEY_PREFIX}:task:{task_id}"
+
+
+def get_inflight_registry() -> Optional[InFlightRegistry]:
+    """Get the shared in-flight registry, or None when coalescing is unavailable"""
+    if not hasattr(get_inflight_registry, '_instance'):
+        from app.config import DatabaseConfig
+        analysis_config = DatabaseConfig.get_analysis_config()
+        redis_client = get_redis_client()
+
+        if not analysis_config["coalesce_enabled"] or redis_client is None:
+            get_inflight_registry._instance = None
+        else:
+            get_inflight_registry._instance = InFlightRegistry(
+                redis_client, ttl_seconds=analysis_config["coalesce_ttl_seconds"]
+            )
+
+    return get_inflight_registry._instance
@@ -0,0 +1,173 @@
+"""
+File Downloads
+==============
+
+Responses for document and report downloads that repeat views barely pay
+for:
+
+- A strong ETag derived from the file's SHA-256 (documents carry it as
+  their checksum; for reports it is computed once per file version and
+  kept in memory) and a Last-Modified date.
+- Conditional requests: If-None-Match (or, without it, If-Modified-Since)
+  is answered with 304 Not Modified before the file is opened.
+- Byte ranges (Range / If-Range, 206 and multipart responses) and the
+  ASGI zero-copy path send extension, both handled by Starlette's
+  FileResponse when the server supports them.
+- Optionally, the file is handed to a fronting nginx with X-Accel-Redirect
+  (DOWNLOAD_ACCEL_REDIRECT_PREFIX) so the kernel sends it with sendfile and
+  the API process never reads it.
+
+Files are private to their owner, so responses are marked
+"private, no-cache": browsers keep them but revalidate each view.
+"""
+
+import os
+import hashlib
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from app.services import async_files
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = "private, no-cache"
+
+# Report checksums kept in memory, keyed by file version
+CHECKSUM_CACHE_SIZE = 4096
+
+_checksums: "OrderedDict[Tuple[str, int, int, int], str]" = OrderedDict()
+_checksums_lock = threading.Lock()
+
+
+def strong_etag(checksum: str) -> str:
+    return f'"{checksum}"'
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def file_checksum(path: str, stat_result: os.stat_result) -> str:
+    """SHA-256 of a file, hashed once per version (inode, size and mtime)"""
+    key = (os.path.abspath(path), stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+    with _checksums_lock:
+        checksum = _checksums.get(key)
+        if checksum is not None:
+            _checksums.move_to_end(key)
+            return checksum
+
+    checksum = await asyncio.to_thread(_file_sha256, path)
+    with _checksums_lock:
+        _checksums[key] = checksum
+        while len(_checksums) > CHECKSUM_CACHE_SIZE:
+            _checksums.popitem(last=False)
+    return checksum
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Whether the client's cached copy is current; If-None-Match wins over If-Modified-Since"""
+    if request.method not in ("GET", "HEAD"):
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(mtime) <= since
+    return False
+
+
+def _accel_redirect_uri(path: str) -> Optional[str]:
+    """The internal nginx URI of a file, or None when X-Accel-Redirect is off or the file is outside its root"""
+    from app.config import DatabaseConfig
+    config = DatabaseConfig.get_download_config()
+    prefix = config["accel_redirect_prefix"]
+    if not prefix:
+        return None
+
+    root = os.path.realpath(config["accel_redirect_root"])
+    real_path = os.path.realpath(path)
+    if os.path.commonpath([root, real_path]) != root:
+        logger.warning(f"Not redirecting {path}: outside {root}")
+        return None
+    relative = os.path.relpath(real_path, root).replace(os.sep, "/")
+    return prefix.rstrip("/") + "/" + quote(relative)
+
+
+def _content_disposition(filename: str, disposition: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+async def file_download(request: Request, path: str, filename: str,
+                        media_type: Optional[str] = None, checksum: Optional[str] = None,
+                        disposition: str = "attachment") -> Response:
+    """
+    Serve a file with validators, conditional handling and range support.
+
+    checksum is the file's known SHA-256; when None it is computed (and
+    cached) from the file. Raises FileNotFoundError if the file is gone.
+    """
+    stat_result = await async_files.stat(path)
+    if checksum is None:
+        checksum = await file_checksum(path, stat_result)
+
+    headers: Dict[str, str] = {
+        "etag": strong_etag(checksum),
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": CACHE_CONTROL
+    }
+
+    if is_not_modified(request, headers["etag"], stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    accel_uri = _accel_redirect_uri(path)
+    if accel_uri is not None:
+        # nginx serves the body (with sendfile and ranges); these headers are passed through
+        headers["x-accel-redirect"] = accel_uri
+        headers["content-disposition"] = _content_disposition(filename, disposition)
+        return Response(status_code=200, headers=headers, media_type=media_type)
+
+    return FileResponse(
+        path,
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        stat_result=stat_result,
+        content_disposition_type=disposition
+    )
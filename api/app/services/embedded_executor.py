@@ -0,0 +1,310 @@
+"""
+Embedded Task Executor
+======================
+
+Single-node execution mode (EXECUTOR_BACKEND=embedded) that runs the Celery
+analysis tasks in a bounded thread pool inside the API process, so small
+deployments and CI need neither a broker nor a separate worker.
+
+Tasks keep their Celery identity: they run through Task.apply() with the task
+ID assigned at submission, and their state and results go to a SQLite result
+backend, so AsyncResult and the /tasks endpoints behave as with a worker.
+Submitted jobs are recorded in a SQLite job table; jobs that were queued or
+running when the process stopped are resubmitted on the next startup.
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+
+from celery.backends.base import KeyValueStoreBackend
+
+logger = logging.getLogger(__name__)
+
+EMBEDDED_BACKEND = "embedded"
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    # Pool threads and the event loop write concurrently; wait out their locks
+    return sqlite3.connect(db_path, timeout=30)
+
+
+class SQLiteResultBackend(KeyValueStoreBackend):
+    """Celery result backend keeping task state in a local SQLite file"""
+
+    key_t = str
+
+    def __init__(self, app=None, url=None, **kwargs):
+        super().__init__(app=app, url=url, **kwargs)
+        from app.config import DatabaseConfig
+        self.db_path = DatabaseConfig.get_executor_config()["db_path"]
+        with _connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS celery_results (key TEXT PRIMARY KEY, value TEXT)")
+
+    def get(self, key):
+        with _connect(self.db_path) as conn:
+            row = conn.execute("SELECT value FROM celery_results WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def mget(self, keys):
+        keys = list(keys)
+        if not keys:
+            return []
+        placeholders = ", ".join("?" for _ in keys)
+        with _connect(self.db_path) as conn:
+            values = dict(conn.execute(
+                f"SELECT key, value FROM celery_results WHERE key IN ({placeholders})", keys
+            ).fetchall())
+        return [values.get(key) for key in keys]
+
+    def set(self, key, value):
+        with _connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO celery_results (key, value) VALUES (?, ?)",
+                (key, value if isinstance(value, str) else value.decode("utf-8"))
+            )
+
+    def delete(self, key):
+        with _connect(self.db_path) as conn:
+            conn.execute("DELETE FROM celery_results WHERE key = ?", (key,))
+
+    def incr(self, key):
+        with _connect(self.db_path) as conn:
+            row = conn.execute("SELECT value FROM celery_results WHERE key = ?", (key,)).fetchone()
+            value = int(row[0]) + 1 if row else 1
+            conn.execute("INSERT OR REPLACE INTO celery_results (key, value) VALUES (?, ?)", (key, str(value)))
+        return value
+
+
+class EmbeddedExecutor:
+    """Runs Celery tasks in a thread pool and tracks them in a SQLite job table"""
+
+    def __init__(self, celery_app, db_path: str, max_workers: int = 2):
+        self.celery_app = celery_app
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedded-worker")
+        self._group_lock = threading.Lock()
+        self._init_database()
+
+    def submit(self, task_name: str, task_id: str, kwargs: Dict[str, Any],
+               group_id: Optional[str] = None) -> str:
+        """Record a job and queue it on the pool"""
+        now = time.time()
+        with _connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO embedded_jobs (task_id, task_name, kwargs, group_id, state, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (task_id, task_name, json.dumps(kwargs), group_id, JOB_PENDING, now, now)
+            )
+        self._pool.submit(self._run, task_id)
+        return task_id
+
+    def submit_chord(self, group_id: str, header: List[Any], callback) -> str:
+        """Run a chord: the header signatures on the pool, then the callback with their results"""
+        with _connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO embedded_groups (group_id, task_ids, callback) VALUES (?, ?, ?)",
+                (group_id, json.dumps([sig.options["task_id"] for sig in header]), json.dumps(dict(callback)))
+            )
+        for sig in header:
+            self.submit(sig.task, sig.options["task_id"], dict(sig.kwargs), group_id=group_id)
+        return group_id
+
+    def recover(self) -> int:
+        """Resubmit jobs that were queued or running when the process last stopped"""
+        with _connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT task_id FROM embedded_jobs WHERE state IN (?, ?) ORDER BY created_at",
+                (JOB_PENDING, JOB_RUNNING)
+            ).fetchall()
+        for (task_id,) in rows:
+            self._pool.submit(self._run, task_id)
+        if rows:
+            logger.info(f"Resubmitted {len(rows)} embedded jobs from the previous run")
+        return len(rows)
+
+    def cancel(self, task_id: str) -> None:
+        """Request cooperative cancellation of a job"""
+        # Counts requests, so clear_cancel can tell a newer request from the one it saw
+        with _connect(self.db_path) as conn:
+            conn.execute(
+                "UPDATE embedded_jobs SET cancel_requested = cancel_requested + 1 WHERE task_id = ?", (task_id,)
+            )
+
+    def is_cancelled(self, task_id: str) -> bool:
+        """Whether cancellation of a job has been requested"""
+        return self.cancel_flag(task_id) is not None
+
+    def cancel_flag(self, task_id: str) -> Optional[str]:
+        """The pending cancellation request of a job, or None"""
+        with _connect(self.db_path) as conn:
+            row = conn.execute("SELECT cancel_requested FROM embedded_jobs WHERE task_id = ?", (task_id,)).fetchone()
+        return str(row[0]) if row and row[0] else None
+
+    def clear_cancel(self, task_id: str, flag: str) -> bool:
+        """Withdraw a cancellation request unless a newer one has been made"""
+        with _connect(self.db_path) as conn:
+            cursor = conn.execute(
+                "UPDATE embedded_jobs SET cancel_requested = 0 WHERE task_id = ? AND cancel_requested = ?",
+                (task_id, int(flag))
+            )
+            return cursor.rowcount > 0
+
+    def monitor_state(self) -> Dict[str, Any]:
+        """Queue and worker state in the shape of the queue monitor snapshot"""
+        with _connect(self.db_path) as conn:
+            counts = dict(conn.execute("SELECT state, COUNT(*) FROM embedded_jobs GROUP BY state").fetchall())
+            running = conn.execute(
+                "SELECT task_id, task_name, kwargs, updated_at FROM embedded_jobs WHERE state = ?",
+                (JOB_RUNNING,)
+            ).fetchall()
+
+        active_tasks = [
+            {
+                "task_id": task_id,
+                "name": task_name,
+                "worker": EMBEDDED_BACKEND,
+                "args": [],
+                "kwargs": json.loads(kwargs),
+                "time_start": started_at
+            }
+            for task_id, task_name, kwargs, started_at in running
+        ]
+        return {
+            "queues": {EMBEDDED_BACKEND: counts.get(JOB_PENDING, 0)},
+            "fair_share_pending": {},
+            "workers": [{
+                "worker": EMBEDDED_BACKEND,
+                "active_tasks": len(active_tasks),
+                "reserved_tasks": 0,
+                "total_tasks": counts.get(JOB_DONE, 0),
+                "pool": {"implementation": "embedded-threads", "max-concurrency": self.max_workers},
+                "rusage": {}
+            }],
+            "active_tasks": active_tasks,
+            "reserved_count": 0
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting work; running jobs finish, queued ones resume on next startup"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task_id: str) -> None:
+        """Execute one job in a pool thread"""
+        with _connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT task_name, kwargs, group_id, state FROM embedded_jobs WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            if row is None or row[3] == JOB_DONE:
+                return
+            conn.execute(
+                "UPDATE embedded_jobs SET state = ?, updated_at = ? WHERE task_id = ?",
+                (JOB_RUNNING, time.time(), task_id)
+            )
+        task_name, kwargs, group_id, _ = row
+
+        try:
+            # apply() runs the task in this thread with its Celery request context;
+            # task_store_eager_result sends its states to the result backend.
+            # Retries run right away (apply() ignores the countdown)
+            result = self.celery_app.tasks[task_name].apply(kwargs=json.loads(kwargs), task_id=task_id)
+            if result.failed():
+                logger.error(f"Embedded job {task_id} ({task_name}) failed: {str(result.result)}")
+        except Exception as e:
+            logger.error(f"Embedded job {task_id} ({task_name}) failed: {str(e)}")
+        finally:
+            with _connect(self.db_path) as conn:
+                conn.execute(
+                    "UPDATE embedded_jobs SET state = ?, updated_at = ? WHERE task_id = ?",
+                    (JOB_DONE, time.time(), task_id)
+                )
+
+        if group_id:
+            self._finish_group(group_id)
+
+    def _finish_group(self, group_id: str) -> None:
+        """Run a chord callback once every job of its group is done"""
+        from celery import signature
+        from celery.result import AsyncResult
+
+        with self._group_lock:
+            with _connect(self.db_path) as conn:
+                group = conn.execute(
+                    "SELECT task_ids, callback FROM embedded_groups WHERE group_id = ?", (group_id,)
+                ).fetchone()
+                if group is None:
+                    return
+                remaining = conn.execute(
+                    "SELECT COUNT(*) FROM embedded_jobs WHERE group_id = ? AND state != ?",
+                    (group_id, JOB_DONE)
+                ).fetchone()[0]
+                if remaining:
+                    return
+                conn.execute("DELETE FROM embedded_groups WHERE group_id = ?", (group_id,))
+
+        task_ids = json.loads(group[0])
+        results = [AsyncResult(task_id, app=self.celery_app).result for task_id in task_ids]
+        # Failed jobs leave their exception as the result; the callback expects dicts
+        results = [result if isinstance(result, dict) else None for result in results]
+        try:
+            signature(json.loads(group[1]), app=self.celery_app).apply(args=(results,))
+        except Exception as e:
+            logger.error(f"Callback of embedded group {group_id} failed: {str(e)}")
+
+    def _init_database(self) -> None:
+        with _connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedded_jobs (
+                    task_id TEXT PRIMARY KEY,
+                    task_name TEXT NOT NULL,
+                    kwargs TEXT NOT NULL,
+                    group_id TEXT,
+                    state TEXT NOT NULL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedded_jobs_state ON embedded_jobs (state)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedded_jobs_group ON embedded_jobs (group_id)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedded_groups (
+                    group_id TEXT PRIMARY KEY,
+                    task_ids TEXT NOT NULL,
+                    callback TEXT NOT NULL
+                )
+                """
+            )
+
+
+def get_embedded_executor() -> Optional[EmbeddedExecutor]:
+    """Get the shared embedded executor, or None when tasks run on Celery workers"""
+    if not hasattr(get_embedded_executor, '_instance'):
+        from app.config import DatabaseConfig
+        executor_config = DatabaseConfig.get_executor_config()
+
+        if executor_config["backend"] != EMBEDDED_BACKEND:
+            get_embedded_executor._instance = None
+        else:
+            from app.celery_app import celery_app
+            get_embedded_executor._instance = EmbeddedExecutor(
+                celery_app,
+                db_path=executor_config["db_path"],
+                max_workers=executor_config["max_workers"]
+            )
+
+    return get_embedded_executor._instance
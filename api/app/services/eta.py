@@ -0,0 +1,158 @@
+"""
+Analysis ETA Model
+==================
+
+Predicts when a queued or running analysis will finish. Workers feed the
+model with stage timings of completed analyses, kept as exponentially
+weighted moving averages per analysis type and page-count bucket. A
+queued job's ETA is its estimated wait (jobs ahead of it spread over the
+worker slots) plus its service time; a running job's ETA is the remaining
+time of its current stage plus the stages after it.
+"""
+
+import json
+import time
+import logging
+from typing import Optional, Dict, Any
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis:eta"
+
+# Stages in execution order, named after the timings recorded by the tasks
+STAGES = ["crew_seconds", "report_seconds", "save_seconds"]
+
+# Used until a type has completed at least once
+DEFAULT_STAGE_SECONDS = {"crew_seconds": 120.0, "report_seconds": 1.0, "save_seconds": 2.0}
+
+# Task progress stages (see app.celery_tasks) mapped to the model's stages
+PROGRESS_STAGES = {
+    "starting": "crew_seconds",
+    "crew": "crew_seconds",
+    "report": "report_seconds",
+    "saving": "save_seconds",
+}
+
+PAGE_BUCKETS = [(10, "1-10"), (50, "11-50"), (200, "51-200")]
+
+
+def page_bucket(pages: Optional[int]) -> str:
+    """Get the page-count bucket label"""
+    if not pages:
+        return "unknown"
+    for upper, label in PAGE_BUCKETS:
+        if pages <= upper:
+            return label
+    return ">200"
+
+
+def poll_interval(eta_seconds: Optional[float]) -> int:
+    """Suggested seconds until the client polls the task status again"""
+    if eta_seconds is None:
+        return 5
+    return int(min(30, max(2, eta_seconds / 10)))
+
+
+class EtaModel:
+    """Per-stage timing averages and ETA estimates"""
+
+    def __init__(self, redis_client, alpha: float = 0.2, context_ttl_seconds: int = 86400):
+        self.redis = redis_client
+        self.alpha = alpha
+        self.context_ttl_seconds = context_ttl_seconds
+
+    def register_task(self, task_id: str, analysis_type: str, pages: Optional[int]) -> None:
+        """Remember what a submitted task is so its ETA can be estimated later"""
+        context = {"analysis_type": analysis_type, "pages": pages, "submitted_at": time.time()}
+        self.redis.set(self._context_key(task_id), json.dumps(context), ex=self.context_ttl_seconds)
+
+    def task_context(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get the context registered for a task"""
+        raw = self.redis.get(self._context_key(task_id))
+        return json.loads(raw) if raw else None
+
+    def record(self, analysis_type: str, pages: Optional[int], timings: Dict[str, float]) -> None:
+        """Fold a completed analysis' stage timings into the averages"""
+        stages = dict(timings)
+        stages["save_seconds"] = max(
+            0.0, timings["total_seconds"] - timings["crew_seconds"] - timings["report_seconds"]
+        )
+        for bucket in (page_bucket(pages), "all"):
+            key = self._stats_key(analysis_type, bucket)
+            current = self.redis.hgetall(key) or {}
+            updated = {"count": int(current.get("count", 0)) + 1}
+            for stage in STAGES:
+                value = stages[stage]
+                if stage in current:
+                    previous = float(current[stage])
+                    value = previous + self.alpha * (value - previous)
+                updated[stage] = round(value, 3)
+            self.redis.hset(key, mapping=updated)
+
+    def stage_estimates(self, analysis_type: str, pages: Optional[int]) -> Dict[str, float]:
+        """Expected duration of each stage, falling back to the type-wide and default averages"""
+        for bucket in (page_bucket(pages), "all"):
+            stats = self.redis.hgetall(self._stats_key(analysis_type, bucket))
+            if stats:
+                return {stage: float(stats.get(stage, DEFAULT_STAGE_SECONDS[stage])) for stage in STAGES}
+        return dict(DEFAULT_STAGE_SECONDS)
+
+    def estimate_queued(self, context: Dict[str, Any], jobs_ahead: int, slots: int) -> float:
+        """ETA of a job waiting behind jobs_ahead others for one of `slots` workers"""
+        service_seconds = sum(self.stage_estimates(context["analysis_type"], context.get("pages")).values())
+        # Jobs ahead are assumed to cost about as much as this one
+        wait_seconds = jobs_ahead * service_seconds / max(1, slots)
+        return round(wait_seconds + service_seconds, 1)
+
+    def estimate_running(self, context: Dict[str, Any], progress_stage: Optional[str],
+                         stage_started_at: Optional[float]) -> float:
+        """ETA of a running job from its current stage and how long it has been in it"""
+        estimates = self.stage_estimates(context["analysis_type"], context.get("pages"))
+        stage = PROGRESS_STAGES.get(progress_stage or "", STAGES[0])
+        index = STAGES.index(stage)
+
+        elapsed = max(0.0, time.time() - stage_started_at) if stage_started_at else 0.0
+        # A stage running longer than usual is assumed to be nearly done, not finished
+        current_remaining = max(estimates[stage] - elapsed, estimates[stage] * 0.1)
+        return round(current_remaining + sum(estimates[later] for later in STAGES[index + 1:]), 1)
+
+    @staticmethod
+    def _stats_key(analysis_type: str, bucket: str) -> str:
+        return f"{KEY_PREFIX}:stats:{analysis_type}:{bucket}"
+
+    @staticmethod
+    def _context_key(task_id: str) -> str:
+        return f"{KEY_PREFIX}:task:{task_id}"
+
+
+def register_task(task_id: str, analysis_type: str, pages: Optional[int]) -> None:
+    """Register a submitted task with the ETA model, if available"""
+    model = get_eta_model()
+    if model is None:
+        return
+    try:
+        model.register_task(task_id, analysis_type, pages)
+    except Exception as e:
+        logger.warning(f"Could not register task {task_id} for ETA: {str(e)}")
+
+
+def record_timings(analysis_type: str, pages: Optional[int], timings: Dict[str, float]) -> None:
+    """Feed a completed analysis' timings to the ETA model (called by workers)"""
+    model = get_eta_model()
+    if model is None:
+        return
+    try:
+        model.record(analysis_type, pages, timings)
+    except Exception as e:
+        logger.warning(f"Could not record {analysis_type} timings for ETA: {str(e)}")
+
+
+def get_eta_model() -> Optional[EtaModel]:
+    """Get the shared ETA model, or None when Redis is not configured"""
+    if not hasattr(get_eta_model, '_instance'):
+        redis_client = get_redis_client()
+        get_eta_model._instance = EtaModel(redis_client) if redis_client is not None else None
+
+    return get_eta_model._instance
@@ -0,0 +1,454 @@
+"""
+Fair-Share Analysis Scheduling
+==============================
+
+Per-user virtual queues in Redis in front of Celery. Submissions are held in
+a queue per (routed Celery queue, lane, user) and dispatched into Celery only
+while the number of in-flight analyses on their Celery queue is below that
+queue's capacity, visiting users in weighted round-robin order (weights come
+from the user's tier). Each Celery queue (analysis, analysis_large) has its
+own in-flight count and cap, so long runs on the large-document pool never
+hold the small pool's dispatch slots. Caps default to the worker slots the
+queue monitor last saw consuming the queue. The interactive lane is always
+drained before the batch lane, and dispatched messages carry a Celery
+priority so interactive work also overtakes batch work in the broker.
+
+Queue-wait samples (virtual queue + broker wait) are recorded per user when a
+task starts so light users' wait can be compared against heavy users'.
+"""
+
+import json
+import logging
+import time
+import uuid
+from typing import Optional, Dict, Any, List
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis:fair"
+INTERACTIVE_LANE = "interactive"
+BATCH_LANE = "batch"
+LANES = [INTERACTIVE_LANE, BATCH_LANE]
+WAIT_SAMPLES_PER_USER = 500
+
+# Celery queue of analyses submitted without size routing (see task_routes)
+DEFAULT_ROUTE = "analysis"
+# SCHEDULER_MAX_INFLIGHT entry that caps every Celery queue
+ALL_ROUTES = "*"
+
+# Append a job to a user's lane queue and add the user to the lane ring when new.
+# KEYS: user queue, lane members set, lane ring, weights hash, routes set
+# ARGV: job json, user id, user weight, route
+_SUBMIT_SCRIPT = """
+redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('HSET', KEYS[4], ARGV[2], ARGV[3])
+redis.call('SADD', KEYS[5], ARGV[4])
+if redis.call('SADD', KEYS[2], ARGV[2]) == 1 then
+    redis.call('RPUSH', KEYS[3], ARGV[2])
+end
+return redis.call('LLEN', KEYS[1])
+"""
+
+# Put a job that could not be dispatched back at the front of its user's queue.
+# The pop may have taken the user off the lane ring (their queue emptied), so
+# the user is added back, at the head of the ring to get the lost turn back.
+# KEYS: user queue, lane members set, lane ring
+# ARGV: job json, user id
+_REQUEUE_SCRIPT = """
+redis.call('LPUSH', KEYS[1], ARGV[1])
+if redis.call('SADD', KEYS[2], ARGV[2]) == 1 then
+    redis.call('LPUSH', KEYS[3], ARGV[2])
+end
+return redis.call('LLEN', KEYS[1])
+"""
+
+# Pop the next job from a lane in weighted round-robin order. The user at the
+# head of the ring keeps the turn until it has used `weight` jobs, then moves
+# to the tail; users with empty queues leave the ring.
+# KEYS: lane ring, lane members set, lane credits hash, weights hash
+# ARGV: user queue key prefix
+_POP_SCRIPT = """
+local n = redis.call('LLEN', KEYS[1])
+for i = 1, n do
+    local user = redis.call('LINDEX', KEYS[1], 0)
+    if not user then
+        return false
+    end
+    local queue = ARGV[1] .. user
+    local job = redis.call('LPOP', queue)
+    if not job then
+        redis.call('LPOP', KEYS[1])
+        redis.call('SREM', KEYS[2], user)
+        redis.call('HDEL', KEYS[3], user)
+    else
+        local used = redis.call('HINCRBY', KEYS[3], user, 1)
+        local weight = tonumber(redis.call('HGET', KEYS[4], user) or '1')
+        if redis.call('LLEN', queue) == 0 then
+            redis.call('LPOP', KEYS[1])
+            redis.call('SREM', KEYS[2], user)
+            redis.call('HDEL', KEYS[3], user)
+        elseif used >= weight then
+            redis.call('LPOP', KEYS[1])
+            redis.call('RPUSH', KEYS[1], user)
+            redis.call('HDEL', KEYS[3], user)
+        end
+        return job
+    end
+end
+return false
+"""
+
+
+def user_tier(user: Dict[str, Any]) -> str:
+    """Get the scheduling tier of a user"""
+    if user.get("tier"):
+        return user["tier"]
+    return "admin" if user.get("is_admin") else "standard"
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class FairShareScheduler:
+    """Weighted round-robin dispatcher from per-user virtual queues into Celery"""
+
+    def __init__(self, redis_client, celery_app, max_inflight: Optional[Dict[str, int]] = None,
+                 default_max_inflight: int = 2,
+                 tier_weights: Optional[Dict[str, int]] = None,
+                 lane_priorities: Optional[Dict[str, int]] = None,
+                 stale_after_seconds: int = 1800):
+        self.redis = redis_client
+        self.celery_app = celery_app
+        # Configured caps per Celery queue (ALL_ROUTES for every queue); queues
+        # without one use the reported worker slots, else default_max_inflight
+        self.max_inflight = max_inflight or {}
+        self.default_max_inflight = default_max_inflight
+        self.tier_weights = tier_weights or {"standard": 1}
+        self.lane_priorities = lane_priorities or {INTERACTIVE_LANE: 0, BATCH_LANE: 9}
+        self.stale_after_seconds = stale_after_seconds
+        self._submit = redis_client.register_script(_SUBMIT_SCRIPT)
+        self._pop = redis_client.register_script(_POP_SCRIPT)
+        self._requeue = redis_client.register_script(_REQUEUE_SCRIPT)
+
+    def submit(self, task_name: str, task_id: str, kwargs: Dict[str, Any], user_id: str,
+               tier: str = "standard", lane: str = INTERACTIVE_LANE,
+               options: Optional[Dict[str, Any]] = None) -> int:
+        """Queue a task for a user and dispatch what capacity allows.
+
+        Returns the job's position in the user's lane queue at submit time.
+        """
+        options = options or {}
+        route = options.get("queue") or DEFAULT_ROUTE
+        job = {
+            "task_name": task_name,
+            "task_id": task_id,
+            "kwargs": kwargs,
+            "options": options,
+            "user_id": str(user_id),
+            "lane": lane,
+            "route": route,
+            "enqueued_at": time.time()
+        }
+        position = self._submit(
+            keys=[
+                self._queue_key(route, lane, user_id),
+                self._members_key(route, lane),
+                self._ring_key(route, lane),
+                self._weights_key(),
+                self._routes_key()
+            ],
+            args=[json.dumps(job), str(user_id), self.tier_weights.get(tier, 1), route]
+        )
+        try:
+            self.dispatch()
+        except Exception as e:
+            # The job is safely queued; the next submit or finished task dispatches it
+            logger.warning(f"Dispatch after submit failed, task {task_id} stays queued: {str(e)}")
+        return int(position)
+
+    def dispatch(self) -> int:
+        """Move jobs into Celery while each Celery queue's in-flight work is below its capacity.
+
+        Only one dispatcher runs at a time; callers that lose the lock return
+        immediately since the holder will drain whatever capacity exists.
+        """
+        lock_key = f"{KEY_PREFIX}:dispatch-lock"
+        token = uuid.uuid4().hex
+        if not self.redis.set(lock_key, token, nx=True, px=5000):
+            return 0
+
+        dispatched = 0
+        try:
+            for route in self._routes():
+                dispatched += self._dispatch_route(route)
+        finally:
+            if self.redis.get(lock_key) == token:
+                self.redis.delete(lock_key)
+
+        if dispatched:
+            logger.info(f"Fair-share dispatcher sent {dispatched} analyses to Celery")
+        return dispatched
+
+    def capacity(self, route: str) -> int:
+        """In-flight cap of a Celery queue: configured, else the worker slots reported for it"""
+        if route in self.max_inflight:
+            return self.max_inflight[route]
+        if ALL_ROUTES in self.max_inflight:
+            return self.max_inflight[ALL_ROUTES]
+        slots = self.redis.hget(self._slots_key(), route)
+        return int(slots) if slots else self.default_max_inflight
+
+    def total_capacity(self) -> int:
+        """Sum of the in-flight caps of the Celery queues jobs have been submitted for"""
+        return sum(self.capacity(route) for route in self._routes())
+
+    def pending_count(self) -> int:
+        """Jobs waiting in the virtual queues of every Celery queue and lane"""
+        queues = [
+            self._queue_key(route, lane, user)
+            for route in self._routes()
+            for lane in LANES
+            for user in self.redis.smembers(self._members_key(route, lane)) or set()
+        ]
+        if not queues:
+            return 0
+        pipe = self.redis.pipeline(transaction=False)
+        for queue in queues:
+            pipe.llen(queue)
+        return sum(pipe.execute())
+
+    def record_worker_slots(self, slots: Dict[str, int], ttl_seconds: int) -> None:
+        """Store the worker slots consuming each Celery queue (from the queue monitor)"""
+        pipe = self.redis.pipeline()
+        pipe.delete(self._slots_key())
+        if slots:
+            pipe.hset(self._slots_key(), mapping=slots)
+            pipe.expire(self._slots_key(), ttl_seconds)
+        pipe.execute()
+
+    def _dispatch_route(self, route: str) -> int:
+        """Dispatch the jobs of one Celery queue up to its capacity"""
+        inflight_key = self._inflight_key(route)
+        # Entries whose postrun signal never arrived (killed workers) expire;
+        # running tasks refresh theirs with heartbeats
+        self.redis.zremrangebyscore(inflight_key, 0, time.time() - self.stale_after_seconds)
+
+        capacity = self.capacity(route)
+        dispatched = 0
+        while self.redis.zcard(inflight_key) < capacity:
+            job = self._next_job(route)
+            if job is None:
+                break
+
+            self.redis.zadd(inflight_key, {job["task_id"]: time.time()})
+            try:
+                self.celery_app.send_task(
+                    job["task_name"],
+                    kwargs=job["kwargs"],
+                    task_id=job["task_id"],
+                    priority=self.lane_priorities.get(job["lane"]),
+                    headers={"fair_share": {
+                        "user_id": job["user_id"],
+                        "lane": job["lane"],
+                        "queue": route,
+                        "enqueued_at": job["enqueued_at"]
+                    }},
+                    **job["options"]
+                )
+            except Exception:
+                # Put the job back at the front of its queue for the next dispatch
+                self.redis.zrem(inflight_key, job["task_id"])
+                self._requeue(
+                    keys=[
+                        self._queue_key(route, job["lane"], job["user_id"]),
+                        self._members_key(route, job["lane"]),
+                        self._ring_key(route, job["lane"])
+                    ],
+                    args=[json.dumps(job), job["user_id"]]
+                )
+                raise
+            dispatched += 1
+        return dispatched
+
+    def task_started(self, task_id: str, fair_share: Optional[Dict[str, Any]],
+                     queue: Optional[str] = None) -> None:
+        """Record a task start: count it in flight on its Celery queue and sample its queue wait"""
+        self.redis.zadd(self._inflight_key(queue or DEFAULT_ROUTE), {task_id: time.time()})
+        if not fair_share or not fair_share.get("enqueued_at"):
+            return
+
+        wait_seconds = max(0.0, time.time() - float(fair_share["enqueued_at"]))
+        user_id = str(fair_share.get("user_id", "unknown"))
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lpush(self._wait_key(user_id), round(wait_seconds, 3))
+        pipe.ltrim(self._wait_key(user_id), 0, WAIT_SAMPLES_PER_USER - 1)
+        pipe.sadd(f"{KEY_PREFIX}:wait-users", user_id)
+        pipe.execute()
+
+    def heartbeat(self, task_id: str, queue: Optional[str] = None) -> None:
+        """Refresh a running task's in-flight entry so it is not taken for a dead task"""
+        self.redis.zadd(self._inflight_key(queue or DEFAULT_ROUTE), {task_id: time.time()}, xx=True)
+
+    def task_finished(self, task_id: str, queue: Optional[str] = None) -> None:
+        """Free the task's slot on its Celery queue and dispatch the next job"""
+        self.redis.zrem(self._inflight_key(queue or DEFAULT_ROUTE), task_id)
+        self.dispatch()
+
+    def queue_position(self, task_id: str, user_id: str) -> Optional[int]:
+        """Position (1-based) of a job still waiting in one of the user's lane queues"""
+        for route in self._routes():
+            for lane in LANES:
+                for index, raw in enumerate(self.redis.lrange(self._queue_key(route, lane, user_id), 0, -1)):
+                    if json.loads(raw)["task_id"] == task_id:
+                        return index + 1
+        return None
+
+    def jobs_ahead(self, task_id: str, user_id: str) -> Optional[int]:
+        """Estimated number of jobs dispatched before a job still waiting in the virtual queues.
+
+        Only jobs for the same Celery queue count. Lanes drain in order and
+        users take turns within a lane, so a job at position p waits for every
+        job in earlier lanes plus about p jobs from each other user in its
+        lane (tier weights are ignored).
+        """
+        user_key = str(user_id)
+        for route in self._routes():
+            earlier_lanes = 0
+            for lane in LANES:
+                queues = {
+                    user: [
+                        json.loads(raw)["task_id"]
+                        for raw in self.redis.lrange(self._queue_key(route, lane, user), 0, -1)
+                    ]
+                    for user in self.redis.smembers(self._members_key(route, lane)) or set()
+                }
+                if task_id in queues.get(user_key, []):
+                    position = queues[user_key].index(task_id) + 1
+                    others = sum(min(len(tasks), position) for user, tasks in queues.items() if user != user_key)
+                    return earlier_lanes + position - 1 + others
+                earlier_lanes += sum(len(tasks) for tasks in queues.values())
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get in-flight work per Celery queue, pending counts per lane and user and queue-wait percentiles"""
+        pending: Dict[str, Dict[str, int]] = {lane: {} for lane in LANES}
+        routes: Dict[str, Dict[str, Any]] = {}
+        for route in self._routes():
+            route_pending = {}
+            for lane in LANES:
+                users = self.redis.smembers(self._members_key(route, lane)) or set()
+                counts = {user: self.redis.llen(self._queue_key(route, lane, user)) for user in users}
+                for user, count in counts.items():
+                    pending[lane][user] = pending[lane].get(user, 0) + count
+                route_pending[lane] = sum(counts.values())
+            routes[route] = {
+                "max_inflight": self.capacity(route),
+                "inflight": self.redis.zcard(self._inflight_key(route)),
+                "pending": route_pending
+            }
+
+        queue_wait: Dict[str, Dict[str, float]] = {}
+        for user in self.redis.smembers(f"{KEY_PREFIX}:wait-users") or set():
+            samples = [float(sample) for sample in self.redis.lrange(self._wait_key(user), 0, -1)]
+            queue_wait[user] = {
+                "samples": len(samples),
+                "p50_seconds": _percentile(samples, 50),
+                "p95_seconds": _percentile(samples, 95),
+                "max_seconds": max(samples) if samples else 0.0
+            }
+
+        return {
+            "max_inflight": sum(route["max_inflight"] for route in routes.values()),
+            "inflight": sum(route["inflight"] for route in routes.values()),
+            "routes": routes,
+            "tier_weights": self.tier_weights,
+            "pending": pending,
+            "queue_wait": queue_wait
+        }
+
+    def _routes(self) -> List[str]:
+        """Celery queues jobs have been submitted for"""
+        return sorted(self.redis.smembers(self._routes_key()) or ())
+
+    def _next_job(self, route: str) -> Optional[Dict[str, Any]]:
+        """Pop a Celery queue's next job, draining the interactive lane before the batch lane"""
+        for lane in LANES:
+            raw = self._pop(
+                keys=[
+                    self._ring_key(route, lane),
+                    self._members_key(route, lane),
+                    f"{KEY_PREFIX}:{route}:credits:{lane}",
+                    self._weights_key()
+                ],
+                args=[f"{KEY_PREFIX}:{route}:queue:{lane}:"]
+            )
+            if raw:
+                return json.loads(raw)
+        return None
+
+    @staticmethod
+    def _queue_key(route: str, lane: str, user_id: str) -> str:
+        return f"{KEY_PREFIX}:{route}:queue:{lane}:{user_id}"
+
+    @staticmethod
+    def _members_key(route: str, lane: str) -> str:
+        return f"{KEY_PREFIX}:{route}:members:{lane}"
+
+    @staticmethod
+    def _ring_key(route: str, lane: str) -> str:
+        return f"{KEY_PREFIX}:{route}:ring:{lane}"
+
+    @staticmethod
+    def _routes_key() -> str:
+        return f"{KEY_PREFIX}:routes"
+
+    @staticmethod
+    def _slots_key() -> str:
+        return f"{KEY_PREFIX}:worker-slots"
+
+    @staticmethod
+    def _weights_key() -> str:
+        return f"{KEY_PREFIX}:weights"
+
+    @staticmethod
+    def _inflight_key(route: str) -> str:
+        return f"{KEY_PREFIX}:{route}:inflight"
+
+    @staticmethod
+    def _wait_key(user_id: str) -> str:
+        return f"{KEY_PREFIX}:wait:{user_id}"
+
+
+def get_fair_share_scheduler() -> Optional[FairShareScheduler]:
+    """Get the shared scheduler, or None when fair-share scheduling is disabled"""
+    if not hasattr(get_fair_share_scheduler, '_instance'):
+        from app.config import DatabaseConfig
+        from app.celery_app import celery_app
+        scheduler_config = DatabaseConfig.get_scheduler_config()
+        redis_client = get_redis_client()
+
+        if not scheduler_config["fair_share_enabled"] or redis_client is None:
+            get_fair_share_scheduler._instance = None
+        else:
+            get_fair_share_scheduler._instance = FairShareScheduler(
+                redis_client,
+                celery_app,
+                max_inflight=scheduler_config["max_inflight"],
+                default_max_inflight=scheduler_config["default_max_inflight"],
+                tier_weights=scheduler_config["tier_weights"],
+                lane_priorities={
+                    INTERACTIVE_LANE: scheduler_config["interactive_priority"],
+                    BATCH_LANE: scheduler_config["batch_priority"]
+                },
+                stale_after_seconds=scheduler_config["stale_after_seconds"]
+            )
+
+    return get_fair_share_scheduler._instance
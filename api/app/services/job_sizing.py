@@ -0,0 +1,132 @@
+"""
+Analysis Job Sizing
+===================
+
+Estimates the cost of an analysis from the document's page count and byte
+size, routes large documents to a separate queue (served by its own worker
+pool) and derives per-task soft/hard time limits from the estimate, so a
+500-page annual report is not held to the limits of a 2-page memo.
+
+Time-limit kills are counted per limit policy ("fixed" when sizing is
+disabled, "adaptive" otherwise) and size class so the two can be compared.
+"""
+
+import os
+import re
+import logging
+from typing import Optional, Dict, Any
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "analysis:timelimits"
+SMALL_QUEUE = "analysis"
+LARGE_QUEUE = "analysis_large"
+
+# Fallback page counter for when pypdf is not importable; counts page objects
+_PAGE_OBJECT_PATTERN = re.compile(rb"/Type\s*/Page(?![s\w])")
+_MAX_SCAN_BYTES = 100 * 1024 * 1024
+
+
+def count_pdf_pages(file_path: str) -> Optional[int]:
+    """Count the pages of a PDF, or None when it cannot be read"""
+    try:
+        from pypdf import PdfReader
+        return len(PdfReader(file_path).pages)
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not read page count of {file_path}: {str(e)}")
+        return None
+
+    try:
+        if os.path.getsize(file_path) > _MAX_SCAN_BYTES:
+            return None
+        with open(file_path, "rb") as f:
+            return len(_PAGE_OBJECT_PATTERN.findall(f.read())) or None
+    except OSError:
+        return None
+
+
+def estimate_job(file_path: str) -> Optional[Dict[str, Any]]:
+    """Estimate an analysis job's size class, queue and time limits.
+
+    Returns None when size-aware routing is disabled, in which case the
+    global queue and time limits apply.
+    """
+    from app.config import DatabaseConfig
+    sizing_config = DatabaseConfig.get_job_sizing_config()
+    if not sizing_config["enabled"]:
+        return None
+
+    try:
+        size_bytes = os.path.getsize(file_path)
+    except OSError:
+        size_bytes = 0
+    pages = count_pdf_pages(file_path)
+
+    # Scanned or unreadable PDFs fall back to a page estimate from their size
+    effective_pages = pages if pages else max(1, size_bytes // sizing_config["bytes_per_page"])
+    is_large = (
+        effective_pages >= sizing_config["large_pages"]
+        or size_bytes >= sizing_config["large_bytes"]
+    )
+
+    soft_time_limit = min(
+        sizing_config["max_time_limit_seconds"],
+        sizing_config["base_time_limit_seconds"] + sizing_config["per_page_seconds"] * effective_pages
+    )
+    return {
+        "pages": pages,
+        "bytes": size_bytes,
+        "size_class": "large" if is_large else "small",
+        "queue": LARGE_QUEUE if is_large else SMALL_QUEUE,
+        "soft_time_limit": soft_time_limit,
+        "time_limit": soft_time_limit + sizing_config["hard_limit_grace_seconds"]
+    }
+
+
+def routing_options(estimate: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Celery options (queue and time limits) for an estimate"""
+    if not estimate:
+        return {}
+    return {
+        "queue": estimate["queue"],
+        "soft_time_limit": estimate["soft_time_limit"],
+        "time_limit": estimate["time_limit"]
+    }
+
+
+def record_time_limit_event(size_class: Optional[str], event: str) -> None:
+    """Count a completion or a soft/hard time-limit kill"""
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return
+    policy = "adaptive" if size_class else "fixed"
+    try:
+        redis_client.hincrby(STATS_KEY, f"{policy}:{size_class or 'all'}:{event}", 1)
+    except Exception as e:
+        logger.warning(f"Could not record time-limit event {event}: {str(e)}")
+
+
+def get_time_limit_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Get completion and kill counts per limit policy and size class"""
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return {}
+
+    stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for field, value in (redis_client.hgetall(STATS_KEY) or {}).items():
+        policy, size_class, event = field.split(":", 2)
+        counts = stats.setdefault(policy, {}).setdefault(
+            size_class, {"completed": 0, "soft_kills": 0, "hard_kills": 0}
+        )
+        counts[event] = int(value)
+
+    for size_classes in stats.values():
+        for counts in size_classes.values():
+            total = counts["completed"] + counts["soft_kills"] + counts["hard_kills"]
+            kills = counts["soft_kills"] + counts["hard_kills"]
+            counts["kill_rate"] = round(kills / total, 4) if total else 0.0
+    return stats
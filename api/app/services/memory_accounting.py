@@ -0,0 +1,209 @@
+"""
+Per-Task Memory Accounting
+==========================
+
+Measures the peak resident set size of each analysis task and, optionally,
+the top Python allocation sites (tracemalloc). Peaks are kept per analysis
+type and document size bucket in Redis so worker boxes and the
+memory-based recycle threshold can be sized from real workloads.
+
+Peak RSS comes from VmHWM in /proc/self/status, which is reset at task start
+through /proc/self/clear_refs. Both are Linux-only; elsewhere the peak falls
+back to ru_maxrss, which is the process lifetime peak. The reset acts on the
+whole process, so where tasks share a process (thread and gevent pools, the
+embedded executor) one task's start would wipe the others' peaks: there the
+peak is not tracked and only the process RSS is reported, without samples.
+tracemalloc is process-wide too; it runs while any tracking task wants it and
+its peak covers every task traced meanwhile.
+"""
+
+import os
+import logging
+import resource
+import threading
+import tracemalloc
+from typing import Optional, Dict, Any, List
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "worker:memory"
+SAMPLES_PER_BUCKET = 500
+MB = 1024 * 1024
+
+# Upper bounds (bytes) of the document size buckets used in the report
+SIZE_BUCKETS = [
+    ("<1MB", 1 * MB),
+    ("1-5MB", 5 * MB),
+    ("5-20MB", 20 * MB),
+    ("20-50MB", 50 * MB),
+]
+LARGEST_BUCKET = ">50MB"
+
+# Trackers currently using tracemalloc, which is stopped when the last one finishes
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def size_bucket(size_bytes: int) -> str:
+    """Get the size bucket label for a document size"""
+    for label, upper in SIZE_BUCKETS:
+        if size_bytes < upper:
+            return label
+    return LARGEST_BUCKET
+
+
+def _read_status_bytes(field: str) -> Optional[int]:
+    """Read a kB field such as VmRSS from /proc/self/status"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Reset VmHWM to the current RSS; returns False where unsupported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes() -> int:
+    """Peak RSS since the last reset, or the process lifetime peak"""
+    peak = _read_status_bytes("VmHWM")
+    if peak is not None:
+        return peak
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _start_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class TaskMemoryTracker:
+    """Tracks RSS (and optionally Python allocations) across one task.
+
+    track_peak is only safe when the task has the process to itself (prefork
+    children); otherwise the peak is left alone and stop() reports the
+    process RSS as the peak with peak_is_task_local False.
+    """
+
+    def __init__(self, trace_allocations: bool = False, top_allocations: int = 5,
+                 track_peak: bool = True):
+        self.trace_allocations = trace_allocations
+        self.top_allocations = top_allocations
+        self.track_peak = track_peak
+        self.start_rss = 0
+        self.peak_reset = False
+        self._tracing = False
+
+    def start(self) -> None:
+        """Record the baseline and reset the peak counter"""
+        self.peak_reset = self.track_peak and _reset_peak_rss()
+        self.start_rss = _read_status_bytes("VmRSS") or 0
+        if self.trace_allocations and not self._tracing:
+            _start_tracing()
+            self._tracing = True
+
+    def stop(self) -> Dict[str, Any]:
+        """Get the task's memory figures and stop tracing"""
+        end_rss = _read_status_bytes("VmRSS") or 0
+        peak_rss = _peak_rss_bytes() if self.track_peak else end_rss
+        stats: Dict[str, Any] = {
+            "start_rss_mb": round(self.start_rss / MB, 1),
+            "end_rss_mb": round(end_rss / MB, 1),
+            "peak_rss_mb": round(peak_rss / MB, 1),
+            "peak_is_task_local": self.peak_reset,
+        }
+
+        if self._tracing:
+            snapshot = tracemalloc.take_snapshot()
+            _, traced_peak = tracemalloc.get_traced_memory()
+            _stop_tracing()
+            self._tracing = False
+            stats["python_peak_mb"] = round(traced_peak / MB, 1)
+            # With tasks sharing the process it covers every task traced meanwhile
+            stats["python_peak_is_process_wide"] = not self.track_peak
+            stats["top_allocations"] = self._top_allocations(snapshot)
+
+        return stats
+
+    def _top_allocations(self, snapshot) -> List[Dict[str, Any]]:
+        """Summarize the largest allocation sites of a snapshot"""
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        return [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count
+            }
+            for stat in snapshot.statistics("lineno")[:self.top_allocations]
+        ]
+
+
+def record_task_memory(analysis_type: str, document_bytes: int, peak_rss_mb: float) -> None:
+    """Keep a task's peak RSS in its analysis type and size bucket samples"""
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return
+    try:
+        key = f"{KEY_PREFIX}:{analysis_type}:{size_bucket(document_bytes)}"
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.lpush(key, peak_rss_mb)
+        pipe.ltrim(key, 0, SAMPLES_PER_BUCKET - 1)
+        pipe.sadd(f"{KEY_PREFIX}:buckets", key)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not record memory sample for {analysis_type}: {str(e)}")
+
+
+def get_memory_report() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Get peak RSS statistics per analysis type and document size bucket"""
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return {}
+
+    report: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for key in sorted(redis_client.smembers(f"{KEY_PREFIX}:buckets") or set()):
+        analysis_type, bucket = key[len(KEY_PREFIX) + 1:].split(":", 1)
+        samples = sorted(float(sample) for sample in redis_client.lrange(key, 0, -1))
+        if not samples:
+            continue
+        report.setdefault(analysis_type, {})[bucket] = {
+            "samples": len(samples),
+            "avg_peak_rss_mb": round(sum(samples) / len(samples), 1),
+            "p95_peak_rss_mb": samples[max(0, int(round(0.95 * len(samples))) - 1)],
+            "max_peak_rss_mb": samples[-1]
+        }
+    return report
+
+
+def document_size(file_path: str) -> int:
+    """Size of the analysed document, 0 when it is not on local disk"""
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
@@ -0,0 +1,127 @@
+"""
+Task Progress Reporter
+======================
+
+Single write path for an analysis task's progress: Celery task state in the
+result backend and report status in the report repository. Stage changes and
+report status changes are written immediately; progress within a stage (such
+as per-step updates from inside the crew) is coalesced so that a write
+happens at most every min_interval_seconds and only once progress has moved
+by at least min_delta points. Every write is also published as a task event
+(see app.services.task_events) for clients following the task.
+"""
+
+import time
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+from app.celery_app import TaskStatus
+from app.services.task_events import publish_task_event, STATUS_IN_PROGRESS
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """Throttled progress updates for one running analysis task"""
+
+    def __init__(self, task, report_id: str, user_id: str, analysis_reports,
+                 min_interval_seconds: float = 2.0, min_delta: int = 5):
+        self.task = task
+        self.report_id = report_id
+        self.user_id = user_id
+        self.analysis_reports = analysis_reports
+        self.min_interval_seconds = min_interval_seconds
+        self.min_delta = min_delta
+
+        self.stage: Optional[str] = None
+        self.stage_started_at: Optional[float] = None
+        self.report_status: Optional[str] = None
+        self.writes = 0
+        self._state: Dict[str, Any] = {"progress": 0, "message": ""}
+        self._written_progress = 0
+        self._written_at = 0.0
+        self._crew_steps = 0
+        self._crew_range = (30, 70)
+        self._lock = threading.Lock()
+
+    @property
+    def progress(self) -> int:
+        """Latest recorded progress, whether or not it has been written yet"""
+        return self._state["progress"]
+
+    def update(self, progress: int, message: str = "", stage: Optional[str] = None,
+               report_status: Optional[str] = None, summary: Optional[str] = None,
+               report_path: Optional[str] = None, force: bool = False) -> None:
+        """Record progress; written now on a stage or report status change, otherwise throttled"""
+        with self._lock:
+            now = time.time()
+            if stage is not None and stage != self.stage:
+                self.stage = stage
+                self.stage_started_at = now
+                force = True
+
+            self._state = {"progress": progress, "message": message}
+
+            if report_status is not None and report_status != self.report_status:
+                # The report record changes only when its status does
+                kwargs = {"report_path": report_path} if report_path else {}
+                self.analysis_reports.update_report(
+                    report_id=self.report_id,
+                    user_id=self.user_id,
+                    summary=summary if summary is not None else message,
+                    status=report_status,
+                    **kwargs
+                )
+                self.report_status = report_status
+                force = True
+
+            due = (
+                now - self._written_at >= self.min_interval_seconds
+                and progress - self._written_progress >= self.min_delta
+            )
+            if force or due:
+                self._write(now)
+
+    def retarget(self, report_id: str, user_id: str, summary: str = "") -> None:
+        """Write to another report from now on (the run was handed over to it)"""
+        with self._lock:
+            self.report_id = report_id
+            self.user_id = user_id
+            if self.report_status is not None:
+                # The new report is still pending; bring it to the run's status
+                self.analysis_reports.update_report(
+                    report_id=report_id,
+                    user_id=user_id,
+                    summary=summary or self._state["message"],
+                    status=self.report_status
+                )
+
+    def start_crew(self, start_progress: int, end_progress: int) -> None:
+        """Set the progress range that crew steps advance through"""
+        self._crew_range = (start_progress, end_progress)
+        self._crew_steps = 0
+
+    def crew_step(self, step_output: Any = None) -> None:
+        """Crew step_callback: advance progress within the crew range.
+
+        The number of steps a crew takes is not known up front, so progress
+        approaches the end of the range, halving the distance every four steps.
+        """
+        self._crew_steps += 1
+        start, end = self._crew_range
+        progress = start + int((end - start) * (1 - 0.5 ** (self._crew_steps / 4)))
+        self.update(progress, f"Running AI analysis (step {self._crew_steps})...")
+
+    def _write(self, now: float) -> None:
+        """Write the current state to the result backend"""
+        meta = {**self._state, "stage": self.stage, "stage_started_at": self.stage_started_at}
+        try:
+            self.task.update_state(state=TaskStatus.STARTED, meta=meta)
+        except Exception as e:
+            logger.warning(f"Could not update progress of report {self.report_id}: {str(e)}")
+        publish_task_event(self.task.request.id, STATUS_IN_PROGRESS, meta["progress"], meta["message"],
+                           stage=self.stage, report_id=self.report_id)
+        self.writes += 1
+        self._written_progress = self._state["progress"]
+        self._written_at = now
@@ -0,0 +1,212 @@
+"""
+Queue and Worker Monitor
+========================
+
+Background collector that samples broker queue depths, fair-share backlog
+and Celery worker state (active, reserved, stats, consumed queues) on an
+interval and keeps the latest snapshot in memory. The task monitoring
+endpoints serve this snapshot instead of running blocking inspect()
+broadcasts per request. The worker slots consuming each queue are handed to
+the fair-share scheduler, which caps each queue's in-flight work by them.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Broker queues reported by the monitor, keyed by the name used in responses
+MONITORED_QUEUES = {
+    "analysis": "analysis",
+    "analysis_large": "analysis_large",
+    "default": "celery",
+}
+
+# kombu's Redis transport keeps priority steps 1-9 in "<queue>\x06\x16<step>" lists
+PRIORITY_SEPARATOR = "\x06\x16"
+PRIORITY_STEPS = range(1, 10)
+
+
+def _summarize_task(worker: str, task: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the fields of an inspect() task entry the API exposes"""
+    return {
+        "task_id": task.get('id'),
+        "name": task.get('name'),
+        "worker": worker,
+        "args": task.get('args', []),
+        "kwargs": task.get('kwargs', {}),
+        "time_start": task.get('time_start')
+    }
+
+
+class QueueMonitor:
+    """Periodically samples queue and worker state into an in-memory snapshot"""
+
+    def __init__(self, celery_app, interval_seconds: float = 5.0, inspect_timeout: float = 1.0):
+        self.celery_app = celery_app
+        self.interval_seconds = interval_seconds
+        self.inspect_timeout = inspect_timeout
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def collect(self) -> Dict[str, Any]:
+        """Take a new snapshot (blocking; run it off the event loop)"""
+        from app.services.embedded_executor import get_embedded_executor
+        executor = get_embedded_executor()
+        if executor is not None:
+            # No broker or workers to inspect; the executor reports its own pool
+            snapshot = {"collected_at": time.time(), **executor.monitor_state()}
+        else:
+            snapshot = {
+                "collected_at": time.time(),
+                "queues": self._queue_lengths(),
+                "fair_share_pending": self._fair_share_pending(),
+                **self._worker_state()
+            }
+        self._snapshot = snapshot
+        self._publish_worker_slots()
+        self._publish_autoscaling()
+        return snapshot
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Latest snapshot with its age, or None before the first collection"""
+        if self._snapshot is None:
+            return None
+        return {**self._snapshot, "age_seconds": round(time.time() - self._snapshot["collected_at"], 3)}
+
+    async def get_snapshot(self) -> Dict[str, Any]:
+        """Latest snapshot, collecting one off the event loop if none exists yet"""
+        if self._snapshot is None:
+            await asyncio.to_thread(self.collect)
+        return self.snapshot()
+
+    def start(self) -> None:
+        """Start the background collection loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background collection loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.collect)
+            except Exception as e:
+                logger.warning(f"Queue monitor collection failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def _publish_worker_slots(self) -> None:
+        """Hand the worker slots per queue to the fair-share scheduler"""
+        from app.services.fair_share import get_fair_share_scheduler
+        scheduler = get_fair_share_scheduler()
+        queue_slots = self._snapshot.get("queue_slots")
+        # No reply from any worker (inspect timed out) keeps the last known slots
+        if scheduler is None or not queue_slots:
+            return
+        try:
+            # Kept a few intervals so a stopped monitor falls back to the default cap
+            scheduler.record_worker_slots(queue_slots, ttl_seconds=max(60, int(self.interval_seconds * 6)))
+        except Exception as e:
+            logger.warning(f"Could not publish worker slots: {str(e)}")
+
+    def _publish_autoscaling(self) -> None:
+        """Refresh the desired-worker signal from the new snapshot"""
+        from app.services.admission import get_admission_controller
+        controller = get_admission_controller()
+        if controller is None:
+            return
+        try:
+            controller.publish(controller.estimate(self.snapshot(), additional_jobs=0))
+        except Exception as e:
+            logger.warning(f"Could not publish autoscaling signal: {str(e)}")
+
+    def _queue_lengths(self) -> Dict[str, int]:
+        """Depth of each broker queue across all priority steps"""
+        redis_client = get_redis_client()
+        if redis_client is None:
+            return {name: 0 for name in MONITORED_QUEUES}
+
+        pipe = redis_client.pipeline(transaction=False)
+        for queue in MONITORED_QUEUES.values():
+            pipe.llen(queue)
+            for step in PRIORITY_STEPS:
+                pipe.llen(f"{queue}{PRIORITY_SEPARATOR}{step}")
+        lengths = pipe.execute()
+
+        per_queue = 1 + len(PRIORITY_STEPS)
+        return {
+            name: sum(lengths[index * per_queue:(index + 1) * per_queue])
+            for index, name in enumerate(MONITORED_QUEUES)
+        }
+
+    def _fair_share_pending(self) -> Dict[str, int]:
+        """Submissions still held in the fair-share virtual queues, per lane"""
+        from app.services.fair_share import get_fair_share_scheduler
+        scheduler = get_fair_share_scheduler()
+        if scheduler is None:
+            return {}
+        pending = scheduler.get_stats()["pending"]
+        return {lane: sum(users.values()) for lane, users in pending.items()}
+
+    def _worker_state(self) -> Dict[str, Any]:
+        """Active and reserved tasks and stats of every worker"""
+        inspect = self.celery_app.control.inspect(timeout=self.inspect_timeout)
+        active = inspect.active() or {}
+        reserved = inspect.reserved() or {}
+        stats = inspect.stats() or {}
+        active_queues = inspect.active_queues() or {}
+
+        active_tasks: List[Dict[str, Any]] = [
+            _summarize_task(worker, task) for worker, tasks in active.items() for task in tasks
+        ]
+
+        workers = []
+        queue_slots: Dict[str, int] = {}
+        for worker, worker_stat in stats.items():
+            queues = [queue.get('name') for queue in active_queues.get(worker, []) if queue.get('name')]
+            slots = worker_stat.get('pool', {}).get('max-concurrency', 0)
+            for queue in queues:
+                queue_slots[queue] = queue_slots.get(queue, 0) + slots
+            workers.append({
+                "worker": worker,
+                "active_tasks": len(active.get(worker, [])),
+                "reserved_tasks": len(reserved.get(worker, [])),
+                "total_tasks": sum(worker_stat.get('total', {}).values()),
+                "queues": queues,
+                "pool": worker_stat.get('pool', {}),
+                "rusage": worker_stat.get('rusage', {})
+            })
+
+        return {
+            "workers": workers,
+            "queue_slots": queue_slots,
+            "active_tasks": active_tasks,
+            "reserved_count": sum(len(tasks) for tasks in reserved.values())
+        }
+
+
+def get_queue_monitor() -> QueueMonitor:
+    """Get the shared queue monitor"""
+    if not hasattr(get_queue_monitor, '_instance'):
+        from app.config import DatabaseConfig
+        from app.celery_app import celery_app
+        monitor_config = DatabaseConfig.get_monitor_config()
+        get_queue_monitor._instance = QueueMonitor(
+            celery_app,
+            interval_seconds=monitor_config["interval_seconds"],
+            inspect_timeout=monitor_config["inspect_timeout_seconds"]
+        )
+
+    return get_queue_monitor._instance
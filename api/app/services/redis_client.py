@@ -0,0 +1,38 @@
+"""
+Shared Redis Client
+===================
+
+Lazily created Redis client shared by the API process and Celery workers for
+lightweight coordination state (in-flight registries, counters, caches).
+"""
+
+import logging
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import redis
+
+logger = logging.getLogger(__name__)
+
+
+def get_redis_client() -> Optional["redis.Redis"]:
+    """Get the shared Redis client, or None when Redis is not configured"""
+    if not hasattr(get_redis_client, '_instance'):
+        from app.celery_app import REDIS_URL
+        
+        if not REDIS_URL:
+            logger.info("REDIS_URL is not set, Redis-backed features are disabled")
+            get_redis_client._instance = None
+        else:
+            import redis
+            
+            # redis-py resets its connection pool after fork, so a single
+            # client is safe to share between the API and prefork workers
+            get_redis_client._instance = redis.from_url(
+                REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=5
+            )
+    
+    return get_redis_client._instance
@@ -0,0 +1,96 @@
+"""
+Completed Analysis Result Cache
+===============================
+
+Redis-backed cache of completed analysis results keyed by the same request
+fingerprint used for in-flight coalescing (document checksum, analysis type,
+normalized query and model configuration). A hit lets the API create a
+completed report immediately instead of queueing another crew run.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis:result"
+STATS_KEY = f"{KEY_PREFIX}:stats"
+
+
+class ResultCache:
+    """Cache of completed analysis results with hit/miss accounting"""
+
+    def __init__(self, redis_client, ttl_seconds: int = 86400):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, fingerprint: str, analysis_type: str) -> Optional[Dict[str, Any]]:
+        """Get a cached result, recording a hit or a miss"""
+        raw = self.redis.get(self._key(fingerprint))
+        outcome = "hits" if raw else "misses"
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(STATS_KEY, outcome, 1)
+        pipe.hincrby(STATS_KEY, f"{outcome}:{analysis_type}", 1)
+        pipe.execute()
+
+        return json.loads(raw) if raw else None
+
+    def store(self, fingerprint: str, result: str) -> None:
+        """Store a completed result"""
+        entry = {"result": result, "stored_at": datetime.utcnow().isoformat()}
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(self._key(fingerprint), json.dumps(entry), ex=self.ttl_seconds)
+        pipe.hincrby(STATS_KEY, "stores", 1)
+        pipe.execute()
+
+    def invalidate(self, fingerprint: str) -> bool:
+        """Drop a cached result"""
+        return bool(self.redis.delete(self._key(fingerprint)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        raw = self.redis.hgetall(STATS_KEY) or {}
+        hits = int(raw.get("hits", 0))
+        misses = int(raw.get("misses", 0))
+        by_type: Dict[str, Dict[str, int]] = {}
+        for field, value in raw.items():
+            if ":" not in field:
+                continue
+            counter, analysis_type = field.split(":", 1)
+            by_type.setdefault(analysis_type, {"hits": 0, "misses": 0})[counter] = int(value)
+
+        lookups = hits + misses
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "stores": int(raw.get("stores", 0)),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "by_analysis_type": by_type
+        }
+
+    @staticmethod
+    def _key(fingerprint: str) -> str:
+        return f"{KEY_PREFIX}:{fingerprint}"
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Get the shared result cache, or None when caching is unavailable"""
+    if not hasattr(get_result_cache, '_instance'):
+        from app.config import DatabaseConfig
+        analysis_config = DatabaseConfig.get_analysis_config()
+        redis_client = get_redis_client()
+
+        if not analysis_config["result_cache_enabled"] or redis_client is None:
+            get_result_cache._instance = None
+        else:
+            get_result_cache._instance = ResultCache(
+                redis_client, ttl_seconds=analysis_config["result_cache_ttl_seconds"]
+            )
+
+    return get_result_cache._instance
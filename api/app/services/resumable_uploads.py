@@ -0,0 +1,251 @@
+"""
+Resumable Upload Sessions
+=========================
+
+Chunked upload protocol for large documents over unreliable links. A client
+creates a session with the file's size (and optionally its SHA-256), PUTs
+chunks at byte offsets in any order, asks which ranges have arrived, and
+finalizes once everything is there; after a failure only the missing ranges
+are resent.
+
+Sessions live on local disk under data/.uploads/<upload_id>/: session.json
+with the declared metadata and one file per received chunk named by its
+offset. Chunks are written to a temporary file and renamed into place, so a
+half-received chunk never counts as received and concurrent PUTs need no
+shared state. On finalize the chunks are assembled in offset order into a
+staged upload (hashing as they are copied) whose SHA-256 is checked before
+the document is registered.
+"""
+
+import os
+import json
+import asyncio
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import tempfile
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+
+from app.services.uploads import StagedUpload, UploadTooLarge
+
+logger = logging.getLogger(__name__)
+
+SESSION_FILE = "session.json"
+CHUNK_SUFFIX = ".chunk"
+# Request body bytes collected before each write to the chunk file
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+class UploadSessionError(Exception):
+    """Raised for requests that do not fit the upload session"""
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent [start, end) ranges"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class ResumableUploadStore:
+    """Upload sessions and their chunks on local disk"""
+
+    def __init__(self, root: str, chunk_bytes: int = 8 * 1024 * 1024,
+                 max_chunk_bytes: int = 64 * 1024 * 1024, ttl_seconds: int = 86400,
+                 max_bytes: int = 0):
+        self.root = root
+        self.chunk_bytes = chunk_bytes
+        self.max_chunk_bytes = max_chunk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def create_session(self, user_id: str, filename: str, size_bytes: int,
+                       sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Start an upload session"""
+        if size_bytes <= 0:
+            raise UploadSessionError("size_bytes must be positive")
+        if self.max_bytes and size_bytes > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the maximum size of {self.max_bytes} bytes")
+
+        self.cleanup_expired()
+        upload_id = uuid.uuid4().hex
+        now = time.time()
+        session = {
+            "upload_id": upload_id,
+            "user_id": str(user_id),
+            "filename": filename,
+            "size_bytes": size_bytes,
+            "sha256": sha256.lower() if sha256 else None,
+            "chunk_bytes": self.chunk_bytes,
+            "created_at": now,
+            "expires_at": now + self.ttl_seconds
+        }
+        os.makedirs(self._session_dir(upload_id))
+        with open(os.path.join(self._session_dir(upload_id), SESSION_FILE), "w") as f:
+            json.dump(session, f)
+        return session
+
+    def get_session(self, upload_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a live session owned by user_id"""
+        path = os.path.join(self._session_dir(upload_id), SESSION_FILE)
+        try:
+            with open(path) as f:
+                session = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if session["user_id"] != str(user_id) or session["expires_at"] < time.time():
+            return None
+        return session
+
+    async def write_chunk(self, session: Dict[str, Any], offset: int, body: AsyncIterator[bytes]) -> int:
+        """Store a chunk starting at offset from a streamed request body; returns its length"""
+        if offset < 0 or offset >= session["size_bytes"]:
+            raise UploadSessionError(f"Offset {offset} is outside the file")
+
+        session_dir = self._session_dir(session["upload_id"])
+        fd, temp_path = await asyncio.to_thread(tempfile.mkstemp, dir=session_dir, suffix=".part")
+        length = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                # Body pieces are small; disk writes happen in the thread pool, a buffer at a time
+                buffer = bytearray()
+                async for data in body:
+                    length += len(data)
+                    if length > self.max_chunk_bytes:
+                        raise UploadSessionError(f"Chunks are limited to {self.max_chunk_bytes} bytes")
+                    if offset + length > session["size_bytes"]:
+                        raise UploadSessionError("Chunk extends past the declared file size")
+                    buffer += data
+                    if len(buffer) >= WRITE_BUFFER_BYTES:
+                        await asyncio.to_thread(f.write, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(f.write, bytes(buffer))
+            if length == 0:
+                raise UploadSessionError("Empty chunk")
+            # The length is part of the name so a shorter resend at the same offset
+            # does not replace a longer chunk
+            await asyncio.to_thread(
+                os.replace, temp_path, os.path.join(session_dir, f"{offset:020d}_{length}{CHUNK_SUFFIX}")
+            )
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return length
+
+    def received_ranges(self, session: Dict[str, Any]) -> List[Tuple[int, int]]:
+        """Byte ranges [start, end) received so far, merged"""
+        return _merge_ranges([(offset, offset + length) for offset, length, _ in self._chunks(session)])
+
+    def missing_ranges(self, session: Dict[str, Any]) -> List[Tuple[int, int]]:
+        """Byte ranges [start, end) still to be sent"""
+        missing = []
+        position = 0
+        for start, end in self.received_ranges(session):
+            if start > position:
+                missing.append((position, start))
+            position = max(position, end)
+        if position < session["size_bytes"]:
+            missing.append((position, session["size_bytes"]))
+        return missing
+
+    def assemble(self, session: Dict[str, Any], target_dir: str, sha256: Optional[str] = None) -> StagedUpload:
+        """Join the chunks into a staged upload in target_dir, verifying its SHA-256"""
+        if self.missing_ranges(session):
+            raise UploadSessionError("Upload is incomplete")
+        expected = (sha256 or session["sha256"] or "").lower()
+        if not expected:
+            raise UploadSessionError("sha256 is required to finalize the upload")
+
+        os.makedirs(target_dir, exist_ok=True)
+        md5 = hashlib.md5()
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=target_dir, prefix=".upload-", suffix=".part")
+        position = 0
+        try:
+            with os.fdopen(fd, "wb") as target:
+                for offset, length, path in self._chunks(session):
+                    if offset + length <= position:
+                        continue
+                    with open(path, "rb") as chunk:
+                        # Skip the part of an overlapping chunk that is already written
+                        chunk.seek(position - offset)
+                        while True:
+                            data = chunk.read(1024 * 1024)
+                            if not data:
+                                break
+                            md5.update(data)
+                            digest.update(data)
+                            target.write(data)
+                            position += len(data)
+            if digest.hexdigest() != expected:
+                raise UploadSessionError("SHA-256 of the assembled file does not match")
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        return StagedUpload(temp_path, position, md5.hexdigest(), digest.hexdigest())
+
+    def delete_session(self, upload_id: str) -> None:
+        """Remove a session and its chunks"""
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+
+    def cleanup_expired(self) -> int:
+        """Remove sessions past their expiry"""
+        removed = 0
+        now = time.time()
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            try:
+                with open(os.path.join(entry.path, SESSION_FILE)) as f:
+                    expired = json.load(f)["expires_at"] < now
+            except (FileNotFoundError, ValueError, KeyError):
+                # Half-created session; only reclaim it once it is old
+                expired = os.stat(entry.path).st_mtime < now - self.ttl_seconds
+            if expired:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _chunks(self, session: Dict[str, Any]) -> List[Tuple[int, int, str]]:
+        """(offset, length, path) of every stored chunk, by offset"""
+        session_dir = self._session_dir(session["upload_id"])
+        chunks = []
+        for name in os.listdir(session_dir):
+            if name.endswith(CHUNK_SUFFIX):
+                offset, length = name[:-len(CHUNK_SUFFIX)].split("_")
+                chunks.append((int(offset), int(length), os.path.join(session_dir, name)))
+        return sorted(chunks)
+
+    def _session_dir(self, upload_id: str) -> str:
+        # upload_id comes from the URL; only accept the hex IDs we issue
+        if not upload_id.isalnum():
+            raise UploadSessionError("Invalid upload ID")
+        return os.path.join(self.root, upload_id)
+
+
+def get_resumable_upload_store() -> ResumableUploadStore:
+    """Get the shared resumable upload store"""
+    if not hasattr(get_resumable_upload_store, '_instance'):
+        from app.config import DatabaseConfig
+        upload_config = DatabaseConfig.get_upload_config()
+        get_resumable_upload_store._instance = ResumableUploadStore(
+            upload_config["sessions_dir"],
+            chunk_bytes=upload_config["resumable_chunk_bytes"],
+            max_chunk_bytes=upload_config["resumable_max_chunk_bytes"],
+            ttl_seconds=upload_config["session_ttl_seconds"],
+            max_bytes=upload_config["max_bytes"]
+        )
+
+    return get_resumable_upload_store._instance
@@ -0,0 +1,312 @@
+"""
+Document Storage
+================
+
+Hands analysis inputs from the API to the workers by key instead of by
+local path, so the two can run on separate nodes. The API stores a file
+under a key (its path relative to the storage root, e.g.
+"analysis_<id>_<user>.pdf" or "blobs/ab/<sha256>.pdf") and passes the key in
+the task; the worker asks its WorkerFileCache for a local path.
+
+Two backends (STORAGE_BACKEND):
+- local: keys are files under STORAGE_LOCAL_ROOT (default data/), the
+  layout used so far; API and workers must share that directory.
+- s3: keys are objects in an S3-compatible bucket. STORAGE_S3_ENDPOINT_URL
+  points the client at MinIO or a moto server for local testing (see
+  scripts/check_storage.py). Requires boto3.
+
+Workers keep fetched objects in a size-bounded local cache, evicting the
+least recently used, so repeated analyses of a document download it once.
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+LOCAL_BACKEND = "local"
+S3_BACKEND = "s3"
+
+
+class StorageError(Exception):
+    """Raised when a storage backend cannot be used or a key is invalid"""
+
+
+def _copy_into_place(source_path: str, destination: str) -> None:
+    """Copy a file to destination atomically"""
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(destination) or ".", prefix=".storage-", suffix=".part")
+    os.close(fd)
+    try:
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, destination)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class ObjectStorage(ABC):
+    """Files stored by key"""
+
+    @abstractmethod
+    def put_file(self, key: str, source_path: str) -> None:
+        """Store a local file under key"""
+        pass
+
+    @abstractmethod
+    def fetch(self, key: str, destination: str) -> None:
+        """Copy the object at key to a local file"""
+        pass
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether an object is stored under key"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the object at key, if any"""
+        pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        """The object's path when it is directly readable on this node"""
+        return None
+
+
+class LocalStorage(ObjectStorage):
+    """Keys are files under a shared root directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        root = os.path.normpath(self.root)
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(root)]) != os.path.abspath(root):
+            raise StorageError(f"Invalid storage key: {key}")
+        return path
+
+    def put_file(self, key: str, source_path: str) -> None:
+        destination = self.path(key)
+        if os.path.abspath(source_path) != os.path.abspath(destination):
+            _copy_into_place(source_path, destination)
+
+    def fetch(self, key: str, destination: str) -> None:
+        _copy_into_place(self.path(key), destination)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.path(key)
+
+
+class S3Storage(ObjectStorage):
+    """Keys are objects in an S3-compatible bucket"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise StorageError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        if not bucket:
+            raise StorageError("STORAGE_S3_BUCKET must be set for STORAGE_BACKEND=s3")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client_error = ClientError
+        # Credentials come from the usual AWS environment variables or profile
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put_file(self, key: str, source_path: str) -> None:
+        self.client.upload_file(source_path, self.bucket, self._object_key(key))
+
+    def fetch(self, key: str, destination: str) -> None:
+        directory = os.path.dirname(destination) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".storage-", suffix=".part")
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._object_key(key), temp_path)
+            os.replace(temp_path, destination)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+
+class WorkerFileCache:
+    """Local copies of stored objects on a worker node, bounded in size"""
+
+    def __init__(self, storage: ObjectStorage, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        self.storage = storage
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Striped so concurrent fetches of one key download it once
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    def get(self, key: str) -> str:
+        """Local path of the object at key, fetching it on a miss"""
+        path = self.storage.local_path(key)
+        if path is not None:
+            return path
+
+        path = self._cache_path(key)
+        with self._key_lock(key):
+            if os.path.exists(path):
+                # Touch so eviction sees it as recently used
+                os.utime(path)
+                return path
+            self.storage.fetch(key, path)
+            logger.info(f"Fetched {key} into the worker file cache")
+        self._evict(keep=path)
+        return path
+
+    def forget(self, key: str) -> None:
+        """Drop the cached copy of key"""
+        if self.storage.local_path(key) is not None:
+            return
+        try:
+            os.remove(self._cache_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _cache_path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.cache_dir, key))
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(self.cache_dir)]) != os.path.abspath(self.cache_dir):
+            raise StorageError(f"Invalid storage key: {key}")
+        return path
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used files until the cache fits max_bytes"""
+        if not self.max_bytes:
+            return
+        entries = []
+        for directory, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.startswith(".storage-"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+def storage_key(path: str) -> str:
+    """Storage key of a file under the local storage root"""
+    from app.config import DatabaseConfig
+    root = DatabaseConfig.get_storage_config()["local_root"]
+    key = os.path.relpath(path, root)
+    if key.startswith(os.pardir):
+        raise StorageError(f"{path} is outside the storage root {root}")
+    return key.replace(os.sep, "/")
+
+
+def get_storage() -> ObjectStorage:
+    """Get the configured storage backend"""
+    if not hasattr(get_storage, '_instance'):
+        from app.config import DatabaseConfig
+        storage_config = DatabaseConfig.get_storage_config()
+
+        if storage_config["backend"] == S3_BACKEND:
+            get_storage._instance = S3Storage(
+                storage_config["s3_bucket"],
+                prefix=storage_config["s3_prefix"],
+                endpoint_url=storage_config["s3_endpoint_url"],
+                region=storage_config["s3_region"]
+            )
+        elif storage_config["backend"] == LOCAL_BACKEND:
+            get_storage._instance = LocalStorage(storage_config["local_root"])
+        else:
+            raise StorageError(f"Unknown STORAGE_BACKEND: {storage_config['backend']}")
+
+    return get_storage._instance
+
+
+def get_worker_file_cache() -> WorkerFileCache:
+    """Get this worker's file cache"""
+    if not hasattr(get_worker_file_cache, '_instance'):
+        from app.config import DatabaseConfig
+        storage_config = DatabaseConfig.get_storage_config()
+        get_worker_file_cache._instance = WorkerFileCache(
+            get_storage(),
+            storage_config["cache_dir"],
+            max_bytes=storage_config["cache_max_bytes"]
+        )
+
+    return get_worker_file_cache._instance
+
+
+def store_for_workers(file_path: str, skip_existing: bool = False) -> str:
+    """Make a local file available to workers and return its key.
+
+    With local storage the file already is the object. Otherwise it is
+    uploaded, unless skip_existing is set and the key exists (document files
+    never change once stored, so an existing key has the same bytes).
+    """
+    key = storage_key(file_path)
+    storage = get_storage()
+    if storage.local_path(key) is None and not (skip_existing and storage.exists(key)):
+        storage.put_file(key, file_path)
+    return key
+
+
+def delete_for_workers(file_path: str) -> None:
+    """Delete the object store_for_workers made of a local file.
+
+    With local storage the file is the object and goes with the file itself.
+    """
+    key = storage_key(file_path)
+    storage = get_storage()
+    if storage.local_path(key) is None:
+        storage.delete(key)
@@ -0,0 +1,333 @@
+"""
+Task Status Events
+==================
+
+Push channel for task status, so clients follow their analyses over one
+connection instead of polling /tasks/{task_id}/status per task.
+
+Workers publish an event whenever they write task state (each throttled
+ProgressReporter write, and the final outcome when the task returns, fails
+or is retried) to the Redis channel analysis:task-events:<task_id>, and
+keep the latest event of each task under analysis:task-event:<task_id> so a
+client that connects or polls later starts from the current state. Every
+published event gets a "seq" from one Redis counter, assigned in the same
+script that stores and publishes it, so clients order events by seq rather
+than by the clocks of the hosts that raised them; events built from the
+result backend have none (seq 0). Each API
+process runs one TaskEventHub: a single pattern subscription to all task
+channels that fans events out to the streams open in that process, so the
+number of Redis connections does not grow with the number of clients.
+
+With the embedded executor tasks run inside the API process, so events are
+handed to the hub directly and the latest events and the counter are kept
+in memory.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.celery_app import TaskStatus
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "analysis:task-events"
+LAST_EVENT_PREFIX = "analysis:task-event"
+SEQUENCE_KEY = "analysis:task-event-seq"
+
+# Numbers the event, stores it as the task's latest and publishes it in one
+# step, so the stored latest event is always the one with the highest seq
+PUBLISH_SCRIPT = """
+local event = cjson.decode(ARGV[1])
+event["seq"] = redis.call("INCR", KEYS[1])
+local payload = cjson.encode(event)
+redis.call("SET", KEYS[2], payload, "EX", ARGV[2])
+redis.call("PUBLISH", KEYS[3], payload)
+return event["seq"]
+"""
+
+STATUS_PENDING = "pending"
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_RETRYING = "retrying"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+STATUS_NOT_FOUND = "not_found"
+
+TERMINAL_STATUSES = {STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED, STATUS_NOT_FOUND}
+
+# Events a slow client may have waiting before the oldest are dropped; a
+# later event of the same task supersedes an earlier one anyway
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Latest events kept in memory with the embedded executor
+LOCAL_LAST_EVENTS = 10000
+
+# How long a new subscription waits for the Redis pattern subscription to be
+# active before its caller reads the current state anyway
+LISTENER_READY_TIMEOUT_SECONDS = 2
+
+
+def build_event(task_id: str, status: str, progress: int = 0, message: str = "",
+                **fields: Any) -> Dict[str, Any]:
+    """A task status event; extra fields (stage, report_id, error) are kept when set"""
+    event = {
+        "task_id": task_id,
+        "status": status,
+        "progress": progress,
+        "message": message,
+        "at": time.time()
+    }
+    event.update({name: value for name, value in fields.items() if value is not None})
+    return event
+
+
+def event_from_state(task_id: str, state: str, result: Any = None,
+                     report_id: Optional[str] = None) -> Dict[str, Any]:
+    """Event for a task in the given Celery state; result is the task's return
+    value, its exception or its progress meta, as the result backend holds it"""
+    info = result if isinstance(result, dict) else {}
+    if state == TaskStatus.PENDING:
+        return build_event(task_id, STATUS_PENDING, 0, "Task is waiting to be processed", report_id=report_id)
+    if state == TaskStatus.STARTED:
+        return build_event(task_id, STATUS_IN_PROGRESS, info.get("progress", 0),
+                           info.get("message", "Task in progress"), stage=info.get("stage"),
+                           report_id=report_id)
+    if state == TaskStatus.SUCCESS:
+        report_id = info.get("report_id") or report_id
+        if info.get("status") == "cancelled":
+            return build_event(task_id, STATUS_CANCELLED, 100, "Task was cancelled", report_id=report_id)
+        if info.get("status") == "failed":
+            return build_event(task_id, STATUS_FAILED, 0, "Task failed", report_id=report_id,
+                               error=info.get("error"))
+        return build_event(task_id, STATUS_COMPLETED, 100, "Task completed successfully", report_id=report_id)
+    if state == TaskStatus.FAILURE:
+        error = info.get("exc_message", "Unknown error") if info else str(result)
+        return build_event(task_id, STATUS_FAILED, 0, "Task failed", report_id=report_id, error=str(error))
+    if state == TaskStatus.RETRY:
+        return build_event(task_id, STATUS_RETRYING, 0, "Task is being retried", report_id=report_id)
+    if state == TaskStatus.REVOKED:
+        return build_event(task_id, STATUS_CANCELLED, 0, "Task was cancelled", report_id=report_id)
+    return build_event(task_id, state.lower(), 0, f"Task status: {state}", report_id=report_id)
+
+
+def publish_task_event(task_id: str, status: str, progress: int = 0, message: str = "",
+                       **fields: Any) -> None:
+    """Publish a task status event to the clients following the task"""
+    publish_event(build_event(task_id, status, progress, message, **fields))
+
+
+def publish_event(event: Dict[str, Any]) -> None:
+    """Publish a built event (see build_event and event_from_state)"""
+    task_id = event["task_id"]
+
+    from app.services.embedded_executor import get_embedded_executor
+    if get_embedded_executor() is not None:
+        get_task_event_hub().publish_local(event)
+        return
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return
+    try:
+        from app.config import DatabaseConfig
+        ttl = DatabaseConfig.get_task_events_config()["last_event_ttl_seconds"]
+        redis_client.register_script(PUBLISH_SCRIPT)(
+            keys=[SEQUENCE_KEY, f"{LAST_EVENT_PREFIX}:{task_id}", f"{CHANNEL_PREFIX}:{task_id}"],
+            args=[json.dumps(event), ttl]
+        )
+    except Exception as e:
+        # Clients fall back to the stored task state; the task itself goes on
+        logger.warning(f"Could not publish event for task {task_id}: {str(e)}")
+
+
+def current_sequence() -> int:
+    """The seq of the latest event published for any task"""
+    from app.services.embedded_executor import get_embedded_executor
+    if get_embedded_executor() is not None:
+        return get_task_event_hub().local_sequence()
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return 0
+    return int(redis_client.get(SEQUENCE_KEY) or 0)
+
+
+def get_last_events(task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """The latest published event of each task that has one, keyed by task ID"""
+    if not task_ids:
+        return {}
+
+    from app.services.embedded_executor import get_embedded_executor
+    if get_embedded_executor() is not None:
+        return get_task_event_hub().local_last_events(task_ids)
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return {}
+    payloads = redis_client.mget([f"{LAST_EVENT_PREFIX}:{task_id}" for task_id in task_ids])
+    return {
+        task_id: json.loads(payload)
+        for task_id, payload in zip(task_ids, payloads)
+        if payload
+    }
+
+
+class TaskEventSubscription:
+    """Events of a set of tasks, delivered to one client connection"""
+
+    def __init__(self, hub: "TaskEventHub", task_ids: Iterable[str]):
+        self.hub = hub
+        self.task_ids = set(task_ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def put(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The next event, or None when none arrives within timeout seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Events already waiting, without blocking"""
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class TaskEventHub:
+    """Fans task events out to the subscriptions open in this API process"""
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[TaskEventSubscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._listening: Optional[asyncio.Event] = None
+        self._last_events: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._last_events_lock = threading.Lock()
+        self._sequence = 0
+
+    async def subscribe(self, task_ids: Iterable[str]) -> TaskEventSubscription:
+        """Start receiving the events of the given tasks.
+
+        Returns once the Redis subscription is active, so an event published
+        after the caller reads the current state is never missed.
+        """
+        listening = self._ensure_listening()
+        subscription = TaskEventSubscription(self, task_ids)
+        for task_id in subscription.task_ids:
+            self._subscriptions.setdefault(task_id, set()).add(subscription)
+
+        if listening is not None and not listening.is_set():
+            try:
+                await asyncio.wait_for(listening.wait(), LISTENER_READY_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning("Task event subscription is not active yet; reading the current state anyway")
+            except BaseException:
+                subscription.close()
+                raise
+        return subscription
+
+    def unsubscribe(self, subscription: TaskEventSubscription) -> None:
+        for task_id in subscription.task_ids:
+            subscribers = self._subscriptions.get(task_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[task_id]
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """Deliver an event to the subscriptions of its task; runs on the event loop"""
+        for subscription in list(self._subscriptions.get(event.get("task_id"), ())):
+            subscription.put(event)
+
+    def publish_local(self, event: Dict[str, Any]) -> None:
+        """Record and deliver an event raised in this process (embedded executor)"""
+        with self._last_events_lock:
+            self._sequence += 1
+            event = dict(event, seq=self._sequence)
+            self._last_events[event["task_id"]] = event
+            self._last_events.move_to_end(event["task_id"])
+            while len(self._last_events) > LOCAL_LAST_EVENTS:
+                self._last_events.popitem(last=False)
+
+        # Tasks run in executor threads; subscriptions live on the event loop
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.dispatch, event)
+
+    def local_sequence(self) -> int:
+        with self._last_events_lock:
+            return self._sequence
+
+    def local_last_events(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        with self._last_events_lock:
+            return {task_id: self._last_events[task_id] for task_id in task_ids if task_id in self._last_events}
+
+    def _ensure_listening(self) -> Optional[asyncio.Event]:
+        """Start the Redis listener if needed; returns the event set while it is subscribed"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._listener = None
+            self._listening = asyncio.Event()
+
+        from app.services.embedded_executor import get_embedded_executor
+        from app.celery_app import REDIS_URL
+        if get_embedded_executor() is not None or not REDIS_URL:
+            return None
+        if self._listener is None or self._listener.done():
+            self._listener = loop.create_task(self._listen(REDIS_URL))
+        return self._listening
+
+    async def _listen(self, redis_url: str) -> None:
+        """Relay events from the Redis task channels, reconnecting after errors"""
+        import redis.asyncio as aioredis
+
+        client = aioredis.from_url(redis_url, decode_responses=True, socket_connect_timeout=2)
+        listening = self._listening
+        while True:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}:*")
+                listening.set()
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    try:
+                        self.dispatch(json.loads(message["data"]))
+                    except ValueError:
+                        logger.warning(f"Ignoring malformed task event on {message.get('channel')}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Task event subscription lost, reconnecting: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                listening.clear()
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
+
+def get_task_event_hub() -> TaskEventHub:
+    """Get this process's task event hub"""
+    if not hasattr(get_task_event_hub, '_instance'):
+        get_task_event_hub._instance = TaskEventHub()
+
+    return get_task_event_hub._instance
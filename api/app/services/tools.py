@@ -9,6 +9,7 @@ investment analysis, risk assessment, and financial metrics extraction.
 import os
 import re
 import logging
+import tempfile
 import requests
 from typing import Dict, List, Optional, Any
 from decimal import Decimal, InvalidOperation
@@ -95,6 +96,29 @@ def search_tool(query: str, max_results: int = 5) -> str:
 
 
 
+def _parsed_text_cache_path(path: str) -> Optional[str]:
+    """Where the extracted text of a blob-store document is cached, if it is one"""
+    try:
+        from app.services.blob_store import get_blob_store
+        blob_store = get_blob_store()
+        return blob_store.artifact_path(path, "text") if blob_store.contains(path) else None
+    except Exception as e:
+        logger.warning(f"Parsed text cache unavailable: {str(e)}")
+        return None
+
+
+def _write_parsed_text_cache(cache_path: str, text: str) -> None:
+    """Write the cache atomically so concurrent readers never see a partial file"""
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path),
+                                         prefix=os.path.basename(cache_path) + ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not cache parsed text at {cache_path}: {str(e)}")
+
+
 @tool("read_financial_document")
 def read_financial_document(path: str = 'data/sample.pdf') -> str:
     """
@@ -117,6 +141,13 @@ def read_financial_document(path: str = 'data/sample.pdf') -> str:
         if not path.lower().endswith('.pdf'):
             raise ValueError("File must be a PDF document")
         
+        # Documents in the blob store are parsed once per content
+        text_cache_path = _parsed_text_cache_path(path)
+        if text_cache_path and os.path.exists(text_cache_path):
+            logger.info(f"Using cached text of {path}")
+            with open(text_cache_path, "r", encoding="utf-8") as f:
+                return f.read()
+        
         logger.info(f"Processing PDF file: {path}")
         loader = PyPDFLoader(path)
         docs = loader.load()
@@ -138,7 +169,10 @@ def read_financial_document(path: str = 'data/sample.pdf') -> str:
             full_report += content + "\n"
 
         logger.info(f"Successfully processed {len(docs)} pages from {path}")
-        return full_report.strip()
+        full_report = full_report.strip()
+        if text_cache_path:
+            _write_parsed_text_cache(text_cache_path, full_report)
+        return full_report
 
     except Exception as e:
         logger.error(f"Error processing PDF {path}: {str(e)}")
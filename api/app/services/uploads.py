@@ -0,0 +1,98 @@
+"""
+Streaming Uploads
+=================
+
+Copies an uploaded file to disk in fixed-size chunks, updating the MD5 (used
+in stored file names) and SHA-256 (document checksum) digests as the chunks
+pass, so an upload is never held in memory as a whole. Data goes to a
+temporary file in the destination directory and is renamed into place only
+once complete, so readers never see a partial file.
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import BinaryIO
+
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+
+
+class StagedUpload:
+    """An upload written to a temporary file, with its size and digests"""
+
+    def __init__(self, temp_path: str, size_bytes: int, md5: str, sha256: str):
+        self.temp_path = temp_path
+        self.size_bytes = size_bytes
+        self.md5 = md5
+        self.sha256 = sha256
+
+    def commit(self, destination: str) -> str:
+        """Atomically move the staged file to its final path"""
+        os.replace(self.temp_path, destination)
+        self.temp_path = destination
+        return destination
+
+    def discard(self) -> None:
+        """Remove the staged file if it was not committed"""
+        if self.temp_path is None:
+            return
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def _copy_stream(source: BinaryIO, directory: str, chunk_bytes: int, max_bytes: int) -> StagedUpload:
+    """Copy source into a temporary file in directory, hashing it on the way"""
+    os.makedirs(directory, exist_ok=True)
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    size_bytes = 0
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as target:
+            while True:
+                chunk = source.read(chunk_bytes)
+                if not chunk:
+                    break
+                size_bytes += len(chunk)
+                if max_bytes and size_bytes > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the maximum size of {max_bytes} bytes")
+                md5.update(chunk)
+                sha256.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return StagedUpload(temp_path, size_bytes, md5.hexdigest(), sha256.hexdigest())
+
+
+async def stage_upload(upload: UploadFile, directory: str) -> StagedUpload:
+    """Stream an upload into a temporary file in directory (off the event loop)"""
+    from app.config import DatabaseConfig
+    upload_config = DatabaseConfig.get_upload_config()
+
+    await upload.seek(0)
+    return await asyncio.to_thread(
+        _copy_stream, upload.file, directory, upload_config["chunk_bytes"], upload_config["max_bytes"]
+    )
+
+
+async def save_upload(upload: UploadFile, destination: str) -> StagedUpload:
+    """Stream an upload to destination and return its size and digests"""
+    staged = await stage_upload(upload, os.path.dirname(destination) or ".")
+    staged.commit(destination)
+    return staged
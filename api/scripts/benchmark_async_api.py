@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Async Request Path Benchmark
+============================
+
+Compares the two ways an async handler can reach the database under mixed
+load: calling the synchronous models directly (blocking the event loop
+while each query runs) and awaiting them through AsyncModel, which runs
+them in the database thread pool.
+
+Each mode serves the same mix on one event loop: database requests (a
+document listing with its file-existence check, as GET /documents does)
+alongside light requests that never touch the database (as /health or a
+cached status read). Reported are database request throughput and the
+latency of the light requests, which is what other users see while the
+database is busy.
+
+Local SQLite answers in microseconds, so --db-latency-ms adds a fixed
+delay to every repository call to stand in for a networked database
+(MongoDB or a busy disk).
+
+Usage (from the api directory):
+    python scripts/benchmark_async_api.py --requests 400 --concurrency 32 --db-latency-ms 5
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+MODES = ["blocking", "offloaded"]
+
+
+class SlowRepository:
+    """Delays every call of a repository by a fixed latency"""
+
+    def __init__(self, repository, latency_seconds: float):
+        self._repository = repository
+        self._latency_seconds = latency_seconds
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._repository, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency_seconds)
+            return attribute(*args, **kwargs)
+
+        return call
+
+
+def seed_documents(document_repo, data_dir: str, users: int, per_user: int) -> None:
+    """Create per_user small documents for each user"""
+    documents = []
+    for user_id in range(1, users + 1):
+        for i in range(per_user):
+            path = os.path.join(data_dir, f"user{user_id}_doc{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(b"%PDF-1.4\n")
+            documents.append({
+                "user_id": user_id,
+                "original_name": f"report_{i}.pdf",
+                "stored_name": os.path.basename(path),
+                "path": path,
+                "size_bytes": 9
+            })
+    document_repo.create_documents(documents)
+
+
+async def run_mode(mode: str, document_model, args) -> None:
+    from app.models.async_models import AsyncModel
+    from app.services import async_files
+
+    async_model = AsyncModel(document_model)
+
+    async def database_request(user_id: int) -> None:
+        if mode == "blocking":
+            documents = document_model.get_user_documents(user_id, limit=100, offset=0)
+            [doc for doc in documents if os.path.isfile(doc["path"])]
+        else:
+            documents = await async_model.get_user_documents(user_id, limit=100, offset=0)
+            await async_files.existing_files(doc["path"] for doc in documents)
+
+    async def light_request() -> float:
+        started_at = time.perf_counter()
+        await asyncio.sleep(0)
+        return time.perf_counter() - started_at
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    light_latencies = []
+    done = asyncio.Event()
+
+    async def database_client(i: int) -> None:
+        async with semaphore:
+            await database_request(i % args.users + 1)
+
+    async def light_client() -> None:
+        while not done.is_set():
+            light_latencies.append(await light_request())
+            await asyncio.sleep(args.light_interval_ms / 1000)
+
+    started_at = time.perf_counter()
+    light_clients = [asyncio.create_task(light_client()) for _ in range(args.light_clients)]
+    await asyncio.gather(*[database_client(i) for i in range(args.requests)])
+    elapsed = time.perf_counter() - started_at
+    done.set()
+    await asyncio.gather(*light_clients)
+
+    light_latencies.sort()
+    p50 = statistics.median(light_latencies) * 1000
+    p99 = light_latencies[int(len(light_latencies) * 0.99) - 1] * 1000
+    print(f"{mode:<10} {args.requests / elapsed:>8.1f} db req/s  "
+          f"light p50 {p50:>7.2f} ms  p99 {p99:>7.2f} ms  max {light_latencies[-1] * 1000:>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="Database requests per mode")
+    parser.add_argument("--concurrency", type=int, default=32, help="Database requests in flight")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="Added latency per repository call")
+    parser.add_argument("--light-clients", type=int, default=8, help="Clients sending light requests")
+    parser.add_argument("--light-interval-ms", type=float, default=5.0, help="Pause between a client's light requests")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--documents-per-user", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    from app.models.sqlite_db import SQLiteDatabase, SQLiteDocumentRepository
+    from app.models.document_models import Document
+
+    work_dir = tempfile.mkdtemp(prefix="async_api_bench_")
+    try:
+        data_dir = os.path.join(work_dir, "data")
+        os.makedirs(data_dir)
+        db = SQLiteDatabase(os.path.join(work_dir, "bench.db"))
+        document_repo = SQLiteDocumentRepository(db)
+        seed_documents(document_repo, data_dir, args.users, args.documents_per_user)
+        document_model = Document(SlowRepository(document_repo, args.db_latency_ms / 1000))
+
+        print(f"{args.requests} database requests, {args.concurrency} in flight, "
+              f"{args.db_latency_ms} ms per repository call, {args.light_clients} light clients")
+        for mode in args.modes:
+            asyncio.run(run_mode(mode, document_model, args))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Upload Memory Benchmark
+=======================
+
+Compares peak RSS of the old buffered upload path (read the whole upload,
+write it, hash it twice) with the streaming path in app.services.uploads
+under concurrent large uploads.
+
+Uploads are fed from a generated source file through Starlette UploadFile
+objects, as the API receives them. Each mode runs in its own subprocess so
+its peak RSS (ru_maxrss) is measured in isolation.
+
+Usage (from the api directory):
+    python scripts/benchmark_uploads.py --size-mb 200 --concurrency 4
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import hashlib
+import argparse
+import resource
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+MODES = ["buffered", "streaming"]
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process (ru_maxrss is KiB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def buffered_upload(upload, destination: str) -> str:
+    """The previous upload path: whole file in memory"""
+    content = await upload.read()
+    hashlib.md5(content).hexdigest()
+    with open(destination, "wb") as f:
+        f.write(content)
+    return hashlib.sha256(content).hexdigest()
+
+
+async def streaming_upload(upload, destination: str) -> str:
+    from app.services.uploads import save_upload
+    return (await save_upload(upload, destination)).sha256
+
+
+async def run_uploads(mode: str, source: str, concurrency: int, target_dir: str) -> None:
+    from starlette.datastructures import UploadFile
+
+    upload_fn = buffered_upload if mode == "buffered" else streaming_upload
+    files = [open(source, "rb") for _ in range(concurrency)]
+    try:
+        uploads = [UploadFile(file=f, filename=f"upload_{i}.pdf") for i, f in enumerate(files)]
+        await asyncio.gather(*[
+            upload_fn(upload, os.path.join(target_dir, f"{mode}_{i}.pdf"))
+            for i, upload in enumerate(uploads)
+        ])
+    finally:
+        for f in files:
+            f.close()
+
+
+def run_mode(mode: str, args) -> None:
+    """Child process: run one mode and print its measurements"""
+    baseline = peak_rss_mb()
+    target_dir = tempfile.mkdtemp(prefix=f"upload_bench_{mode}_")
+    started_at = time.perf_counter()
+    try:
+        asyncio.run(run_uploads(mode, args.source, args.concurrency, target_dir))
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - started_at
+    print(f"{mode:<10} {elapsed:>8.2f}s  peak RSS {peak_rss_mb():>8.1f} MB  (baseline {baseline:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=200, help="Size of each upload")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent uploads")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args)
+        return
+
+    fd, source = tempfile.mkstemp(prefix="upload_bench_", suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        print(f"{args.concurrency} concurrent uploads of {args.size_mb} MB")
+        for mode in args.modes:
+            subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--source", source,
+                 "--concurrency", str(args.concurrency)],
+                check=True
+            )
+    finally:
+        os.remove(source)
+
+
+if __name__ == "__main__":
+    main()
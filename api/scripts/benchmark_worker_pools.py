@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Worker Pool Benchmark
+=====================
+
+Compares analysis throughput of the prefork, thread and gevent worker pools
+using a stubbed crew run: each run makes a series of "LLM calls" that only
+wait (like the real OpenAI and web search round trips) plus a small amount of
+CPU work for parsing and report generation.
+
+For every pool the script starts a dedicated Celery worker on a private
+queue, submits the same number of stub runs, waits for all of them and
+prints throughput and latency percentiles.
+
+Usage (Redis must be reachable at REDIS_URL):
+    python scripts/benchmark_worker_pools.py --tasks 40 --llm-calls 4 --llm-latency 2.5
+    python scripts/benchmark_worker_pools.py --pools prefork:2 threads:16 gevent:32
+"""
+
+import os
+import sys
+import time
+import socket
+import uuid
+import argparse
+import hashlib
+import importlib.util
+import statistics
+import subprocess
+
+from celery import Celery
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+QUEUE = "benchmark"
+
+bench_app = Celery("pool_benchmark", broker=REDIS_URL, backend=REDIS_URL)
+bench_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    result_expires=600,
+)
+
+
+@bench_app.task(name="benchmark.stub_crew_run")
+def stub_crew_run(llm_calls: int, llm_latency: float, cpu_iterations: int):
+    """Stand-in for a crew run: LLM waits plus parse/report CPU work"""
+    started_at = time.time()
+    digest = b""
+    for _ in range(llm_calls):
+        # time.sleep is cooperative under gevent's monkey patching
+        time.sleep(llm_latency)
+        for _ in range(cpu_iterations):
+            digest = hashlib.sha256(digest + b"page").digest()
+    return {"started_at": started_at, "finished_at": time.time()}
+
+
+def run_pool(pool: str, concurrency: int, args) -> dict:
+    """Start a worker with the given pool, run the workload and stop the worker"""
+    hostname = f"bench-{pool}-{uuid.uuid4().hex[:6]}@{socket.gethostname()}"
+    command = [
+        sys.executable, "-m", "celery", "-A", "benchmark_worker_pools:bench_app", "worker",
+        f"--pool={pool}", f"--concurrency={concurrency}", f"--queues={QUEUE}",
+        f"--hostname={hostname}", "--loglevel=warning", "--without-gossip", "--without-mingle",
+    ]
+    worker = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        # Wait until the worker answers a ping so startup is not measured
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            if bench_app.control.ping(destination=[hostname], timeout=1.0):
+                break
+        else:
+            raise RuntimeError(f"{pool} worker did not start")
+
+        submitted_at = time.time()
+        results = [
+            stub_crew_run.apply_async(
+                args=(args.llm_calls, args.llm_latency, args.cpu_iterations), queue=QUEUE
+            )
+            for _ in range(args.tasks)
+        ]
+        timings = [result.get(timeout=args.timeout) for result in results]
+        elapsed = time.time() - submitted_at
+    finally:
+        worker.terminate()
+        worker.wait(timeout=30)
+
+    latencies = sorted(timing["finished_at"] - submitted_at for timing in timings)
+    return {
+        "pool": pool,
+        "concurrency": concurrency,
+        "elapsed_seconds": elapsed,
+        "throughput_per_minute": args.tasks / elapsed * 60,
+        "p50_latency": statistics.median(latencies),
+        "p95_latency": latencies[max(0, int(round(0.95 * len(latencies))) - 1)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Celery worker pools with a stubbed LLM")
+    parser.add_argument("--pools", nargs="+", default=["prefork:2", "threads:16", "gevent:32"],
+                        help="pool:concurrency pairs to compare")
+    parser.add_argument("--tasks", type=int, default=40, help="stub crew runs per pool")
+    parser.add_argument("--llm-calls", type=int, default=4, help="LLM round trips per run")
+    parser.add_argument("--llm-latency", type=float, default=2.5, help="seconds per LLM round trip")
+    parser.add_argument("--cpu-iterations", type=int, default=20000, help="hash rounds per LLM call")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds to wait for a pool")
+    args = parser.parse_args()
+
+    rows = []
+    for entry in args.pools:
+        pool, _, concurrency = entry.partition(":")
+        if pool == "gevent":
+            if importlib.util.find_spec("gevent") is None:
+                print("Skipping gevent: package not installed")
+                continue
+        print(f"Running {args.tasks} stub analyses on {pool} x{concurrency or 2}...")
+        rows.append(run_pool(pool, int(concurrency or 2), args))
+
+    baseline = rows[0]["throughput_per_minute"] if rows else 0
+    print()
+    print(f"{'pool':<10}{'conc':>6}{'elapsed s':>12}{'runs/min':>10}{'p50 s':>9}{'p95 s':>9}{'speedup':>9}")
+    for row in rows:
+        speedup = row["throughput_per_minute"] / baseline if baseline else 0
+        print(f"{row['pool']:<10}{row['concurrency']:>6}{row['elapsed_seconds']:>12.1f}"
+              f"{row['throughput_per_minute']:>10.1f}{row['p50_latency']:>9.1f}"
+              f"{row['p95_latency']:>9.1f}{speedup:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Storage Round-Trip Check
+========================
+
+Exercises the configured document storage backend the way the API and a
+worker use it: store a file by key, fetch it through the worker file cache,
+check the bytes, then delete it. Point STORAGE_S3_ENDPOINT_URL at a local
+stand-in to test the S3 backend without AWS, e.g.:
+
+    docker run -p 9000:9000 minio/minio server /data     # or: moto_server -p 9000
+    STORAGE_BACKEND=s3 STORAGE_S3_BUCKET=documents \\
+    STORAGE_S3_ENDPOINT_URL=http://localhost:9000 \\
+    AWS_ACCESS_KEY_ID=minioadmin AWS_SECRET_ACCESS_KEY=minioadmin \\
+    python scripts/check_storage.py --create-bucket
+
+Usage (from the api directory):
+    python scripts/check_storage.py [--size-mb 5] [--create-bucket]
+"""
+
+import os
+import sys
+import time
+import uuid
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=5, help="Size of the test file")
+    parser.add_argument("--create-bucket", action="store_true", help="Create the S3 bucket first")
+    args = parser.parse_args()
+
+    from app.config import DatabaseConfig
+    from app.services.storage import get_storage, WorkerFileCache, S3Storage
+
+    storage = get_storage()
+    print(f"Backend: {type(storage).__name__}")
+    if args.create_bucket and isinstance(storage, S3Storage):
+        try:
+            storage.client.create_bucket(Bucket=storage.bucket)
+        except storage.client.exceptions.BucketAlreadyOwnedByYou:
+            pass
+
+    key = f"storage_check_{uuid.uuid4().hex}.pdf"
+    source_dir = tempfile.mkdtemp(prefix="storage_check_src_")
+    cache_dir = tempfile.mkdtemp(prefix="storage_check_cache_")
+    source = os.path.join(source_dir, key)
+    with open(source, "wb") as f:
+        f.write(os.urandom(args.size_mb * 1024 * 1024))
+    expected = file_sha256(source)
+
+    cache = WorkerFileCache(storage, cache_dir,
+                            max_bytes=DatabaseConfig.get_storage_config()["cache_max_bytes"])
+    try:
+        started_at = time.perf_counter()
+        storage.put_file(key, source)
+        print(f"put      {time.perf_counter() - started_at:>8.3f}s")
+        assert storage.exists(key), "object missing after put"
+
+        started_at = time.perf_counter()
+        path = cache.get(key)
+        print(f"fetch    {time.perf_counter() - started_at:>8.3f}s  -> {path}")
+        assert file_sha256(path) == expected, "fetched bytes differ"
+
+        started_at = time.perf_counter()
+        cache.get(key)
+        print(f"cached   {time.perf_counter() - started_at:>8.3f}s")
+
+        storage.delete(key)
+        cache.forget(key)
+        assert not storage.exists(key), "object still present after delete"
+        print("OK")
+    finally:
+        shutil.rmtree(source_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
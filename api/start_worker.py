@@ -4,24 +4,46 @@ Celery Worker Startup Script
 ============================
 
 This script starts a Celery worker for processing financial document analysis tasks.
+
+Crew runs are dominated by waiting on the LLM and web search, so besides the
+default prefork pool the worker can run a thread or gevent pool that keeps
+many crews in flight per process. Select it with WORKER_POOL and size it with
+WORKER_CONCURRENCY (see env.example). WORKER_QUEUES selects the queues, so
+small and large documents can be served by separate worker pools.
 """
 
 import os
 import sys
-from celery import Celery
+from dotenv import load_dotenv
+
+load_dotenv(".env")
+
+POOL = os.getenv("WORKER_POOL", "prefork").lower()
+
+# gevent must patch the standard library before anything opens sockets
+if POOL == "gevent":
+    try:
+        from gevent import monkey
+    except ImportError:
+        sys.exit("WORKER_POOL=gevent requires the gevent package (pip install gevent)")
+    monkey.patch_all()
 
 # Add the app directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
 # Import the Celery app
 from app.celery_app import celery_app
+from app.config import DatabaseConfig
 
 if __name__ == '__main__':
+    worker_config = DatabaseConfig.get_worker_config()
+
     # Start the worker
     celery_app.worker_main([
         'worker',
         '--loglevel=info',
-        '--concurrency=2',
-        '--queues=analysis,celery',
+        f'--pool={worker_config["pool"]}',
+        f'--concurrency={worker_config["concurrency"]}',
+        f'--queues={worker_config["queues"]}',
         '--hostname=worker@%h'
     ])
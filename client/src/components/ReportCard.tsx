@@ -66,8 +66,9 @@ export function ReportCard({ report, onDelete, onRefetch, onTaskComplete }: Repo
 
   const handleViewContent = async (reportId: string) => {
     try {
-      const response = await reportsAPI.getContent(reportId);
-      const content = response.data.content;
+      // Plain Markdown, revalidated by the browser cache (304 when unchanged)
+      const response = await reportsAPI.streamContent(reportId);
+      const content = response.data;
       
       // Create a new tab with the markdown content
       const newTab = window.open('', '_blank');
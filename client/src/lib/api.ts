@@ -84,8 +84,8 @@ export const documentsAPI = {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
   },
-  download: (filename: string) =>
-    api.get(`/documents/download/${filename}`, { responseType: 'blob' }),
+  download: (documentId: string) =>
+    api.get(`/documents/${documentId}/download`, { responseType: 'blob' }),
   delete: (documentId: string) => api.delete(`/documents/${documentId}`),
 };
 
@@ -145,6 +145,8 @@ export const reportsAPI = {
   download: (reportId: string) =>
     api.get(`/reports/${reportId}/download`, { responseType: 'blob' }),
   getContent: (reportId: string) => api.get(`/reports/${reportId}/content`),
+  streamContent: (reportId: string) =>
+    api.get<string>(`/reports/${reportId}/content/stream`, { responseType: 'text' }),
   getStats: () => api.get('/reports/stats/summary'),
 };
 
@@ -141,9 +141,9 @@ export default function DocumentsPage() {
     }
   };
 
-  const handleDownload = async (filename: string) => {
+  const handleDownload = async (documentId: string, filename: string) => {
     try {
-      const response = await documentsAPI.download(filename);
+      const response = await documentsAPI.download(documentId);
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
       link.href = url;
@@ -319,7 +319,7 @@ export default function DocumentsPage() {
                   <Button
                     size="sm"
                     variant="outline"
-                    onClick={() => handleDownload(doc.name)}
+                    onClick={() => handleDownload(doc.id, doc.name)}
                     className="flex-1"
                   >
                     <Download className="h-4 w-4 mr-1" />